@@ -0,0 +1,139 @@
+from utils.logger_config import configure_logger
+from utils.profiling import ProfiledRoute
+from fastapi.security import OAuth2PasswordRequestForm
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from modules.api.auth.schemas import Token
+from modules.api.users.models import User
+from modules.database.dependencies import get_async_users_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from modules.api.auth.functions import (
+    authenticate_user_async,
+    store_refresh_token_async,
+    rotate_refresh_token_async,
+    refresh_tokens_page_query,
+    refresh_token_summary,
+)
+from jose import JWTError
+from modules.api.auth.keys import decode_token
+from modules.api.auth.tokens import get_token_factory
+from modules.api.users.functions import (
+    get_user_by_email_async,
+    oauth2_scheme,
+    get_current_user_async,
+)
+from modules.api.auth.rate_limit import LoginRateLimiter, get_login_rate_limiter
+from modules.api.auth.security import anonymize, hash_token
+from modules.api.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    NDJSON_MEDIA_TYPE,
+    aiter_ndjson,
+    paginate,
+)
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import List, Literal
+
+logger = configure_logger()
+
+auth_async_router = APIRouter(route_class=ProfiledRoute)
+
+
+@auth_async_router.post("/login", response_model=Token)
+async def login_for_access_token(
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_users_db),
+    rate_limiter: LoginRateLimiter = Depends(get_login_rate_limiter),
+):
+    email = anonymize(form_data.username)
+    client_ip = request.client.host if request.client else None
+    await rate_limiter.check_async(email, client_ip)
+    user = await authenticate_user_async(db, form_data.username, form_data.password)
+    if not user:
+        await rate_limiter.failed_async(email)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    await rate_limiter.succeeded_async(email)
+
+    app_name = form_data.scopes[0] if form_data.scopes else "default"
+
+    access_token, refresh_token, refresh_expiry = get_token_factory().issue_pair(
+        user.email, user.role.role, app_name
+    )
+    hashed_token = hash_token(refresh_token)
+    await store_refresh_token_async(
+        db, user.id, hashed_token, refresh_expiry, app_name=app_name
+    )
+
+    return JSONResponse(
+        {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "token_type": "bearer",
+        }
+    )
+
+
+@auth_async_router.post("/refresh", response_model=Token)
+async def refresh_token(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_users_db),
+):
+    try:
+        payload = decode_token(token)
+        email = payload.get("sub")
+        app_name = payload.get("app") or "default"
+        token_type = payload.get("type")
+        if token_type != "refresh":
+            raise HTTPException(status_code=401, detail="Invalid token for refresh")
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    user = await get_user_by_email_async(email, db)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found.")
+
+    new_access_token, new_refresh_token, refresh_expiry = (
+        get_token_factory().issue_pair(email, user.role.role, app_name)
+    )
+    rotated = await rotate_refresh_token_async(
+        db, hash_token(token), hash_token(new_refresh_token), refresh_expiry
+    )
+    if not rotated:
+        raise HTTPException(
+            status_code=401, detail="Refresh token not found, expired or revoked"
+        )
+
+    return JSONResponse(
+        {
+            "access_token": new_access_token,
+            "refresh_token": new_refresh_token,
+            "token_type": "bearer",
+        }
+    )
+
+
+@auth_async_router.get("/refresh-tokens", response_model=List[dict])
+async def list_refresh_tokens(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: int | None = None,
+    format: Literal["json", "ndjson"] = "json",
+    db: AsyncSession = Depends(get_async_users_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied.")
+
+    if format == "ndjson":
+        return StreamingResponse(
+            aiter_ndjson(db, refresh_tokens_page_query, refresh_token_summary),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    result = await db.execute(refresh_tokens_page_query(after, limit + 1))
+    rows = result.all()
+    return [refresh_token_summary(row) for row in paginate(rows, limit, response)]
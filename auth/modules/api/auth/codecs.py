@@ -0,0 +1,189 @@
+import base64
+import hashlib
+import hmac
+import json
+from calendar import timegm
+from datetime import datetime, timezone
+from jose import ExpiredSignatureError, JWTError, jwk
+from jose import jwt as jose_jwt
+
+# Claims holding a date, converted to a Unix timestamp when encoding.
+TIME_CLAIMS = ("exp", "iat", "nbf")
+
+
+class JoseCodec:
+    """JWT encoding and decoding with python-jose."""
+
+    name = "jose"
+    algorithms = ("HS256", "RS256", "ES256")
+
+    def signing_key(self, material: str, algorithm: str):
+        return jwk.construct(material, algorithm)
+
+    def verifying_key(self, signing_key, algorithm: str):
+        if algorithm.startswith("HS"):
+            return signing_key
+        return signing_key.public_key()
+
+    def public_jwk(self, verifying_key, algorithm: str) -> dict:
+        return verifying_key.to_dict()
+
+    def header(self, token: str) -> dict:
+        return jose_jwt.get_unverified_header(token)
+
+    def encode(self, claims: dict, key, algorithm: str, headers: dict | None = None) -> str:
+        return jose_jwt.encode(claims, key, algorithm=algorithm, headers=headers)
+
+    def decode(self, token: str, key, algorithm: str) -> dict:
+        return jose_jwt.decode(token, key, algorithms=[algorithm])
+
+
+class PyJWTCodec:
+    """JWT encoding and decoding with PyJWT, errors raised as jose's JWTError."""
+
+    name = "pyjwt"
+    algorithms = ("HS256", "RS256", "ES256")
+
+    def __init__(self):
+        import jwt
+
+        self._jwt = jwt
+        self._algorithms = jwt.algorithms.get_default_algorithms()
+
+    def signing_key(self, material: str, algorithm: str):
+        return self._algorithms[algorithm].prepare_key(material)
+
+    def verifying_key(self, signing_key, algorithm: str):
+        if algorithm.startswith("HS"):
+            return signing_key
+        return signing_key.public_key()
+
+    def public_jwk(self, verifying_key, algorithm: str) -> dict:
+        return json.loads(self._algorithms[algorithm].to_jwk(verifying_key))
+
+    def header(self, token: str) -> dict:
+        try:
+            return self._jwt.get_unverified_header(token)
+        except self._jwt.PyJWTError as e:
+            raise JWTError(str(e))
+
+    def encode(self, claims: dict, key, algorithm: str, headers: dict | None = None) -> str:
+        return self._jwt.encode(claims, key, algorithm=algorithm, headers=headers)
+
+    def decode(self, token: str, key, algorithm: str) -> dict:
+        try:
+            return self._jwt.decode(token, key, algorithms=[algorithm])
+        except self._jwt.ExpiredSignatureError as e:
+            raise ExpiredSignatureError(str(e))
+        except self._jwt.PyJWTError as e:
+            raise JWTError(str(e))
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+def _dumps(value: dict) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+class HMACCodec:
+    """
+    HS256 only fast path: the HMAC state of the secret is computed once and
+    copied for every token, and only the claims this service relies on
+    (``exp``, ``nbf``) are checked. Produces the same tokens as python-jose.
+    """
+
+    name = "hmac"
+    algorithms = ("HS256",)
+
+    def __init__(self):
+        self._encoded_headers = {}
+
+    def signing_key(self, material: str, algorithm: str):
+        return hmac.new(material.encode(), digestmod=hashlib.sha256)
+
+    def verifying_key(self, signing_key, algorithm: str):
+        return signing_key
+
+    def public_jwk(self, verifying_key, algorithm: str) -> dict:
+        raise ValueError("Symmetric keys are never published.")
+
+    def _split(self, token: str) -> tuple[bytes, bytes, bytes, bytes]:
+        try:
+            signing_input, signature = token.encode().rsplit(b".", 1)
+            header, payload = signing_input.split(b".")
+        except ValueError:
+            raise JWTError("Not enough segments")
+        return signing_input, header, payload, signature
+
+    def header(self, token: str) -> dict:
+        _, header, _, _ = self._split(token)
+        try:
+            return json.loads(_b64decode(header))
+        except ValueError:
+            raise JWTError("Invalid header")
+
+    def _encoded_header(self, algorithm: str, headers: dict | None) -> bytes:
+        cache_key = (algorithm, tuple(sorted((headers or {}).items())))
+        encoded = self._encoded_headers.get(cache_key)
+        if encoded is None:
+            header = {"alg": algorithm, "typ": "JWT", **(headers or {})}
+            encoded = _b64encode(
+                json.dumps(header, separators=(",", ":"), sort_keys=True).encode()
+            )
+            self._encoded_headers[cache_key] = encoded
+        return encoded
+
+    def encode(self, claims: dict, key, algorithm: str, headers: dict | None = None) -> str:
+        for name in TIME_CLAIMS:
+            if isinstance(claims.get(name), datetime):
+                claims = {**claims, name: timegm(claims[name].utctimetuple())}
+        signing_input = (
+            self._encoded_header(algorithm, headers) + b"." + _b64encode(_dumps(claims))
+        )
+        mac = key.copy()
+        mac.update(signing_input)
+        return (signing_input + b"." + _b64encode(mac.digest())).decode()
+
+    def decode(self, token: str, key, algorithm: str) -> dict:
+        signing_input, header, payload, signature = self._split(token)
+        mac = key.copy()
+        mac.update(signing_input)
+        if not hmac.compare_digest(_b64encode(mac.digest()), signature):
+            raise JWTError("Signature verification failed.")
+        try:
+            if json.loads(_b64decode(header)).get("alg") != algorithm:
+                raise JWTError("The specified alg value is not allowed")
+            claims = json.loads(_b64decode(payload))
+        except ValueError:
+            raise JWTError("Invalid token encoding")
+        if not isinstance(claims, dict):
+            raise JWTError("Invalid payload")
+
+        now = timegm(datetime.now(timezone.utc).utctimetuple())
+        try:
+            if "exp" in claims and int(claims["exp"]) < now:
+                raise ExpiredSignatureError("Signature has expired.")
+            if "nbf" in claims and int(claims["nbf"]) > now:
+                raise JWTError("The token is not yet valid (nbf)")
+        except (TypeError, ValueError):
+            raise JWTError("Invalid time claim")
+        return claims
+
+
+CODECS = {codec.name: codec for codec in (JoseCodec, PyJWTCodec, HMACCodec)}
+
+
+def get_codec(name: str, algorithm: str):
+    """Instantiate the codec called ``name``, checking it supports ``algorithm``."""
+    if name not in CODECS:
+        raise ValueError(f"Unknown JWT codec: '{name}'")
+    codec = CODECS[name]()
+    if algorithm not in codec.algorithms:
+        raise ValueError(f"The '{name}' JWT codec does not support '{algorithm}'")
+    return codec
@@ -0,0 +1,188 @@
+import argparse
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+from sqlalchemy import and_, delete, or_, select
+from sqlalchemy.orm import Session
+from utils.logger_config import configure_logger
+from utils.metrics import (
+    COMPACTION_BATCH_SECONDS,
+    COMPACTION_RUN_SECONDS,
+    REFRESH_TOKEN_COMPACTION_ROWS,
+)
+from modules.api.auth.models import RefreshToken
+from modules.api.users.models import User  # noqa: F401 (configures the mappers)
+from modules.database.session import UsersSessionLocal
+
+logger = configure_logger()
+
+load_dotenv()
+
+# How long expired or revoked refresh tokens are kept before being deleted.
+REFRESH_TOKEN_RETENTION_DAYS = float(os.getenv("REFRESH_TOKEN_RETENTION_DAYS") or 7)
+REFRESH_TOKEN_COMPACTION_BATCH = int(os.getenv("REFRESH_TOKEN_COMPACTION_BATCH") or 1000)
+# Seconds between two in-process compactions, 0 disables the scheduler.
+REFRESH_TOKEN_COMPACTION_INTERVAL = float(
+    os.getenv("REFRESH_TOKEN_COMPACTION_INTERVAL") or 3600
+)
+# SQLite only: "off", "incremental" (PRAGMA incremental_vacuum) or "full" (VACUUM).
+REFRESH_TOKEN_COMPACTION_VACUUM = os.getenv("REFRESH_TOKEN_COMPACTION_VACUUM") or "off"
+
+VACUUM_MODES = ("off", "incremental", "full")
+
+
+class CompactionStats:
+    """Counters describing the refresh token compactions run so far."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.batches = 0
+        self.rows_reclaimed = 0
+        self.last_run_rows = 0
+        self.last_run_seconds = 0.0
+        self.max_batch_seconds = 0.0
+
+    def record_batch(self, rows: int, elapsed: float):
+        with self._lock:
+            self.batches += 1
+            self.rows_reclaimed += rows
+            self.max_batch_seconds = max(self.max_batch_seconds, elapsed)
+        REFRESH_TOKEN_COMPACTION_ROWS.inc(rows)
+        COMPACTION_BATCH_SECONDS.observe(elapsed)
+
+    def record_run(self, rows: int, elapsed: float):
+        with self._lock:
+            self.runs += 1
+            self.last_run_rows = rows
+            self.last_run_seconds = elapsed
+        COMPACTION_RUN_SECONDS.observe(elapsed)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "batches": self.batches,
+                "rows_reclaimed": self.rows_reclaimed,
+                "last_run_rows": self.last_run_rows,
+                "last_run_seconds": self.last_run_seconds,
+                "max_batch_seconds": self.max_batch_seconds,
+            }
+
+
+compaction_stats = CompactionStats()
+
+
+def purge_refresh_tokens(
+    db: Session,
+    retention: timedelta = timedelta(days=REFRESH_TOKEN_RETENTION_DAYS),
+    batch_size: int = REFRESH_TOKEN_COMPACTION_BATCH,
+) -> int:
+    """
+    Delete refresh tokens expired, or revoked, for longer than ``retention``.
+
+    Rows are deleted in batches of ``batch_size``, each in its own
+    transaction, so that writers are never blocked for long.
+    Returns the number of deleted rows.
+    """
+    cutoff = datetime.now(timezone.utc) - retention
+    stale = or_(
+        RefreshToken.expires_at < cutoff,
+        and_(RefreshToken.revoked.is_(True), RefreshToken.created_at < cutoff),
+    )
+
+    total = 0
+    while True:
+        start = time.perf_counter()
+        batch = select(RefreshToken.id).where(stale).limit(batch_size)
+        deleted = db.execute(
+            delete(RefreshToken)
+            .where(RefreshToken.id.in_(batch.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        compaction_stats.record_batch(deleted, time.perf_counter() - start)
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+def vacuum_database(db: Session, mode: str = REFRESH_TOKEN_COMPACTION_VACUUM):
+    """Give the space freed by a compaction back to the filesystem (SQLite only)."""
+    if mode not in VACUUM_MODES:
+        raise ValueError(f"Unknown vacuum mode: '{mode}'")
+    engine = db.get_bind()
+    if mode == "off" or engine.dialect.name != "sqlite":
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if mode == "incremental" and conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:
+            # incremental_vacuum is a no-op unless auto_vacuum is INCREMENTAL,
+            # which databases created without it only get from a full VACUUM.
+            logger.info("Switching the database to incremental auto_vacuum.")
+            conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+            mode = "full"
+        if mode == "full":
+            conn.exec_driver_sql("VACUUM")
+        else:
+            # Each step of the statement frees one page, and the driver only
+            # steps it once: repeat it within one transaction.
+            conn.exec_driver_sql("BEGIN")
+            free_pages = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+            for _ in range(free_pages):
+                conn.exec_driver_sql("PRAGMA incremental_vacuum")
+            conn.exec_driver_sql("COMMIT")
+
+
+def compact_refresh_tokens(
+    session_factory=UsersSessionLocal,
+    retention: timedelta = timedelta(days=REFRESH_TOKEN_RETENTION_DAYS),
+    batch_size: int = REFRESH_TOKEN_COMPACTION_BATCH,
+    vacuum: str = REFRESH_TOKEN_COMPACTION_VACUUM,
+) -> int:
+    """Run one compaction: purge stale refresh tokens, then vacuum if asked to."""
+    start = time.perf_counter()
+    with session_factory() as db:
+        deleted = purge_refresh_tokens(db, retention, batch_size)
+        if deleted:
+            vacuum_database(db, vacuum)
+    elapsed = time.perf_counter() - start
+    compaction_stats.record_run(deleted, elapsed)
+    logger.info(f"Refresh token compaction: {deleted} rows reclaimed in {elapsed:.3f}s")
+    return deleted
+
+
+async def run_compaction_periodically(
+    interval: float = REFRESH_TOKEN_COMPACTION_INTERVAL,
+):
+    """Background task running compact_refresh_tokens every ``interval`` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(compact_refresh_tokens)
+        except Exception as e:
+            logger.error(f"Refresh token compaction failed: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Delete expired and revoked refresh tokens."
+    )
+    parser.add_argument(
+        "--retention-days", type=float, default=REFRESH_TOKEN_RETENTION_DAYS
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=REFRESH_TOKEN_COMPACTION_BATCH
+    )
+    parser.add_argument(
+        "--vacuum", choices=VACUUM_MODES, default=REFRESH_TOKEN_COMPACTION_VACUUM
+    )
+    args = parser.parse_args()
+
+    compact_refresh_tokens(
+        retention=timedelta(days=args.retention_days),
+        batch_size=args.batch_size,
+        vacuum=args.vacuum,
+    )
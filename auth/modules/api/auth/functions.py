@@ -1,72 +1,98 @@
-from modules.api.auth.security import verify_password, anonymize, hash_token
-from datetime import datetime, timedelta
-from jose import jwt
-import os
-from dotenv import load_dotenv
-from utils.logger_config import configure_logger
-from modules.api.users.functions import get_user_by_email
+from modules.api.auth.security import (
+    verify_password,
+    verify_password_async,
+    hash_password,
+    hash_password_async,
+    needs_rehash,
+    anonymize,
+    dummy_hash,
+    hash_token,
+)
+import time
+from datetime import datetime, timedelta, timezone
+from modules.api.auth.keys import encode_token
+from modules.api.auth.tokens import ROLE_SCOPES
+from utils.logger_config import log_event
+from modules.api.users.functions import get_user_by_email, get_user_by_email_async
+from modules.api.users.known_emails import known_emails
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from modules.api.auth.models import RefreshToken
 
 
-logger = configure_logger()
-
-load_dotenv()
-
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = "HS256"
-
-
 def create_token(data: dict, expires_delta: timedelta = None):
-    to_encode = data.copy()
-    expire = datetime.now() + (
-        expires_delta if expires_delta else timedelta(minutes=60)
+    """Sign ``data`` as a token; login and refresh use the TokenFactory instead."""
+    token_type = data.get("type", "access")
+    expire = int(time.time()) + int(
+        (expires_delta or timedelta(minutes=60)).total_seconds()
     )
+    to_encode = {**data, "token_type": token_type, "exp": expire}
+    if token_type == "access":
+        to_encode["scopes"] = ROLE_SCOPES.get(data.get("role"), [])
 
-    role = data.get("role")
-    scopes_map = {"admin": ["admin"], "reader": ["reader"]}
-    scopes = scopes_map.get(role, [])
+    encoded_jwt = encode_token(to_encode)
+    log_event(
+        "token.created",
+        "Token {token_type} created (role: {role})",
+        token_type=token_type,
+        role=data.get("role"),
+    )
+    return encoded_jwt
 
-    token_type = data.get("type", "access")
-    to_encode["token_type"] = token_type
 
-    if token_type == "access":
-        to_encode["scopes"] = scopes
+def authenticate_user(db: Session, email: str, password: str):
+    """Authenticate a user by verifying their email and password."""
 
-    to_encode["exp"] = expire
+    anonymized_email = anonymize(email)
 
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    user = None
+    if known_emails.might_exist(db, anonymized_email):
+        user = get_user_by_email(anonymized_email, db)
 
-    if token_type == "access":
-        logger.info(
-            f"Token {token_type} created (role: {role})"
-            f"Expire at {expire.strftime('%Y-%m-%d %H:%M:%S')}"
-        )
-    else:
-        logger.info(
-            f"Token {token_type} created"
-            f"Expire at {expire.strftime('%Y-%m-%d %H:%M:%S')}"
-        )
+    if not user:
+        # Same password check as for a known user, so timing reveals nothing.
+        verify_password(password, dummy_hash())
+        log_event("auth.user_not_found", "User not found.")
+        return False
 
-    return encoded_jwt
+    if not verify_password(password, user.hashed_password):
+        log_event("auth.invalid_password", "Invalid password.")
+        return False
 
+    if needs_rehash(user.hashed_password):
+        user.hashed_password = hash_password(password)
+        db.commit()
+        log_event("auth.rehashed", "Password rehashed with the current work factor.")
 
-def authenticate_user(db: Session, email: str, password: str):
-    """Authenticate a user by verifying their email and password."""
+    log_event("auth.succeeded", "{user} successfully authenticated", user=user.name.upper())
+    return user
+
+
+async def authenticate_user_async(db: AsyncSession, email: str, password: str):
+    """Async variant of authenticate_user."""
 
     anonymized_email = anonymize(email)
 
-    user = get_user_by_email(anonymized_email, db)
+    user = None
+    if await known_emails.might_exist_async(db, anonymized_email):
+        user = await get_user_by_email_async(anonymized_email, db)
 
     if not user:
-        logger.info("User not found.")
+        await verify_password_async(password, dummy_hash())
+        log_event("auth.user_not_found", "User not found.")
         return False
 
-    if not verify_password(password, user.hashed_password):
-        logger.info("Invalid password.")
+    if not await verify_password_async(password, user.hashed_password):
+        log_event("auth.invalid_password", "Invalid password.")
         return False
 
-    logger.info(f"{user.name.upper()} successfully authenticated")
+    if needs_rehash(user.hashed_password):
+        user.hashed_password = await hash_password_async(password)
+        await db.commit()
+        log_event("auth.rehashed", "Password rehashed with the current work factor.")
+
+    log_event("auth.succeeded", "{user} successfully authenticated", user=user.name.upper())
     return user
 
 
@@ -91,21 +117,189 @@ def store_refresh_token(
     db.commit()
 
 
+async def store_refresh_token_async(
+    db: AsyncSession,
+    user_id: int,
+    token: str,
+    expires_at: datetime,
+    app_name: str = None,
+):
+    """Async variant of store_refresh_token."""
+    await db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.user_id == user_id,
+            RefreshToken.app_name == app_name,
+            RefreshToken.revoked.is_(False),
+        )
+        .values(revoked=True)
+    )
+
+    db.add(
+        RefreshToken(
+            token=token,
+            user_id=user_id,
+            expires_at=expires_at,
+            app_name=app_name,
+            revoked=False,
+        )
+    )
+    await db.commit()
+
+
+def _revoke_statement(provided_token: str):
+    return (
+        update(RefreshToken)
+        .where(
+            RefreshToken.token == provided_token,
+            RefreshToken.revoked.is_(False),
+            RefreshToken.expires_at > datetime.now(timezone.utc),
+        )
+        .values(revoked=True)
+    )
+
+
+def _successor_statement(revoked, token: str, expires_at: datetime):
+    return insert(RefreshToken).values(
+        token=token,
+        user_id=revoked.user_id,
+        expires_at=expires_at,
+        app_name=revoked.app_name,
+        revoked=False,
+    )
+
+
+def rotate_refresh_token(
+    db: Session, provided_token: str, new_token: str, expires_at: datetime
+):
+    """
+    Revoke a live refresh token and store its successor in one transaction.
+
+    The revocation uses UPDATE ... RETURNING when the database supports it,
+    so the whole rotation costs one UPDATE, one INSERT and one commit.
+    Returns the (user_id, app_name) of the rotated token, or None when the
+    presented token is unknown, expired or already revoked.
+    """
+    revoke = _revoke_statement(provided_token)
+
+    if db.get_bind().dialect.update_returning:
+        revoked = db.execute(
+            revoke.returning(RefreshToken.user_id, RefreshToken.app_name)
+        ).first()
+    else:
+        revoked = db.execute(
+            select(RefreshToken.id, RefreshToken.user_id, RefreshToken.app_name)
+            .where(revoke.whereclause)
+            .with_for_update()
+        ).first()
+        if revoked:
+            db.execute(
+                update(RefreshToken)
+                .where(RefreshToken.id == revoked.id)
+                .values(revoked=True)
+            )
+
+    if not revoked:
+        db.rollback()
+        log_event(
+            "refresh_token.rotation_refused",
+            "Refresh token rotation refused: unknown, expired or revoked.",
+            "WARNING",
+        )
+        return None
+
+    db.execute(_successor_statement(revoked, new_token, expires_at))
+    db.commit()
+    return revoked.user_id, revoked.app_name
+
+
+async def rotate_refresh_token_async(
+    db: AsyncSession, provided_token: str, new_token: str, expires_at: datetime
+):
+    """Async variant of rotate_refresh_token."""
+    revoke = _revoke_statement(provided_token)
+
+    if db.get_bind().dialect.update_returning:
+        result = await db.execute(
+            revoke.returning(RefreshToken.user_id, RefreshToken.app_name)
+        )
+        revoked = result.first()
+    else:
+        result = await db.execute(
+            select(RefreshToken.id, RefreshToken.user_id, RefreshToken.app_name)
+            .where(revoke.whereclause)
+            .with_for_update()
+        )
+        revoked = result.first()
+        if revoked:
+            await db.execute(
+                update(RefreshToken)
+                .where(RefreshToken.id == revoked.id)
+                .values(revoked=True)
+            )
+
+    if not revoked:
+        await db.rollback()
+        log_event(
+            "refresh_token.rotation_refused",
+            "Refresh token rotation refused: unknown, expired or revoked.",
+            "WARNING",
+        )
+        return None
+
+    await db.execute(_successor_statement(revoked, new_token, expires_at))
+    await db.commit()
+    return revoked.user_id, revoked.app_name
+
+
 def find_refresh_token(db: Session, provided_token: str) -> RefreshToken | None:
     refresh_token = (
         db.query(RefreshToken).filter(RefreshToken.token == provided_token).first()
     )
     if refresh_token:
-        logger.info(
-            f"""
-            Refresh token found: {refresh_token.token},
-            expires_at: {refresh_token.expires_at}
-            """
+        log_event(
+            "refresh_token.found",
+            "Refresh token {token_id} found, expires at {expires_at}",
+            token_id=refresh_token.id,
+            expires_at=refresh_token.expires_at,
         )
     else:
-        logger.warning("No refresh token found.")
+        log_event("refresh_token.missing", "No refresh token found.", "WARNING")
     return refresh_token
 
 
+def refresh_tokens_page_query(after: int | None = None, limit: int | None = None):
+    """
+    Column-only query over refresh tokens, ordered by id for keyset
+    pagination: rows come after the ``after`` id, at most ``limit``.
+    """
+    query = select(
+        RefreshToken.id,
+        RefreshToken.user_id,
+        RefreshToken.token,
+        RefreshToken.created_at,
+        RefreshToken.expires_at,
+        RefreshToken.revoked,
+        RefreshToken.app_name,
+    ).order_by(RefreshToken.id)
+    if after is not None:
+        query = query.where(RefreshToken.id > after)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def refresh_token_summary(row) -> dict:
+    """Public view of a refresh token row, with the token hash truncated."""
+    return {
+        "user_id": row.user_id,
+        "token": row.token[:10] + "...",
+        "created_at": row.created_at,
+        "expires_at": row.expires_at,
+        "revoked": row.revoked,
+        "app": row.app_name,
+    }
+
+
 def verify_token(provided_token: str, stored_hash: str) -> bool:
     return hash_token(provided_token) == stored_hash
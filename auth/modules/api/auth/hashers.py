@@ -0,0 +1,208 @@
+import base64
+import hashlib
+import hmac
+import math
+import os
+import secrets
+import threading
+import time
+import bcrypt
+from dotenv import load_dotenv
+from utils.logger_config import configure_logger
+
+logger = configure_logger()
+
+load_dotenv()
+
+# Algorithm of new password hashes: "bcrypt", "argon2id" or "scrypt". Stored
+# hashes of the other algorithms still verify and are upgraded on login.
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER") or "bcrypt"
+
+# bcrypt work factor. When unset, it is calibrated on first use (at startup)
+# so that hashing a password takes about BCRYPT_TARGET_MS on this host.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS") or 0) or None
+BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS") or 100)
+# Lower bound of the calibrated work factor.
+BCRYPT_MIN_ROUNDS = int(os.getenv("BCRYPT_MIN_ROUNDS") or 10)
+BCRYPT_MAX_ROUNDS = 31
+# Work factor timed by the calibration, each extra round doubles the cost.
+CALIBRATION_ROUNDS = 8
+
+# argon2id: passes, memory in KiB and lanes (threads) per hash.
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST") or 3)
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST") or 65536)
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM") or 4)
+
+# scrypt: CPU/memory cost as log2(N), block size and parallelization.
+SCRYPT_LOG_N = int(os.getenv("SCRYPT_LOG_N") or 14)
+SCRYPT_R = int(os.getenv("SCRYPT_R") or 8)
+SCRYPT_P = int(os.getenv("SCRYPT_P") or 1)
+
+
+def calibrate_bcrypt_rounds(
+    target_ms: float = BCRYPT_TARGET_MS, min_rounds: int = BCRYPT_MIN_ROUNDS
+) -> int:
+    """Highest work factor hashing within ``target_ms``, at least ``min_rounds``."""
+    salt = bcrypt.gensalt(CALIBRATION_ROUNDS)
+    elapsed = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration", salt)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    extra = math.floor(math.log2(target_ms / 1000 / max(elapsed, 1e-6)))
+    return max(min_rounds, min(CALIBRATION_ROUNDS + extra, BCRYPT_MAX_ROUNDS))
+
+
+class BcryptHasher:
+    """bcrypt, ``$2b$<rounds>$...`` hashes."""
+
+    name = "bcrypt"
+    prefixes = ("$2a$", "$2b$", "$2y$")
+
+    def __init__(self, rounds: int | None = BCRYPT_ROUNDS):
+        if rounds is None:
+            rounds = calibrate_bcrypt_rounds()
+            logger.info(
+                f"bcrypt work factor calibrated to {rounds} "
+                f"(target {BCRYPT_TARGET_MS:.0f} ms)."
+            )
+        self.rounds = rounds
+
+    def hash(self, password: str) -> str:
+        salt = bcrypt.gensalt(self.rounds)
+        return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return bcrypt.checkpw(password.encode(), hashed.encode())
+
+    def needs_rehash(self, hashed: str) -> bool:
+        # A higher stored cost is kept, calibration may vary between restarts.
+        return int(hashed.split("$")[2]) < self.rounds
+
+
+class Argon2Hasher:
+    """argon2id through argon2-cffi, ``$argon2id$v=19$m=...,t=...,p=...$...`` hashes."""
+
+    name = "argon2id"
+    prefixes = ("$argon2id$",)
+
+    def __init__(
+        self,
+        time_cost: int = ARGON2_TIME_COST,
+        memory_cost: int = ARGON2_MEMORY_COST,
+        parallelism: int = ARGON2_PARALLELISM,
+    ):
+        self.time_cost = time_cost
+        self.memory_cost = memory_cost
+        self.parallelism = parallelism
+
+    def _hasher(self):
+        from argon2 import PasswordHasher
+
+        return PasswordHasher(
+            time_cost=self.time_cost,
+            memory_cost=self.memory_cost,
+            parallelism=self.parallelism,
+        )
+
+    def hash(self, password: str) -> str:
+        return self._hasher().hash(password)
+
+    def verify(self, password: str, hashed: str) -> bool:
+        from argon2.exceptions import VerificationError
+
+        # A malformed hash raises InvalidHashError, a ValueError like bcrypt's.
+        try:
+            return self._hasher().verify(hashed, password)
+        except VerificationError:
+            return False
+
+    def needs_rehash(self, hashed: str) -> bool:
+        return self._hasher().check_needs_rehash(hashed)
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode().rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+class ScryptHasher:
+    """scrypt from hashlib, ``$scrypt$ln=<log2 N>,r=<r>,p=<p>$<salt>$<hash>`` hashes."""
+
+    name = "scrypt"
+    prefixes = ("$scrypt$",)
+    salt_size = 16
+    hash_size = 32
+
+    def __init__(self, log_n: int = SCRYPT_LOG_N, r: int = SCRYPT_R, p: int = SCRYPT_P):
+        self.log_n = log_n
+        self.r = r
+        self.p = p
+
+    @staticmethod
+    def _derive(password: str, salt: bytes, log_n: int, r: int, p: int) -> bytes:
+        return hashlib.scrypt(
+            password.encode("utf-8"),
+            salt=salt,
+            n=2**log_n,
+            r=r,
+            p=p,
+            maxmem=256 * r * (2**log_n + p),
+            dklen=ScryptHasher.hash_size,
+        )
+
+    @staticmethod
+    def _parse(hashed: str) -> tuple[dict, bytes, bytes]:
+        try:
+            _, _, params, salt, digest = hashed.split("$")
+            params = {k: int(v) for k, v in (item.split("=") for item in params.split(","))}
+            return params, _b64decode(salt), _b64decode(digest)
+        except ValueError:
+            raise ValueError("Invalid scrypt hash")
+
+    def hash(self, password: str) -> str:
+        salt = secrets.token_bytes(self.salt_size)
+        digest = self._derive(password, salt, self.log_n, self.r, self.p)
+        return (
+            f"$scrypt$ln={self.log_n},r={self.r},p={self.p}"
+            f"${_b64encode(salt)}${_b64encode(digest)}"
+        )
+
+    def verify(self, password: str, hashed: str) -> bool:
+        params, salt, digest = self._parse(hashed)
+        candidate = self._derive(password, salt, params["ln"], params["r"], params["p"])
+        return hmac.compare_digest(candidate, digest)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        params, _, _ = self._parse(hashed)
+        return (params["ln"], params["r"], params["p"]) != (self.log_n, self.r, self.p)
+
+
+HASHERS = {hasher.name: hasher for hasher in (BcryptHasher, Argon2Hasher, ScryptHasher)}
+
+_hashers = {}
+_hashers_lock = threading.Lock()
+
+
+def get_hasher(name: str = PASSWORD_HASHER):
+    """The hasher called ``name``, built with its configured parameters once."""
+    hasher = _hashers.get(name)
+    if hasher is None:
+        if name not in HASHERS:
+            raise ValueError(f"Unknown password hasher: '{name}'")
+        with _hashers_lock:
+            hasher = _hashers.get(name)
+            if hasher is None:
+                hasher = _hashers[name] = HASHERS[name]()
+    return hasher
+
+
+def identify_hasher(hashed: str):
+    """The hasher of a stored hash, from its prefix; ValueError if unknown."""
+    for name, hasher in HASHERS.items():
+        if hashed.startswith(hasher.prefixes):
+            return get_hasher(name)
+    raise ValueError("Unknown password hash format")
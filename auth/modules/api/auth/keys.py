@@ -0,0 +1,177 @@
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from dotenv import load_dotenv
+from jose import JWTError
+from utils.logger_config import configure_logger
+from utils.metrics import JWT_DECODE_SECONDS, JWT_ENCODE_SECONDS
+from modules.database.config import DATABASE_DIR
+from modules.api.auth.codecs import get_codec
+
+logger = configure_logger()
+
+load_dotenv()
+
+SECRET_KEY = os.getenv("SECRET_KEY")
+# ES256 and RS256 sign with the private keys of JWT_KEYS_DIR and publish the
+# public keys at /.well-known/jwks.json, which the backend verifies tokens
+# with. HS256 signs with SECRET_KEY and publishes nothing: only this service
+# can then verify its tokens.
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM") or "ES256"
+# One "<kid>.pem" private key per file. Kept next to the users database so
+# that both live on the same persistent volume.
+JWT_KEYS_DIR = Path(os.getenv("JWT_KEYS_DIR") or DATABASE_DIR / "keys")
+# Key used to sign new tokens, the last kid in sorted order when unset.
+JWT_ACTIVE_KID = os.getenv("JWT_ACTIVE_KID") or None
+# Library encoding and decoding tokens: "jose", "pyjwt" or "hmac" (HS256 only).
+# Defaults to "hmac" for HS256 and "jose" otherwise, the fastest measured.
+JWT_CODEC = os.getenv("JWT_CODEC") or None
+# How long verifiers may cache the JWKS, in seconds.
+JWKS_MAX_AGE = int(os.getenv("JWKS_MAX_AGE") or 300)
+
+SYMMETRIC_ALGORITHMS = ("HS256",)
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256")
+
+
+def default_codec(algorithm: str) -> str:
+    return "hmac" if algorithm in SYMMETRIC_ALGORITHMS else "jose"
+
+
+def generate_private_key(algorithm: str) -> str:
+    """Return a new PEM encoded private key suitable for ``algorithm``."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, rsa
+
+    if algorithm == "RS256":
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    elif algorithm == "ES256":
+        key = ec.generate_private_key(ec.SECP256R1())
+    else:
+        raise ValueError(f"Cannot generate a private key for '{algorithm}'")
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+class KeyRing:
+    """
+    Signing and verification keys, indexed by key id (``kid``).
+
+    New tokens are signed with the active key and carry its kid in their
+    header. Every key of the ring still verifies the tokens it signed, so
+    keys can be rotated by adding a new one and removing the old one once
+    its tokens have expired. Keys are parsed once, when the ring is built.
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        keys: dict[str, str],
+        active_kid: str | None = None,
+        codec: str | None = None,
+    ):
+        if algorithm not in SYMMETRIC_ALGORITHMS + ASYMMETRIC_ALGORITHMS:
+            raise ValueError(f"Unsupported JWT algorithm: '{algorithm}'")
+        if not keys:
+            raise ValueError("The key ring needs at least one key.")
+        self.algorithm = algorithm
+        self.active_kid = active_kid or sorted(keys)[-1]
+        if self.active_kid not in keys:
+            raise ValueError(f"Unknown active key id: '{self.active_kid}'")
+        self.codec = get_codec(codec or default_codec(algorithm), algorithm)
+        self._private_keys = {
+            kid: self.codec.signing_key(key, algorithm) for kid, key in keys.items()
+        }
+        self._public_keys = {
+            kid: self.codec.verifying_key(key, algorithm)
+            for kid, key in self._private_keys.items()
+        }
+        self._headers = {"kid": self.active_kid} if self.asymmetric else None
+
+    @property
+    def asymmetric(self) -> bool:
+        return self.algorithm in ASYMMETRIC_ALGORITHMS
+
+    def encode(self, claims: dict) -> str:
+        with JWT_ENCODE_SECONDS.time():
+            return self.codec.encode(
+                claims, self._private_keys[self.active_kid], self.algorithm, self._headers
+            )
+
+    def decode(self, token: str) -> dict:
+        """Verify ``token`` and return its claims, raising JWTError if invalid."""
+        kid = self.active_kid
+        if self.asymmetric:
+            kid = self.codec.header(token).get("kid") or kid
+        key = self._public_keys.get(kid)
+        if key is None:
+            raise JWTError(f"Unknown key id: '{kid}'")
+        with JWT_DECODE_SECONDS.time():
+            return self.codec.decode(token, key, self.algorithm)
+
+    def jwks(self) -> dict:
+        """Public keys as a JSON Web Key Set; empty for symmetric algorithms."""
+        if not self.asymmetric:
+            return {"keys": []}
+        keys = []
+        for kid, key in sorted(self._public_keys.items()):
+            public_jwk = self.codec.public_jwk(key, self.algorithm)
+            public_jwk.update({"kid": kid, "use": "sig", "alg": self.algorithm})
+            keys.append(public_jwk)
+        return {"keys": keys}
+
+
+def load_private_keys(keys_dir: Path, algorithm: str) -> dict[str, str]:
+    """
+    Read every ``<kid>.pem`` of ``keys_dir``. When there is none, a key is
+    generated and saved so that every worker and restart shares it.
+    """
+    keys_dir.mkdir(parents=True, exist_ok=True)
+    if not any(keys_dir.glob("*.pem")):
+        kid = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+        path = keys_dir / f"{kid}.pem"
+        try:
+            with open(path, "x") as f:
+                f.write(generate_private_key(algorithm))
+            path.chmod(0o600)
+            logger.warning(f"No JWT signing key found, generated '{path}'.")
+        except FileExistsError:
+            pass  # Generated concurrently by another worker.
+    return {path.stem: path.read_text() for path in sorted(keys_dir.glob("*.pem"))}
+
+
+def load_key_ring(
+    algorithm: str = JWT_ALGORITHM,
+    keys_dir: Path = JWT_KEYS_DIR,
+    active_kid: str | None = JWT_ACTIVE_KID,
+    codec: str | None = JWT_CODEC,
+) -> KeyRing:
+    if algorithm in SYMMETRIC_ALGORITHMS:
+        if not SECRET_KEY:
+            raise ValueError(f"SECRET_KEY must be set to sign tokens with {algorithm}.")
+        return KeyRing(algorithm, {"default": SECRET_KEY}, codec=codec)
+    keys = load_private_keys(keys_dir, algorithm)
+    return KeyRing(algorithm, keys, active_kid, codec)
+
+
+_key_ring: KeyRing | None = None
+
+
+def get_key_ring() -> KeyRing:
+    """Process-wide key ring, loaded on first use."""
+    global _key_ring
+    if _key_ring is None:
+        _key_ring = load_key_ring()
+    return _key_ring
+
+
+def encode_token(claims: dict) -> str:
+    """Sign ``claims`` with the active key of the key ring."""
+    return get_key_ring().encode(claims)
+
+
+def decode_token(token: str) -> dict:
+    """Verify a token signed by any key of the key ring and return its claims."""
+    return get_key_ring().decode(token)
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, Boolean
 from sqlalchemy.orm import relationship
 from modules.database.session import UsersBase
+from modules.database.types import UTCDateTime
 from datetime import datetime
 
 
@@ -10,9 +11,21 @@ class RefreshToken(UsersBase):
     id = Column(Integer, primary_key=True, index=True)
     token = Column(String, unique=True, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    expires_at = Column(DateTime, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(UTCDateTime, nullable=False, index=True)
+    created_at = Column(UTCDateTime, default=datetime.utcnow)
     revoked = Column(Boolean, default=False, nullable=False)
     app_name = Column(String, nullable=True)
 
     users = relationship("User", back_populates="refresh_tokens")
+
+
+# Partial index over live tokens only, serving the "revoke every live token
+# of this user/app" UPDATE run at each login. Its predicate mirrors the
+# query's `revoked IS false` so that SQLite can prove the index applies.
+Index(
+    "ix_refresh_tokens_user_app_live",
+    RefreshToken.user_id,
+    RefreshToken.app_name,
+    sqlite_where=RefreshToken.revoked.is_(False),
+    postgresql_where=RefreshToken.revoked.is_(False),
+)
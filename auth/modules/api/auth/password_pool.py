@@ -0,0 +1,193 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dotenv import load_dotenv
+from utils.logger_config import configure_logger
+from utils.metrics import PASSWORD_HASH_REJECTED
+
+logger = configure_logger()
+
+load_dotenv()
+
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR") or "thread"
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS") or os.cpu_count() or 1)
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE") or 32)
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT") or 10)
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the password hashing pool cannot accept another job."""
+
+
+def _timed(fn, *args):
+    """Run ``fn`` and return its result with the time spent in the worker."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class PasswordHashingStats:
+    """Counters describing the load and latency of the hashing pool."""
+
+    def __init__(self, workers: int):
+        self._lock = threading.Lock()
+        self.workers = workers
+        self.outstanding = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def job_submitted(self):
+        with self._lock:
+            self.outstanding += 1
+
+    def job_done(self, elapsed: float | None):
+        with self._lock:
+            self.outstanding -= 1
+            if elapsed is None:
+                return
+            self.completed += 1
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+
+    def job_rejected(self):
+        with self._lock:
+            self.rejected += 1
+        PASSWORD_HASH_REJECTED.inc()
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a free worker."""
+        return max(0, self.outstanding - self.workers)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "in_flight": min(self.outstanding, self.workers),
+                "queue_depth": self.queue_depth,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_seconds": (
+                    self.total_seconds / self.completed if self.completed else 0.0
+                ),
+                "max_seconds": self.max_seconds,
+            }
+
+
+class PasswordHashingPool:
+    """
+    Bounded executor dedicated to password hashing.
+
+    At most ``workers + max_queue`` jobs are accepted at once; anything beyond
+    that is rejected with PasswordHashingBusy instead of piling up behind the
+    CPU-bound bcrypt calls.
+    """
+
+    def __init__(
+        self,
+        workers: int = PASSWORD_HASH_WORKERS,
+        max_queue: int = PASSWORD_HASH_MAX_QUEUE,
+        kind: str = PASSWORD_HASH_EXECUTOR,
+        timeout: float = PASSWORD_HASH_TIMEOUT,
+    ):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash executor: '{kind}'")
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.kind = kind
+        self.timeout = timeout
+        self.stats = PasswordHashingStats(self.workers)
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self):
+        # Created lazily so that importing the module never forks processes.
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    if self.kind == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.workers,
+                            thread_name_prefix="password-hash",
+                        )
+        return self._executor
+
+    def _release(self, future: Future):
+        self._slots.release()
+        elapsed = None
+        if not future.cancelled() and future.exception() is None:
+            elapsed = future.result()[1]
+        self.stats.job_done(elapsed)
+
+    def _start(self, fn, *args) -> Future:
+        self.stats.job_submitted()
+        try:
+            future = self._get_executor().submit(_timed, fn, *args)
+        except Exception:
+            self._slots.release()
+            self.stats.job_done(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def submit(self, fn, *args) -> Future:
+        """Schedule ``fn(*args)``, failing fast when the pool is saturated."""
+        if not self._slots.acquire(blocking=False):
+            self.stats.job_rejected()
+            logger.warning("Password hashing pool saturated, rejecting job.")
+            raise PasswordHashingBusy()
+        return self._start(fn, *args)
+
+    def run(self, fn, *args):
+        """Run ``fn(*args)`` in the pool and wait for its result."""
+        future = self.submit(fn, *args)
+        try:
+            return future.result(timeout=self.timeout)[0]
+        except FutureTimeoutError:
+            raise PasswordHashingBusy()
+
+    async def run_async(self, fn, *args):
+        """Await ``fn(*args)`` in the pool without blocking the event loop."""
+        future = self.submit(fn, *args)
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            raise PasswordHashingBusy()
+        return result[0]
+
+    def map(self, fn, items) -> list:
+        """
+        Run ``fn(item)`` for every item, for bulk work such as user imports.
+
+        Instead of failing fast, each job waits for a free slot, and at most
+        ``workers`` jobs are in the pool at once so that interactive requests
+        can still be queued meanwhile. Results keep the order of ``items``.
+        """
+        results = []
+        pending = deque()
+        for item in items:
+            if len(pending) >= self.workers:
+                results.append(pending.popleft().result(timeout=self.timeout)[0])
+            self._slots.acquire()
+            pending.append(self._start(fn, item))
+        while pending:
+            results.append(pending.popleft().result(timeout=self.timeout)[0])
+        return results
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+password_pool = PasswordHashingPool()
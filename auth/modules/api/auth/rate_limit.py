@@ -0,0 +1,307 @@
+import asyncio
+import math
+import os
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+from utils.logger_config import log_event
+from utils.metrics import LOGIN_RATE_LIMITED
+
+load_dotenv()
+
+# Sliding window of the login limits, in seconds.
+LOGIN_RATE_LIMIT_WINDOW = int(os.getenv("LOGIN_RATE_LIMIT_WINDOW") or 60)
+# Login attempts accepted per client IP and window, 0 disables the limit.
+LOGIN_MAX_ATTEMPTS_PER_IP = int(os.getenv("LOGIN_MAX_ATTEMPTS_PER_IP") or 30)
+# Failed logins accepted per account and window; a success clears them.
+LOGIN_MAX_FAILURES_PER_EMAIL = int(os.getenv("LOGIN_MAX_FAILURES_PER_EMAIL") or 5)
+# Where the counters live: empty for this process' memory, "sqlite:///<path>"
+# or "redis://host:port/db" to share them between workers.
+LOGIN_RATE_LIMIT_STORAGE = os.getenv("LOGIN_RATE_LIMIT_STORAGE") or ""
+# Keys held by the in-memory storage before expired ones are swept.
+LOGIN_RATE_LIMIT_MAX_KEYS = int(os.getenv("LOGIN_RATE_LIMIT_MAX_KEYS") or 100000)
+
+
+class LoginRateLimited(Exception):
+    """Raised when a login attempt exceeds a limit, before any password check."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Too many login attempts, retry in {retry_after} s.")
+        self.retry_after = retry_after
+
+
+class MemoryStorage:
+    """
+    Counters of the current and previous window of each key, in this process.
+
+    Keys whose windows have all expired are swept once ``max_keys`` is
+    reached; if none has, the oldest keys are dropped.
+    """
+
+    blocking = False
+
+    def __init__(self, max_keys: int = LOGIN_RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._counters: dict[str, list[int]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _shift(counter: list[int], window: int) -> list[int]:
+        start, current, previous = counter
+        if start == window:
+            return counter
+        if start == window - 1:
+            return [window, 0, current]
+        return [window, 0, 0]
+
+    def increment(self, key: str, window: int, ttl: int):
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None:
+                if len(self._counters) >= self.max_keys:
+                    self._sweep(window)
+                counter = [window, 0, 0]
+            counter = self._shift(counter, window)
+            counter[1] += 1
+            self._counters[key] = counter
+
+    def counts(self, key: str, window: int) -> tuple[int, int]:
+        """Hits of the previous and the current window."""
+        with self._lock:
+            counter = self._counters.get(key)
+        if counter is None:
+            return 0, 0
+        _, current, previous = self._shift(counter, window)
+        return previous, current
+
+    def delete(self, key: str, window: int):
+        with self._lock:
+            self._counters.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+
+    def _sweep(self, window: int):
+        for key in [k for k, (start, _, _) in self._counters.items() if start < window - 1]:
+            del self._counters[key]
+        excess = len(self._counters) - self.max_keys + 1
+        for key in list(self._counters)[: max(excess, 0)]:
+            del self._counters[key]
+
+
+class SQLiteStorage:
+    """Counters of each key and window in a SQLite file, shared by the workers."""
+
+    blocking = True
+    # Increments between two deletions of the expired windows.
+    purge_interval = 1000
+
+    def __init__(self, path: str):
+        self._connection = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False, timeout=5
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS login_rate_limits ("
+            "key TEXT NOT NULL, window INTEGER NOT NULL, hits INTEGER NOT NULL, "
+            "PRIMARY KEY (key, window))"
+        )
+        self._lock = threading.Lock()
+        self._increments = 0
+
+    def increment(self, key: str, window: int, ttl: int):
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO login_rate_limits (key, window, hits) VALUES (?, ?, 1) "
+                "ON CONFLICT (key, window) DO UPDATE SET hits = hits + 1",
+                (key, window),
+            )
+            self._increments += 1
+            if self._increments % self.purge_interval == 0:
+                self._connection.execute(
+                    "DELETE FROM login_rate_limits WHERE window < ?", (window - 1,)
+                )
+
+    def counts(self, key: str, window: int) -> tuple[int, int]:
+        with self._lock:
+            rows = dict(
+                self._connection.execute(
+                    "SELECT window, hits FROM login_rate_limits "
+                    "WHERE key = ? AND window >= ?",
+                    (key, window - 1),
+                ).fetchall()
+            )
+        return rows.get(window - 1, 0), rows.get(window, 0)
+
+    def delete(self, key: str, window: int):
+        with self._lock:
+            self._connection.execute("DELETE FROM login_rate_limits WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM login_rate_limits")
+
+
+class RedisStorage:
+    """Counters in Redis (or a compatible server), one expiring key per window."""
+
+    blocking = True
+
+    def __init__(self, url: str, prefix: str = "login-rate-limit:"):
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def _key(self, key: str, window: int) -> str:
+        return f"{self.prefix}{key}:{window}"
+
+    def increment(self, key: str, window: int, ttl: int):
+        pipeline = self._redis.pipeline()
+        pipeline.incr(self._key(key, window))
+        pipeline.expire(self._key(key, window), ttl)
+        pipeline.execute()
+
+    def counts(self, key: str, window: int) -> tuple[int, int]:
+        previous, current = self._redis.mget(
+            self._key(key, window - 1), self._key(key, window)
+        )
+        return int(previous or 0), int(current or 0)
+
+    def delete(self, key: str, window: int):
+        self._redis.delete(self._key(key, window - 1), self._key(key, window))
+
+    def clear(self):
+        for key in self._redis.scan_iter(f"{self.prefix}*"):
+            self._redis.delete(key)
+
+
+def create_storage(url: str = LOGIN_RATE_LIMIT_STORAGE):
+    if not url or url == "memory":
+        return MemoryStorage()
+    if url.startswith("sqlite:///"):
+        return SQLiteStorage(url.removeprefix("sqlite:///"))
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisStorage(url)
+    raise ValueError(f"Unknown login rate limit storage: '{url}'")
+
+
+class SlidingWindow:
+    """
+    Sliding window counter: the hits of the previous fixed window, weighted
+    by the share of it still inside the sliding window, plus the hits of the
+    current one. Two counters per key, whatever the number of hits.
+    """
+
+    def __init__(self, storage, limit: int, window: int = LOGIN_RATE_LIMIT_WINDOW):
+        self.storage = storage
+        self.limit = limit
+        self.window = window
+
+    def _position(self, now: float | None) -> tuple[int, float]:
+        now = time.time() if now is None else now
+        return int(now // self.window), (now % self.window) / self.window
+
+    def retry_after(self, key: str, now: float | None = None) -> int:
+        """Seconds until ``key`` is under its limit again, 0 if it already is."""
+        if self.limit <= 0:
+            return 0
+        window, elapsed = self._position(now)
+        previous, current = self.storage.counts(key, window)
+        if previous * (1 - elapsed) + current < self.limit:
+            return 0
+        if current < self.limit:
+            # The previous window's weight has to decay below the margin left.
+            wait = (1 - (self.limit - current) / previous) - elapsed
+        else:
+            # Next window, the current one's hits become the decaying ones.
+            wait = (1 - elapsed) + (1 - self.limit / current)
+        return max(1, math.ceil(wait * self.window))
+
+    def hit(self, key: str, now: float | None = None):
+        if self.limit > 0:
+            window, _ = self._position(now)
+            self.storage.increment(key, window, 2 * self.window)
+
+    def reset(self, key: str, now: float | None = None):
+        if self.limit > 0:
+            self.storage.delete(key, self._position(now)[0])
+
+
+class LoginRateLimiter:
+    """
+    Login throttling, consulted before the password check so that rejected
+    attempts cost no hashing. Every attempt counts against its client IP;
+    failed ones also count against the (anonymized) email, whose counter a
+    successful login clears. Rejected attempts are not counted.
+    """
+
+    def __init__(
+        self,
+        storage=None,
+        ip_limit: int = LOGIN_MAX_ATTEMPTS_PER_IP,
+        email_limit: int = LOGIN_MAX_FAILURES_PER_EMAIL,
+        window: int = LOGIN_RATE_LIMIT_WINDOW,
+    ):
+        self.storage = create_storage() if storage is None else storage
+        self.ip_attempts = SlidingWindow(self.storage, ip_limit, window)
+        self.email_failures = SlidingWindow(self.storage, email_limit, window)
+
+    def check(self, email: str, ip: str | None):
+        """Count an attempt, or raise LoginRateLimited if over a limit."""
+        checks = [("email", self.email_failures, f"email:{email}")]
+        if ip is not None:
+            checks.insert(0, ("ip", self.ip_attempts, f"ip:{ip}"))
+        for reason, limit, key in checks:
+            retry_after = limit.retry_after(key)
+            if retry_after:
+                LOGIN_RATE_LIMITED.labels(reason).inc()
+                log_event(
+                    "auth.rate_limited",
+                    "Login attempt rejected, too many attempts by {reason}.",
+                    level="WARNING",
+                    reason=reason,
+                )
+                raise LoginRateLimited(retry_after)
+        if ip is not None:
+            self.ip_attempts.hit(f"ip:{ip}")
+
+    def failed(self, email: str):
+        self.email_failures.hit(f"email:{email}")
+
+    def succeeded(self, email: str):
+        self.email_failures.reset(f"email:{email}")
+
+    async def _call_async(self, fn, *args):
+        # Shared storages do network or file I/O, kept off the event loop.
+        if self.storage.blocking:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    async def check_async(self, email: str, ip: str | None):
+        """Awaitable variant of check."""
+        await self._call_async(self.check, email, ip)
+
+    async def failed_async(self, email: str):
+        """Awaitable variant of failed."""
+        await self._call_async(self.failed, email)
+
+    async def succeeded_async(self, email: str):
+        """Awaitable variant of succeeded."""
+        await self._call_async(self.succeeded, email)
+
+
+_login_rate_limiter: LoginRateLimiter | None = None
+_login_rate_limiter_lock = threading.Lock()
+
+
+def get_login_rate_limiter() -> LoginRateLimiter:
+    """Limiter of the login routes (a FastAPI dependency), built on first use."""
+    global _login_rate_limiter
+    if _login_rate_limiter is None:
+        with _login_rate_limiter_lock:
+            if _login_rate_limiter is None:
+                _login_rate_limiter = LoginRateLimiter()
+    return _login_rate_limiter
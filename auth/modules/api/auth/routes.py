@@ -1,75 +1,68 @@
 from utils.logger_config import configure_logger
-from datetime import timedelta, timezone, datetime
-from dotenv import load_dotenv
+from utils.profiling import ProfiledRoute
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from modules.api.auth.schemas import Token
 from modules.api.users.models import User
-from modules.api.auth.models import RefreshToken
 from modules.database.dependencies import get_users_db
 from sqlalchemy.orm import Session
 from modules.api.auth.functions import (
     authenticate_user,
-    create_token,
     store_refresh_token,
+    rotate_refresh_token,
+    refresh_tokens_page_query,
+    refresh_token_summary,
 )
-import os
-from jose import JWTError, jwt
+from jose import JWTError
+from modules.api.auth.keys import decode_token
+from modules.api.auth.tokens import get_token_factory
 from modules.api.users.functions import (
     get_user_by_email,
     oauth2_scheme,
     get_current_user,
 )
-from modules.api.auth.functions import find_refresh_token
-from modules.api.auth.security import hash_token
-from fastapi.responses import JSONResponse
-from uuid import uuid4
-from typing import List
-
-load_dotenv()
+from modules.api.auth.rate_limit import LoginRateLimiter, get_login_rate_limiter
+from modules.api.auth.security import anonymize, hash_token
+from modules.api.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    NDJSON_MEDIA_TYPE,
+    iter_ndjson,
+    paginate,
+)
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import List, Literal
 
 logger = configure_logger()
 
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = "HS256"
-
-auth_router = APIRouter()
+auth_router = APIRouter(route_class=ProfiledRoute)
 
 
 @auth_router.post("/login", response_model=Token)
 def login_for_access_token(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_users_db),
+    rate_limiter: LoginRateLimiter = Depends(get_login_rate_limiter),
 ):
+    email = anonymize(form_data.username)
+    client_ip = request.client.host if request.client else None
+    rate_limiter.check(email, client_ip)
     user = authenticate_user(db, form_data.username, form_data.password)
     if not user:
+        rate_limiter.failed(email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    rate_limiter.succeeded(email)
 
     app_name = form_data.scopes[0] if form_data.scopes else "default"
 
-    access_token_expires = timedelta(minutes=15)
-    refresh_token_expires = timedelta(days=7)
-
-    access_token = create_token(
-        data={
-            "sub": user.email,
-            "role": user.role.role,
-            "type": "access",
-            "app": app_name,
-        },
-        expires_delta=access_token_expires,
+    access_token, refresh_token, refresh_expiry = get_token_factory().issue_pair(
+        user.email, user.role.role, app_name
     )
-
-    refresh_token = create_token(
-        data={"sub": user.email, "type": "refresh", "app": app_name},
-        expires_delta=refresh_token_expires,
-    )
-
-    refresh_expiry = datetime.now(timezone.utc) + refresh_token_expires
     hashed_token = hash_token(refresh_token)
     store_refresh_token(db, user.id, hashed_token, refresh_expiry, app_name=app_name)
 
@@ -87,48 +80,29 @@ def refresh_token(
     token: str = Depends(oauth2_scheme), db: Session = Depends(get_users_db)
 ):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         email = payload.get("sub")
-        role = payload.get("role")
+        app_name = payload.get("app") or "default"
         token_type = payload.get("type")
         if token_type != "refresh":
             raise HTTPException(status_code=401, detail="Invalid token for refresh")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    hashed_token = hash_token(token)
-    refresh_token_db = find_refresh_token(db, hashed_token)
-
-    if not refresh_token_db:
-        raise HTTPException(status_code=401, detail="Refresh token not found")
-
-    if refresh_token_db.expires_at.replace(tzinfo=timezone.utc) < datetime.now(
-        timezone.utc
-    ):
-        raise HTTPException(status_code=401, detail="Refresh token expired")
-
-    refresh_token_db.revoked = True
-
     user = get_user_by_email(email, db)
     if not user:
         raise HTTPException(status_code=404, detail="User not found.")
 
-    new_access_token = create_token(
-        data={"sub": email, "role": role}, expires_delta=timedelta(minutes=15)
+    new_access_token, new_refresh_token, refresh_expiry = (
+        get_token_factory().issue_pair(email, user.role.role, app_name)
     )
-
-    new_refresh_token = create_token(
-        data={"sub": email, "role": role, "type": "refresh", "jti": str(uuid4())},
-        expires_delta=timedelta(days=7),
+    rotated = rotate_refresh_token(
+        db, hash_token(token), hash_token(new_refresh_token), refresh_expiry
     )
-    hashed_new_refresh_token = hash_token(new_refresh_token)
-    refresh_expiry = datetime.now(timezone.utc) + timedelta(days=7)
-
-    store_refresh_token(
-        db, user_id=user.id, token=hashed_new_refresh_token, expires_at=refresh_expiry
-    )
-
-    db.commit()
+    if not rotated:
+        raise HTTPException(
+            status_code=401, detail="Refresh token not found, expired or revoked"
+        )
 
     return JSONResponse(
         {
@@ -141,20 +115,21 @@ def refresh_token(
 
 @auth_router.get("/refresh-tokens", response_model=List[dict])
 def list_refresh_tokens(
-    db: Session = Depends(get_users_db), current_user: User = Depends(get_current_user)
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: int | None = None,
+    format: Literal["json", "ndjson"] = "json",
+    db: Session = Depends(get_users_db),
+    current_user: User = Depends(get_current_user),
 ):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Access denied.")
 
-    tokens = db.query(RefreshToken).all()
-    return [
-        {
-            "user_id": token.user_id,
-            "token": token.token[:10] + "...",
-            "created_at": token.created_at,
-            "expires_at": token.expires_at,
-            "revoked": token.revoked,
-            "app": token.app_name,
-        }
-        for token in tokens
-    ]
+    if format == "ndjson":
+        return StreamingResponse(
+            iter_ndjson(db, refresh_tokens_page_query, refresh_token_summary),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    rows = db.execute(refresh_tokens_page_query(after, limit + 1)).all()
+    return [refresh_token_summary(row) for row in paginate(rows, limit, response)]
@@ -1,5 +1,9 @@
+import asyncio
 import hashlib
-import bcrypt
+import secrets
+from modules.api.auth.hashers import get_hasher, identify_hasher
+from modules.api.auth.password_pool import password_pool
+from utils.metrics import PASSWORD_HASH_SECONDS, PASSWORD_VERIFY_SECONDS
 
 
 def anonymize(name: str) -> str:
@@ -13,13 +17,66 @@ def hash_token(token: str) -> str:
     return hashlib.sha256(token.encode("utf-8")).hexdigest()
 
 
+def needs_rehash(hashed_password: str) -> bool:
+    """Whether a stored hash should be replaced by one of the default hasher,
+    being of another algorithm or of weaker parameters."""
+    try:
+        hasher = identify_hasher(hashed_password)
+        if hasher is not get_hasher():
+            return True
+        return hasher.needs_rehash(hashed_password)
+    except (IndexError, ValueError):
+        return False
+
+
+_dummy_hash: str | None = None
+
+
+def dummy_hash() -> str:
+    """Hash of a random password from the default hasher, verified when a login
+    names no account so that unknown emails cost as much as wrong passwords.
+    Computed when the API starts, so that the first miss is not slower."""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = get_hasher().hash(secrets.token_urlsafe(16))
+    return _dummy_hash
+
+
 def hash_password(password: str) -> str:
-    """Generate a unique salt and return the bcrypt hash of a plaintext password."""
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password.encode("utf-8"), salt)
-    return hashed_password.decode("utf-8")
+    """Generate a unique salt and return the hash of a plaintext password, from
+    the default hasher. The work runs in the dedicated password hashing pool."""
+    with PASSWORD_HASH_SECONDS.time():
+        return password_pool.run(get_hasher().hash, password)
+
+
+def hash_passwords(passwords: list[str]) -> list[str]:
+    """Hash many passwords at once, spread over every worker of the pool."""
+    return password_pool.map(get_hasher().hash, passwords)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Check whether a plaintext password matches the stored bcrypt hash."""
-    return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+    """Check whether a plaintext password matches the stored hash, with the
+    hasher of its format. The work runs in the dedicated password hashing pool."""
+    with PASSWORD_VERIFY_SECONDS.time():
+        return password_pool.run(
+            identify_hasher(hashed_password).verify, plain_password, hashed_password
+        )
+
+
+async def hash_password_async(password: str) -> str:
+    """Awaitable variant of hash_password."""
+    with PASSWORD_HASH_SECONDS.time():
+        return await password_pool.run_async(get_hasher().hash, password)
+
+
+async def hash_passwords_async(passwords: list[str]) -> list[str]:
+    """Awaitable variant of hash_passwords."""
+    return await asyncio.to_thread(hash_passwords, passwords)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Awaitable variant of verify_password."""
+    with PASSWORD_VERIFY_SECONDS.time():
+        return await password_pool.run_async(
+            identify_hasher(hashed_password).verify, plain_password, hashed_password
+        )
@@ -0,0 +1,85 @@
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+from dotenv import load_dotenv
+from utils.logger_config import log_event
+from modules.api.auth.keys import KeyRing, get_key_ring
+
+load_dotenv()
+
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES") or 15)
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS") or 7)
+
+# Scopes granted to the access tokens of each role.
+ROLE_SCOPES = {"admin": ["admin"], "reader": ["reader"]}
+
+
+class TokenFactory:
+    """
+    Issues the access and refresh tokens of the service.
+
+    The key ring, role scopes and lifetimes are bound once; a pair of tokens
+    shares one timestamp and the key ring's precomputed header.
+    """
+
+    def __init__(
+        self,
+        key_ring: KeyRing,
+        role_scopes: dict[str, list[str]] = ROLE_SCOPES,
+        access_lifetime: timedelta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+        refresh_lifetime: timedelta = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ):
+        self.key_ring = key_ring
+        self._role_scopes = {role: list(scopes) for role, scopes in role_scopes.items()}
+        self.access_lifetime = int(access_lifetime.total_seconds())
+        self.refresh_lifetime = int(refresh_lifetime.total_seconds())
+
+    def access_token(self, sub: str, role: str, app: str, now: int | None = None) -> str:
+        now = int(time.time()) if now is None else now
+        return self.key_ring.encode(
+            {
+                "sub": sub,
+                "role": role,
+                "type": "access",
+                "app": app,
+                "token_type": "access",
+                "scopes": self._role_scopes.get(role, []),
+                "exp": now + self.access_lifetime,
+            }
+        )
+
+    def refresh_token(self, sub: str, app: str, now: int | None = None) -> tuple[str, datetime]:
+        """Return a new refresh token and its expiry date."""
+        now = int(time.time()) if now is None else now
+        expire = now + self.refresh_lifetime
+        token = self.key_ring.encode(
+            {
+                "sub": sub,
+                "type": "refresh",
+                "app": app,
+                "jti": str(uuid4()),
+                "token_type": "refresh",
+                "exp": expire,
+            }
+        )
+        return token, datetime.fromtimestamp(expire, timezone.utc)
+
+    def issue_pair(self, sub: str, role: str, app: str) -> tuple[str, str, datetime]:
+        """Return an access token, a refresh token and the refresh token expiry."""
+        now = int(time.time())
+        access_token = self.access_token(sub, role, app, now)
+        refresh_token, refresh_expiry = self.refresh_token(sub, app, now)
+        log_event("tokens.issued", "Tokens issued (role: {role}, app: {app})", role=role, app=app)
+        return access_token, refresh_token, refresh_expiry
+
+
+_token_factory: TokenFactory | None = None
+
+
+def get_token_factory() -> TokenFactory:
+    """Process-wide token factory, built with the key ring on first use."""
+    global _token_factory
+    if _token_factory is None:
+        _token_factory = TokenFactory(get_key_ring())
+    return _token_factory
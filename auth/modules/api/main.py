@@ -1,8 +1,33 @@
-from fastapi import FastAPI, APIRouter
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, APIRouter, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, JSONResponse, Response
 from modules.api.users.routes import users_router
+from modules.api.users.async_routes import users_async_router
+from modules.api.users.role_registry import load_roles_at_startup
+from modules.api.users.known_emails import load_known_emails_at_startup
 from modules.api.auth.routes import auth_router
+from modules.api.auth.async_routes import auth_async_router
+from modules.database.config import USERS_DATABASE_ASYNC
+from modules.database.session import get_users_async_session, users_engine
+from modules.api.auth.password_pool import PasswordHashingBusy, password_pool
+from modules.api.auth.rate_limit import LoginRateLimited
+from modules.api.auth.hashers import get_hasher
+from modules.api.auth.security import dummy_hash
+from modules.api.auth.keys import JWKS_MAX_AGE, decode_token, get_key_ring
+from modules.api.pagination import NEXT_CURSOR_HEADER
+from modules.api.auth.compaction import (
+    REFRESH_TOKEN_COMPACTION_INTERVAL,
+    run_compaction_periodically,
+)
+from utils.metrics import (
+    MetricsMiddleware,
+    instrument_engine,
+    instrument_password_pool,
+    metrics_response,
+)
+from utils.profiling import PROFILING_ENABLED, ProfilingMiddleware, capture_statements
 import os
 from dotenv import load_dotenv
 
@@ -15,9 +40,31 @@ FRONTEND_URL = os.getenv("FRONTEND_URL", f"http://localhost:{PORT_FRONT}")
 title = f"{APP_NAME} AUTH API"
 
 
-def create_app() -> FastAPI:
+def is_admin_token(token: str) -> bool:
+    payload = decode_token(token)
+    return payload.get("type") == "access" and "admin" in payload.get("scopes", [])
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    load_roles_at_startup()
+    load_known_emails_at_startup()
+    get_hasher()
+    dummy_hash()
+    compaction = None
+    if REFRESH_TOKEN_COMPACTION_INTERVAL > 0:
+        compaction = asyncio.create_task(run_compaction_periodically())
+    yield
+    if compaction is not None:
+        compaction.cancel()
+
+
+def create_app(
+    use_async_db: bool = USERS_DATABASE_ASYNC, profiling: bool = PROFILING_ENABLED
+) -> FastAPI:
     app = FastAPI(
         title=title,
+        lifespan=lifespan,
     )
 
     app.add_middleware(
@@ -26,11 +73,45 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Read by the frontend to fetch the next page of a list.
+        expose_headers=[NEXT_CURSOR_HEADER],
     )
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(users_engine, "users")
+    if use_async_db:
+        users_async_engine, _ = get_users_async_session()
+        instrument_engine(users_async_engine, "users_async")
+    instrument_password_pool(password_pool)
+    if profiling:
+        app.add_middleware(ProfilingMiddleware, is_admin=is_admin_token)
+        capture_statements(users_engine)
+        if use_async_db:
+            capture_statements(users_async_engine)
+
+    @app.exception_handler(PasswordHashingBusy)
+    async def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusy):
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"detail": "Too many concurrent requests, please retry later."},
+            headers={"Retry-After": "1"},
+        )
+
+    @app.exception_handler(LoginRateLimited)
+    async def login_rate_limited_handler(request: Request, exc: LoginRateLimited):
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"detail": "Too many login attempts, please retry later."},
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
+    if use_async_db:
+        auth_routes, users_routes = auth_async_router, users_async_router
+    else:
+        auth_routes, users_routes = auth_router, users_router
 
     router = APIRouter()
-    router.include_router(auth_router, prefix="/auth", tags=["Authentification"])
-    router.include_router(users_router, prefix="/users", tags=["Users"])
+    router.include_router(auth_routes, prefix="/auth", tags=["Authentification"])
+    router.include_router(users_routes, prefix="/users", tags=["Users"])
 
     app.include_router(router)
 
@@ -38,6 +119,19 @@ def create_app() -> FastAPI:
     async def root():
         return RedirectResponse(url="/docs")
 
+    @app.get("/.well-known/jwks.json", tags=["Authentification"])
+    async def jwks():
+        """Public keys verifying the tokens issued by this service."""
+        return JSONResponse(
+            get_key_ring().jwks(),
+            headers={"Cache-Control": f"public, max-age={JWKS_MAX_AGE}"},
+        )
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        content, media_type = metrics_response()
+        return Response(content, media_type=media_type)
+
     return app
 
 
@@ -0,0 +1,62 @@
+import json
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Page size of the list endpoints when the client sends no ``limit``.
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+EXPORT_CHUNK_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def paginate(rows: list, limit: int, response: Response) -> list:
+    """
+    Trim a keyset page fetched with ``limit + 1`` rows. When more rows exist,
+    the id of the last returned row is exposed as the next cursor.
+    """
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = str(rows[-1].id)
+    return rows
+
+
+def to_ndjson(item) -> str:
+    return json.dumps(jsonable_encoder(item)) + "\n"
+
+
+def iter_ndjson(db: Session, page_query, serialize, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """
+    Stream every row of ``page_query(after, limit)`` as NDJSON, one keyset
+    page at a time, so that memory use does not grow with the table size.
+    """
+    after = None
+    try:
+        while True:
+            rows = db.execute(page_query(after, chunk_size)).all()
+            for row in rows:
+                yield to_ndjson(serialize(row))
+            if len(rows) < chunk_size:
+                return
+            after = rows[-1].id
+    finally:
+        db.close()
+
+
+async def aiter_ndjson(
+    db: AsyncSession, page_query, serialize, chunk_size: int = EXPORT_CHUNK_SIZE
+):
+    """Async variant of iter_ndjson."""
+    after = None
+    try:
+        while True:
+            rows = (await db.execute(page_query(after, chunk_size))).all()
+            for row in rows:
+                yield to_ndjson(serialize(row))
+            if len(rows) < chunk_size:
+                return
+            after = rows[-1].id
+    finally:
+        await db.close()
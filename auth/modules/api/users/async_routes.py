@@ -0,0 +1,281 @@
+from typing import Literal
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from utils.logger_config import configure_logger
+from utils.profiling import ProfiledRoute
+from modules.database.dependencies import get_async_users_db
+from modules.api.users.functions import (
+    get_current_user_async,
+    get_user_by_email_async,
+    get_user_by_id_async,
+    users_page_query,
+)
+from modules.api.users.schemas import (
+    UserResponse,
+    UserCreate,
+    UserImportReport,
+    RoleUpdate,
+    UserUpdate,
+)
+from modules.api.users.bulk import (
+    USER_IMPORT_BATCH_SIZE,
+    import_users_async,
+    open_records,
+    read_records,
+)
+from modules.api.users.models import User
+from modules.api.users.role_registry import DEFAULT_ROLE, role_registry
+from modules.api.users.known_emails import known_emails
+from modules.api.users.token_cache import token_cache
+from modules.api.users.routes import user_row_response
+from modules.api.auth.security import anonymize, hash_password_async
+from modules.api.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    NDJSON_MEDIA_TYPE,
+    aiter_ndjson,
+    paginate,
+)
+
+logger = configure_logger()
+
+users_async_router = APIRouter(route_class=ProfiledRoute)
+
+
+def user_response(user: User) -> UserResponse:
+    return UserResponse(
+        id=user.id,
+        name=user.name,
+        email=user.email,
+        is_active=user.is_active,
+        role=user.role.role,
+    )
+
+
+@users_async_router.get("/users/me", response_model=UserResponse)
+async def read_users_me(
+    current_user: dict = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_users_db),
+):
+    user = await get_user_by_email_async(current_user.sub, db)
+
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return user_response(user)
+
+
+@users_async_router.get(
+    "/users/{user_id}",
+    response_model=UserResponse,
+    summary="Retrieve a user by ID",
+    description="Returns the information of a specific user based on their ID.",
+)
+async def get_user(
+    user_id: int,
+    db: AsyncSession = Depends(get_async_users_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    if current_user.id != user_id and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access forbidden")
+
+    user = await get_user_by_id_async(user_id, db)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return user_response(user)
+
+
+@users_async_router.get("/users", response_model=list[UserResponse])
+async def get_all_users(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: int | None = None,
+    format: Literal["json", "ndjson"] = "json",
+    current_user: dict = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_users_db),
+):
+    if "admin" not in current_user.scopes:
+        raise HTTPException(
+            status_code=403, detail="Access denied: administrators only."
+        )
+
+    if format == "ndjson":
+        return StreamingResponse(
+            aiter_ndjson(db, users_page_query, user_row_response),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    result = await db.execute(users_page_query(after, limit + 1))
+    rows = result.all()
+
+    return [user_row_response(row) for row in paginate(rows, limit, response)]
+
+
+@users_async_router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_user(
+    user_id: int,
+    current_user: dict = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_users_db),
+):
+    if "admin" not in current_user.scopes:
+        raise HTTPException(
+            status_code=403,
+            detail="Access denied: administrators only.",
+        )
+
+    # Refresh tokens are loaded up front for the delete-orphan cascade.
+    user_to_delete = await db.get(
+        User, user_id, options=[selectinload(User.refresh_tokens)]
+    )
+    if not user_to_delete:
+        raise HTTPException(status_code=404, detail="User not found.")
+
+    await db.delete(user_to_delete)
+    await db.commit()
+    token_cache.invalidate_subject(user_to_delete.email)
+
+    return JSONResponse({"message": "User deleted"})
+
+
+@users_async_router.post(
+    "/users/", response_model=UserResponse, status_code=status.HTTP_201_CREATED
+)
+async def create_user(
+    user_data: UserCreate, db: AsyncSession = Depends(get_async_users_db)
+):
+    anonymized_email = anonymize(user_data.email)
+    existing_user = await get_user_by_email_async(anonymized_email, db)
+    if existing_user:
+        raise HTTPException(
+            status_code=400, detail="A user with this email already exists."
+        )
+
+    role_id = await role_registry.get_id_async(db, DEFAULT_ROLE)
+    if not role_id:
+        raise HTTPException(
+            status_code=500, detail=f"The role '{DEFAULT_ROLE}' could not be found."
+        )
+
+    new_user = User(
+        email=anonymized_email,
+        name=user_data.name,
+        hashed_password=await hash_password_async(user_data.password),
+        role_id=role_id,
+        is_active=True,
+    )
+
+    db.add(new_user)
+    await db.commit()
+    await db.refresh(new_user, attribute_names=["role"])
+    known_emails.update(db, [new_user.email])
+
+    return user_response(new_user)
+
+
+@users_async_router.post("/users/import", response_model=UserImportReport)
+async def import_users_file(
+    file: UploadFile,
+    format: Literal["csv", "ndjson"] = "csv",
+    batch_size: int = Query(USER_IMPORT_BATCH_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_users_db),
+):
+    if "admin" not in current_user.scopes:
+        raise HTTPException(
+            status_code=403, detail="Access denied: administrators only."
+        )
+
+    lines = open_records(file.file)
+    return await import_users_async(db, read_records(lines, format), batch_size)
+
+
+@users_async_router.patch("/users/{user_id}/role")
+async def update_user_role(
+    user_id: int,
+    role_update: RoleUpdate,
+    current_user: dict = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_users_db),
+):
+    if "admin" not in current_user.scopes:
+        raise HTTPException(
+            status_code=403, detail="Access denied: administrators only."
+        )
+
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found.")
+
+    role_id = await role_registry.get_id_async(db, role_update.role)
+    if not role_id:
+        raise HTTPException(status_code=404, detail="The role could not be found.")
+
+    user.role_id = role_id
+    await db.commit()
+    token_cache.invalidate_subject(user.email)
+
+    return JSONResponse({"message": f"User role updated to '{role_update.role}'."})
+
+
+async def apply_user_update(user: User, update_data: UserUpdate, db: AsyncSession):
+    previous_email = user.email
+
+    if update_data.name:
+        user.name = update_data.name
+
+    if update_data.email:
+        user.email = anonymize(update_data.email)
+
+    if update_data.password:
+        user.hashed_password = await hash_password_async(update_data.password)
+
+    await db.commit()
+    await db.refresh(user, attribute_names=["role"])
+    token_cache.invalidate_subject(previous_email)
+    known_emails.update(db, [user.email])
+
+
+@users_async_router.patch("/users/me", response_model=UserResponse)
+async def update_current_user(
+    update_data: UserUpdate,
+    current_user: dict = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_users_db),
+):
+    user = await get_user_by_email_async(current_user.sub, db)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found.")
+
+    await apply_user_update(user, update_data, db)
+
+    return user_response(user)
+
+
+@users_async_router.patch("/users/{user_id}", response_model=UserResponse)
+async def admin_update_user(
+    user_id: int,
+    update_data: UserUpdate,
+    current_user: dict = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_users_db),
+):
+    if "admin" not in current_user.scopes:
+        raise HTTPException(
+            status_code=403, detail="Access denied: administrators only."
+        )
+
+    user = await get_user_by_id_async(user_id, db)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found.")
+
+    await apply_user_update(user, update_data, db)
+
+    return user_response(user)
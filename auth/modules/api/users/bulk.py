@@ -0,0 +1,348 @@
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import sys
+import time
+from contextlib import nullcontext
+from itertools import islice
+from typing import Iterable, Iterator
+from dotenv import load_dotenv
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from utils.logger_config import configure_logger
+from modules.api.auth.security import anonymize, hash_passwords, hash_passwords_async
+from modules.api.users.functions import users_page_query
+from modules.api.users.models import User
+from modules.api.users.role_registry import DEFAULT_ROLE, role_registry
+from modules.api.users.known_emails import known_emails
+from modules.api.users.schemas import (
+    UserCreate,
+    UserImportError,
+    UserImportReport,
+    UserResponse,
+)
+from modules.api.pagination import EXPORT_CHUNK_SIZE
+from modules.database.session import UsersSessionLocal
+
+logger = configure_logger()
+
+load_dotenv()
+
+USER_IMPORT_BATCH_SIZE = int(os.getenv("USER_IMPORT_BATCH_SIZE") or 500)
+
+FORMATS = ("csv", "ndjson")
+
+
+def open_records(file, encoding: str = "utf-8"):
+    """
+    Text lines of a binary upload. Bytes that are not valid ``encoding`` are
+    kept as lone surrogates, so that their row is rejected on its own instead
+    of the whole import failing after the first batches were committed.
+    """
+    return io.TextIOWrapper(file, encoding=encoding, errors="surrogateescape", newline="")
+
+
+def read_records(lines: Iterable[str], format: str) -> Iterator[tuple[int, dict | str]]:
+    """
+    Stream ``(line number, record)`` pairs out of a CSV file with a header
+    row, or out of an NDJSON file. NDJSON lines are decoded later, so that a
+    malformed line is reported like any other invalid row. Fields beyond the
+    header row of a CSV file are gathered under the ``None`` key.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown import format: '{format}'")
+    if format == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_no, line in enumerate(lines, start=1):
+            if line.strip():
+                yield line_no, line
+
+
+def _batched(records: Iterable, size: int) -> Iterator[list]:
+    records = iter(records)
+    while batch := list(islice(records, size)):
+        yield batch
+
+
+def _reject(report: UserImportReport, line: int, error: str):
+    report.errors.append(UserImportError(line=line, error=error))
+
+
+def _error_message(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        first = error.errors()[0]
+        field = ".".join(str(loc) for loc in first["loc"])
+        return f"{field}: {first['msg']}" if field else first["msg"]
+    return str(error)
+
+
+def _check_encoding(record: dict | str):
+    texts = [record] if isinstance(record, str) else [*record.values()]
+    for text in texts:
+        if isinstance(text, str):
+            try:
+                text.encode("utf-8")
+            except UnicodeEncodeError:
+                raise ValueError("The line is not valid UTF-8")
+
+
+def _prepare_batch(batch: list, report: UserImportReport) -> list[dict]:
+    """
+    Validate and anonymize a batch of records. Invalid rows and emails
+    repeated within the batch are reported and left out.
+    """
+    candidates = {}
+    for line, record in batch:
+        try:
+            _check_encoding(record)
+            data = json.loads(record) if isinstance(record, str) else record
+            if not isinstance(data, dict):
+                raise ValueError("A user must be a JSON object")
+            if None in data:
+                raise ValueError("More fields than in the header row")
+            user = UserCreate(**data)
+            role = data.get("role") or DEFAULT_ROLE
+            if not isinstance(role, str):
+                raise ValueError("role: Input should be a valid string")
+        except (TypeError, ValueError) as e:
+            _reject(report, line, _error_message(e))
+            continue
+
+        email = anonymize(user.email)
+        if email in candidates:
+            _reject(report, line, "Duplicate email in import.")
+            continue
+        candidates[email] = {
+            "line": line,
+            "email": email,
+            "name": user.name,
+            "password": user.password,
+            "role": role,
+        }
+    return list(candidates.values())
+
+
+def _read_batch(records: Iterator, size: int, report: UserImportReport):
+    """Read and prepare the next batch, None once ``records`` is exhausted."""
+    batch = list(islice(records, size))
+    return _prepare_batch(batch, report) if batch else None
+
+
+def _existing_emails_query(candidates: list[dict]):
+    return select(User.email).where(User.email.in_([c["email"] for c in candidates]))
+
+
+def _keep_new_users(
+    candidates: list[dict],
+    existing: set[str],
+    role_ids: dict[str, int | None],
+    report: UserImportReport,
+) -> list[dict]:
+    kept = []
+    for candidate in candidates:
+        if candidate["email"] in existing:
+            error = "A user with this email already exists."
+        elif not role_ids[candidate["role"]]:
+            error = f"The role '{candidate['role']}' does not exist."
+        else:
+            kept.append(candidate)
+            continue
+        _reject(report, candidate["line"], error)
+    return kept
+
+
+def _user_rows(candidates: list[dict], hashes: list[str], role_ids: dict) -> list[dict]:
+    return [
+        {
+            "email": candidate["email"],
+            "name": candidate["name"],
+            "hashed_password": hashed_password,
+            "role_id": role_ids[candidate["role"]],
+            "is_active": True,
+        }
+        for candidate, hashed_password in zip(candidates, hashes)
+    ]
+
+
+def _insert_batch(
+    db: Session, candidates: list[dict], rows: list[dict], report: UserImportReport
+):
+    """
+    Insert a batch with a single executemany. If a row conflicts with a user
+    created concurrently, the batch is replayed row by row so that only the
+    conflicting rows are rejected.
+    """
+    try:
+        db.execute(insert(User), rows)
+        db.commit()
+        report.created += len(rows)
+        return
+    except IntegrityError:
+        db.rollback()
+
+    for candidate, row in zip(candidates, rows):
+        try:
+            db.execute(insert(User), [row])
+            db.commit()
+            report.created += 1
+        except IntegrityError:
+            db.rollback()
+            _reject(report, candidate["line"], "A user with this email already exists.")
+
+
+async def _insert_batch_async(db: AsyncSession, candidates, rows, report):
+    """Async variant of _insert_batch."""
+    try:
+        await db.execute(insert(User), rows)
+        await db.commit()
+        report.created += len(rows)
+        return
+    except IntegrityError:
+        await db.rollback()
+
+    for candidate, row in zip(candidates, rows):
+        try:
+            await db.execute(insert(User), [row])
+            await db.commit()
+            report.created += 1
+        except IntegrityError:
+            await db.rollback()
+            _reject(report, candidate["line"], "A user with this email already exists.")
+
+
+def import_users(
+    db: Session, records: Iterable, batch_size: int = USER_IMPORT_BATCH_SIZE
+) -> UserImportReport:
+    """
+    Create users in bulk from ``read_records`` output.
+
+    Each batch costs one query for duplicates, one parallel hashing pass over
+    the password pool and one multi-row insert. Invalid rows are reported
+    with their line number and never abort the import.
+    """
+    report = UserImportReport()
+    for batch in _batched(records, batch_size):
+        candidates = _prepare_batch(batch, report)
+        if not candidates:
+            continue
+        existing = set(db.scalars(_existing_emails_query(candidates)))
+        role_ids = {
+            name: role_registry.get_id(db, name)
+            for name in {c["role"] for c in candidates}
+        }
+        candidates = _keep_new_users(candidates, existing, role_ids, report)
+        if not candidates:
+            continue
+        hashes = hash_passwords([c["password"] for c in candidates])
+        _insert_batch(db, candidates, _user_rows(candidates, hashes, role_ids), report)
+        known_emails.update(db, [c["email"] for c in candidates])
+    report.errors.sort(key=lambda error: error.line)
+    return report
+
+
+async def import_users_async(
+    db: AsyncSession, records: Iterable, batch_size: int = USER_IMPORT_BATCH_SIZE
+) -> UserImportReport:
+    """
+    Async variant of import_users. Reading the records, from an upload that
+    may have spilled to disk, and parsing them run in a worker thread.
+    """
+    report = UserImportReport()
+    records = iter(records)
+    while (
+        candidates := await asyncio.to_thread(_read_batch, records, batch_size, report)
+    ) is not None:
+        if not candidates:
+            continue
+        existing = set(await db.scalars(_existing_emails_query(candidates)))
+        role_ids = {
+            name: await role_registry.get_id_async(db, name)
+            for name in {c["role"] for c in candidates}
+        }
+        candidates = _keep_new_users(candidates, existing, role_ids, report)
+        if not candidates:
+            continue
+        hashes = await hash_passwords_async([c["password"] for c in candidates])
+        await _insert_batch_async(
+            db, candidates, _user_rows(candidates, hashes, role_ids), report
+        )
+        known_emails.update(db, [c["email"] for c in candidates])
+    report.errors.sort(key=lambda error: error.line)
+    return report
+
+
+def export_users(db: Session, out, format: str, chunk_size: int = EXPORT_CHUNK_SIZE) -> int:
+    """
+    Write every user to ``out`` as CSV or NDJSON, one keyset page at a time.
+    Emails are exported as stored, i.e. anonymized. Returns the user count.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown export format: '{format}'")
+    writer = None
+    if format == "csv":
+        writer = csv.DictWriter(out, fieldnames=list(UserResponse.model_fields))
+        writer.writeheader()
+
+    count, after = 0, None
+    while True:
+        rows = db.execute(users_page_query(after, chunk_size)).all()
+        for row in rows:
+            if writer:
+                writer.writerow(row._asdict())
+            else:
+                out.write(json.dumps(row._asdict()) + "\n")
+        count += len(rows)
+        if len(rows) < chunk_size:
+            return count
+        after = rows[-1].id
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import or export users in bulk.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="Create users from a file.")
+    import_parser.add_argument("path", help="CSV or NDJSON file, '-' for stdin.")
+    import_parser.add_argument("--format", choices=FORMATS)
+    import_parser.add_argument("--batch-size", type=int, default=USER_IMPORT_BATCH_SIZE)
+
+    export_parser = commands.add_parser("export", help="Write every user to a file.")
+    export_parser.add_argument("path", help="Output file, '-' for stdout.")
+    export_parser.add_argument("--format", choices=FORMATS)
+
+    args = parser.parse_args()
+    format = args.format or ("ndjson" if args.path.endswith(".ndjson") else "csv")
+    start = time.perf_counter()
+
+    if args.command == "import":
+        file = (
+            nullcontext(open_records(sys.stdin.buffer))
+            if args.path == "-"
+            else open_records(open(args.path, "rb"))
+        )
+        with UsersSessionLocal() as db, file as lines:
+            report = import_users(db, read_records(lines, format), args.batch_size)
+        for error in report.errors:
+            logger.warning(f"Line {error.line}: {error.error}")
+        logger.info(
+            f"{report.created} users imported, {len(report.errors)} rejected "
+            f"in {time.perf_counter() - start:.1f}s."
+        )
+    else:
+        file = (
+            nullcontext(sys.stdout)
+            if args.path == "-"
+            else open(args.path, "w", newline="", encoding="utf-8")
+        )
+        with UsersSessionLocal() as db, file as out:
+            count = export_users(db, out, format)
+        logger.info(f"{count} users exported in {time.perf_counter() - start:.1f}s.")
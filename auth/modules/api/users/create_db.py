@@ -1,9 +1,14 @@
+import os
+import time
+from sqlalchemy import insert, inspect, select
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
 
-from modules.api.auth.security import anonymize, hash_password
+from modules.api.auth.security import anonymize, hash_passwords
 from utils.logger_config import configure_logger
 from modules.api.users.models import User, Role
+from modules.api.users.role_registry import role_registry
+from modules.api.users.known_emails import known_emails
 from modules.database.config import USERS_DATABASE_PATH, INITIAL_USERS_CONFIG_PATH
 from modules.database.session import users_engine, UsersSessionLocal, UsersBase
 import yaml
@@ -12,6 +17,9 @@ logger = configure_logger()
 
 load_dotenv()
 
+# Users inserted per multi-row INSERT when seeding the initial users.
+SEED_CHUNK_SIZE = int(os.getenv("USERS_SEED_CHUNK_SIZE") or 1000)
+
 
 def init_users_db():
     """
@@ -25,9 +33,28 @@ def init_users_db():
         logger.info("The 'users' database was successfully created.")
         create_roles_and_first_users()
     else:
+        create_missing_indexes()
         logger.info("The 'users' database already exists. No changes needed.")
 
 
+def create_missing_indexes(engine=users_engine):
+    """
+    Create indexes declared on the models but missing from an existing
+    database, e.g. a users.db file created by an older version.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    for table in UsersBase.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_indexes = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind=engine)
+                logger.info(f"Index '{index.name}' created on '{table.name}'.")
+
+
 def load_initial_users_config():
     """
     Load the initial user and role configuration from the YAML config file.
@@ -42,37 +69,59 @@ def create_roles_and_first_users():
     """
     Create roles and first users as defined in the initial configuration file.
     Raises an exception if something goes wrong during creation.
+
+    Users are seeded in one pass: a single query for the emails already
+    present, every password hashed in parallel on the password pool, then
+    multi-row inserts of SEED_CHUNK_SIZE users committed together.
     """
     config = load_initial_users_config()
     db: Session = UsersSessionLocal()
+    start = time.perf_counter()
 
     try:
-        for role_name in config.get("roles", []):
-            if not db.query(Role).filter_by(role=role_name).first():
-                db.add(Role(role=role_name))
-        db.commit()
-
-        roles = {role.role: role.id for role in db.query(Role).all()}
-
-        for user_cfg in config.get("users", []):
-            role_id = roles.get(user_cfg["role"])
-            if not role_id:
+        roles = dict(db.execute(select(Role.role, Role.id)).all())
+        new_roles = [Role(role=name) for name in config.get("roles", []) if name not in roles]
+        db.add_all(new_roles)
+        db.flush()
+        roles.update({role.role: role.id for role in new_roles})
+
+        users_cfg = config.get("users", [])
+        for user_cfg in users_cfg:
+            if user_cfg["role"] not in roles:
                 raise ValueError(f"The role '{user_cfg['role']}' does not exist.")
 
-            if db.query(User).filter_by(email=anonymize(user_cfg["email"])).first():
-                continue
-
-            user = User(
-                email=anonymize(user_cfg["email"]),
-                name=user_cfg["name"],
-                hashed_password=hash_password(user_cfg["password"]),
-                role_id=role_id,
-                is_active=True,
-            )
-            db.add(user)
-            db.commit()
-            db.refresh(user)
-            logger.info(f"User '{user.name}' was successfully created.")
+        emails = [anonymize(user_cfg["email"]) for user_cfg in users_cfg]
+        existing = set(db.scalars(select(User.email).where(User.email.in_(emails))))
+        new_users = {}
+        for email, user_cfg in zip(emails, users_cfg):
+            if email not in existing:
+                new_users.setdefault(email, user_cfg)
+
+        hashing_start = time.perf_counter()
+        hashes = hash_passwords([user_cfg["password"] for user_cfg in new_users.values()])
+        hashing_seconds = time.perf_counter() - hashing_start
+
+        rows = [
+            {
+                "email": email,
+                "name": user_cfg["name"],
+                "hashed_password": hashed_password,
+                "role_id": roles[user_cfg["role"]],
+                "is_active": True,
+            }
+            for (email, user_cfg), hashed_password in zip(new_users.items(), hashes)
+        ]
+        for i in range(0, len(rows), SEED_CHUNK_SIZE):
+            db.execute(insert(User), rows[i : i + SEED_CHUNK_SIZE])
+        db.commit()
+        role_registry.update(db, roles)
+        known_emails.update(db, [row["email"] for row in rows])
+
+        logger.info(
+            f"{len(new_roles)} roles and {len(rows)} users created "
+            f"({len(users_cfg) - len(rows)} already present) in "
+            f"{time.perf_counter() - start:.2f}s, {hashing_seconds:.2f}s of hashing."
+        )
 
     except Exception as e:
         db.rollback()
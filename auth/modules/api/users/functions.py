@@ -1,22 +1,20 @@
 from modules.api.users.create_db import User
+from modules.api.users.models import Role
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import Depends, HTTPException, status
 from fastapi.security import SecurityScopes, OAuth2PasswordBearer
 from utils.logger_config import configure_logger
-from dotenv import load_dotenv
-import os
 from modules.api.users.schemas import TokenData
-from modules.database.dependencies import get_users_db
+from modules.api.users.token_cache import token_cache
+from modules.database.dependencies import get_users_db, get_async_users_db
 from pydantic import ValidationError
-from jose import JWTError, jwt
+from jose import JWTError
+from modules.api.auth.keys import decode_token
 
 logger = configure_logger()
 
-load_dotenv()
-
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = "HS256"
-
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl="auth/login",
     scopes={
@@ -27,50 +25,126 @@ oauth2_scheme = OAuth2PasswordBearer(
 )
 
 
+def credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+    )
+
+
 def get_user_by_email(email: str, db: Session):
     """
-    Retrieve a user from the database by anonymized email.
+    Retrieve a user, with its role, from the database by anonymized email.
     """
     user = db.query(User).filter(User.email == email).first()
     return user
 
 
-def get_current_user(
-    security_scopes: SecurityScopes,
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_users_db),
-):
+def get_user_by_id(user_id: int, db: Session):
     """
-    Validate JWT token, check scopes, and retrieve the current user.
+    Retrieve a user, with its role, from the database by ID.
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
+    return db.get(User, user_id)
+
+
+async def get_user_by_email_async(email: str, db: AsyncSession):
+    """
+    Retrieve a user, with its role, from the database by anonymized email.
+    """
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
+
+
+async def get_user_by_id_async(user_id: int, db: AsyncSession):
+    """
+    Retrieve a user, with its role, from the database by ID.
+    """
+    return await db.get(User, user_id)
+
+
+def users_page_query(after: int | None = None, limit: int | None = None):
+    """
+    Column-only query over users and their role name, ordered by id for
+    keyset pagination: rows come after the ``after`` id, at most ``limit``.
+    """
+    query = (
+        select(User.id, User.name, User.email, User.is_active, Role.role)
+        .join(Role, User.role_id == Role.id)
+        .order_by(User.id)
     )
+    if after is not None:
+        query = query.where(User.id > after)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        token_data = TokenData(**payload)
-        email = token_data.sub
-        token_scopes = token_data.scopes
 
-    except JWTError:
-        raise credentials_exception
-    except ValidationError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Token payload validation error: {e.errors()}",
-        )
+def validate_token(security_scopes: SecurityScopes, token: str):
+    """
+    Decode the JWT token and check its scopes.
+    Tokens already validated are served from the token cache, skipping the
+    signature check. Returns the token data and whether it came from the cache.
+    """
+    token_data = token_cache.get(token)
+    cached = token_data is not None
+
+    if not cached:
+        try:
+            payload = decode_token(token)
+            token_data = TokenData(**payload)
+
+        except JWTError:
+            raise credentials_exception()
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Token payload validation error: {e.errors()}",
+            )
 
     for scope in security_scopes.scopes:
-        if scope not in token_scopes:
+        if scope not in token_data.scopes:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not enough permissions",
             )
 
-    user = get_user_by_email(email, db)
-    if not user:
-        raise credentials_exception
+    return token_data, cached
+
+
+def get_current_user(
+    security_scopes: SecurityScopes,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_users_db),
+):
+    """
+    Validate JWT token, check scopes, and retrieve the current user.
+    The database lookup is skipped for tokens found in the token cache.
+    """
+    token_data, cached = validate_token(security_scopes, token)
+
+    if not cached:
+        user = get_user_by_email(token_data.sub, db)
+        if not user:
+            raise credentials_exception()
+        token_cache.set(token, token_data)
+
+    return token_data
+
+
+async def get_current_user_async(
+    security_scopes: SecurityScopes,
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_users_db),
+):
+    """
+    Async variant of get_current_user, backed by an AsyncSession.
+    """
+    token_data, cached = validate_token(security_scopes, token)
+
+    if not cached:
+        user = await get_user_by_email_async(token_data.sub, db)
+        if not user:
+            raise credentials_exception()
+        token_cache.set(token, token_data)
 
     return token_data
@@ -0,0 +1,176 @@
+import hashlib
+import math
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from utils.logger_config import configure_logger
+from modules.api.users.models import User
+from modules.database.session import UsersSessionLocal
+
+logger = configure_logger()
+
+load_dotenv()
+
+# Off by default: only correct when this process writes every user (one
+# worker, no `bulk.py import` from the command line), see KnownEmails.
+KNOWN_EMAILS_FILTER = (os.getenv("KNOWN_EMAILS_FILTER") or "false").lower() == "true"
+# A login for an email missing from the filter reloads it if it is older than
+# this, so that accounts created by another worker are found within it.
+KNOWN_EMAILS_REFRESH_INTERVAL = float(os.getenv("KNOWN_EMAILS_REFRESH_INTERVAL") or 10)
+# Share of the unknown emails still looked up in the database.
+KNOWN_EMAILS_FALSE_POSITIVE_RATE = float(
+    os.getenv("KNOWN_EMAILS_FALSE_POSITIVE_RATE") or 0.01
+)
+
+
+class BloomFilter:
+    """Set membership with false positives but no false negatives."""
+
+    def __init__(self, capacity: int, error_rate: float = KNOWN_EMAILS_FALSE_POSITIVE_RATE):
+        self.capacity = max(capacity, 1)
+        self.size = max(64, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from two 64-bit halves of one digest.
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    @property
+    def full(self) -> bool:
+        """Whether more items were added than sized for, raising the error rate."""
+        return self.count > self.capacity
+
+
+class KnownEmails:
+    """
+    Process-wide filter of the (anonymized) emails of the users, so that a
+    login naming an unknown email is rejected without a database query.
+
+    Filters are kept per database and only consulted once loaded (at
+    startup); until then every email is looked up. Emails written through
+    the API are added as they are. A deleted account stays in the filter,
+    its email is then looked up and not found, until the next reload.
+
+    Accounts created by another process are missing until a miss reloads
+    the filter, at most every ``refresh_interval`` seconds: meanwhile their
+    logins are refused, and counted as failures by the login throttle.
+    Enable it only when a single worker writes every user.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = KNOWN_EMAILS_FILTER,
+        refresh_interval: float = KNOWN_EMAILS_REFRESH_INTERVAL,
+    ):
+        self.enabled = enabled
+        self.refresh_interval = refresh_interval
+        self._filters: dict[str, tuple[BloomFilter, float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(db: Session | AsyncSession) -> str:
+        # Without the driver, so that sync and async sessions share the filter.
+        url = db.get_bind().url
+        return url.set(drivername=url.get_backend_name()).render_as_string()
+
+    def _store(self, key: str, emails: list[str]) -> BloomFilter:
+        # Room to double before the error rate degrades.
+        bloom = BloomFilter(2 * len(emails) + 1024)
+        for email in emails:
+            bloom.add(email)
+        with self._lock:
+            self._filters[key] = (bloom, time.monotonic())
+        return bloom
+
+    def load(self, db: Session) -> BloomFilter:
+        """(Re)build the filter of the database bound to ``db``."""
+        return self._store(self._key(db), list(db.scalars(select(User.email))))
+
+    async def load_async(self, db: AsyncSession) -> BloomFilter:
+        return self._store(self._key(db), list(await db.scalars(select(User.email))))
+
+    def _lookup(self, key: str, email: str) -> bool | None:
+        """Whether ``email`` may exist, None if the filter must be reloaded."""
+        with self._lock:
+            entry = self._filters.get(key)
+            if entry is None:
+                return True
+            bloom, loaded_at = entry
+            if email in bloom:
+                return True
+            if bloom.full or time.monotonic() - loaded_at >= self.refresh_interval:
+                # Concurrent misses do not reload it again meanwhile.
+                self._filters[key] = (bloom, time.monotonic())
+                return None
+            return False
+
+    def might_exist(self, db: Session, email: str) -> bool:
+        """False only if no user of the database bound to ``db`` has ``email``."""
+        if not self.enabled:
+            return True
+        found = self._lookup(self._key(db), email)
+        if found is None:
+            found = email in self.load(db)
+        return found
+
+    async def might_exist_async(self, db: AsyncSession, email: str) -> bool:
+        if not self.enabled:
+            return True
+        found = self._lookup(self._key(db), email)
+        if found is None:
+            found = email in await self.load_async(db)
+        return found
+
+    def update(self, db: Session | AsyncSession, emails: list[str]):
+        """Record emails that were just written through ``db``."""
+        with self._lock:
+            entry = self._filters.get(self._key(db))
+            if entry is not None:
+                for email in emails:
+                    entry[0].add(email)
+
+    def clear(self):
+        with self._lock:
+            self._filters.clear()
+
+
+known_emails = KnownEmails()
+
+
+def load_known_emails_at_startup(session_factory=UsersSessionLocal):
+    """
+    Build the known emails filter when the API starts. A database that does
+    not exist yet is left alone: its emails are looked up until restarted.
+    """
+    if not known_emails.enabled:
+        return
+    engine = session_factory.kw["bind"]
+    if engine.dialect.name == "sqlite" and not os.path.exists(engine.url.database or ""):
+        return
+    try:
+        with session_factory() as db:
+            bloom = known_emails.load(db)
+        logger.info(f"{bloom.count} known emails loaded.")
+    except SQLAlchemyError as e:
+        logger.warning(f"Could not load the known emails at startup: {e}")
@@ -14,7 +14,8 @@ class User(UsersBase):
     is_active = Column(Boolean, default=True)
 
     role_id = Column(Integer, ForeignKey("roles.id"), nullable=False)
-    role = relationship("Role", back_populates="users")
+    # Roles are read with nearly every user, load them in the same statement.
+    role = relationship("Role", back_populates="users", lazy="joined")
     refresh_tokens = relationship(
         "RefreshToken", back_populates="users", cascade="all, delete-orphan"
     )
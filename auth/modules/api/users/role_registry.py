@@ -0,0 +1,92 @@
+import os
+import threading
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from utils.logger_config import configure_logger
+from modules.api.users.models import Role
+from modules.database.session import UsersSessionLocal
+
+logger = configure_logger()
+
+DEFAULT_ROLE = "reader"
+
+
+class RoleRegistry:
+    """
+    Process-wide map of role names to role ids.
+
+    Roles are a handful of rows that almost never change, so they are read
+    once and served from memory. The map is kept per database, and a name
+    missing from it triggers a reload, so roles added out of band are picked
+    up on first use.
+    """
+
+    def __init__(self):
+        self._roles: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(db: Session | AsyncSession) -> str:
+        return str(db.get_bind().url)
+
+    def _store(self, key: str, rows) -> dict[str, int]:
+        roles = {name: role_id for role_id, name in rows}
+        with self._lock:
+            self._roles[key] = roles
+        return roles
+
+    def load(self, db: Session) -> dict[str, int]:
+        """(Re)load every role of the database bound to ``db``."""
+        rows = db.execute(select(Role.id, Role.role)).all()
+        return self._store(self._key(db), rows)
+
+    async def load_async(self, db: AsyncSession) -> dict[str, int]:
+        rows = (await db.execute(select(Role.id, Role.role))).all()
+        return self._store(self._key(db), rows)
+
+    def get_id(self, db: Session, name: str) -> int | None:
+        """Return the id of the role called ``name``, or None if it does not exist."""
+        role_id = self._cached(db, name)
+        if role_id is None:
+            role_id = self.load(db).get(name)
+        return role_id
+
+    async def get_id_async(self, db: AsyncSession, name: str) -> int | None:
+        role_id = self._cached(db, name)
+        if role_id is None:
+            role_id = (await self.load_async(db)).get(name)
+        return role_id
+
+    def update(self, db: Session | AsyncSession, roles: dict[str, int]):
+        """Record roles that were just written through ``db``."""
+        with self._lock:
+            self._roles.setdefault(self._key(db), {}).update(roles)
+
+    def clear(self):
+        with self._lock:
+            self._roles.clear()
+
+    def _cached(self, db: Session | AsyncSession, name: str) -> int | None:
+        with self._lock:
+            return self._roles.get(self._key(db), {}).get(name)
+
+
+role_registry = RoleRegistry()
+
+
+def load_roles_at_startup(session_factory=UsersSessionLocal):
+    """
+    Warm the role registry when the API starts. A database that does not
+    exist yet is left alone: its roles are loaded on first use.
+    """
+    engine = session_factory.kw["bind"]
+    if engine.dialect.name == "sqlite" and not os.path.exists(engine.url.database or ""):
+        return
+    try:
+        with session_factory() as db:
+            roles = role_registry.load(db)
+        logger.info(f"{len(roles)} roles loaded.")
+    except SQLAlchemyError as e:
+        logger.warning(f"Could not load roles at startup: {e}")
@@ -1,19 +1,60 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Literal
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+    status,
+)
 from fastapi.security import OAuth2PasswordBearer
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from utils.logger_config import configure_logger
+from utils.profiling import ProfiledRoute
 from modules.database.dependencies import get_users_db
-from modules.api.users.functions import get_current_user, get_user_by_email
-from modules.api.users.schemas import UserResponse, UserCreate, RoleUpdate, UserUpdate
-from modules.api.users.models import User, Role
+from modules.api.users.functions import (
+    get_current_user,
+    get_user_by_email,
+    get_user_by_id,
+    users_page_query,
+)
+from modules.api.users.schemas import (
+    UserResponse,
+    UserCreate,
+    UserImportReport,
+    RoleUpdate,
+    UserUpdate,
+)
+from modules.api.users.bulk import (
+    USER_IMPORT_BATCH_SIZE,
+    import_users,
+    open_records,
+    read_records,
+)
+from modules.api.users.models import User
+from modules.api.users.role_registry import DEFAULT_ROLE, role_registry
+from modules.api.users.known_emails import known_emails
+from modules.api.users.token_cache import token_cache
 from modules.api.auth.security import anonymize, hash_password
+from modules.api.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    NDJSON_MEDIA_TYPE,
+    iter_ndjson,
+    paginate,
+)
 
 logger = configure_logger()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
-users_router = APIRouter()
+users_router = APIRouter(route_class=ProfiledRoute)
+
+
+def user_row_response(row) -> UserResponse:
+    return UserResponse(**row._mapping)
 
 
 @users_router.get("/users/me", response_model=UserResponse)
@@ -48,7 +89,7 @@ def get_user(
     if current_user.id != user_id and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Access forbidden")
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = get_user_by_id(user_id, db)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -63,25 +104,27 @@ def get_user(
 
 @users_router.get("/users", response_model=list[UserResponse])
 def get_all_users(
-    current_user: dict = Depends(get_current_user), db: Session = Depends(get_users_db)
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: int | None = None,
+    format: Literal["json", "ndjson"] = "json",
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_users_db),
 ):
     if "admin" not in current_user.scopes:
         raise HTTPException(
             status_code=403, detail="Access denied: administrators only."
         )
 
-    users = db.query(User).all()
-
-    return [
-        UserResponse(
-            id=u.id,
-            name=u.name,
-            email=u.email,
-            is_active=u.is_active,
-            role=u.role.role,
+    if format == "ndjson":
+        return StreamingResponse(
+            iter_ndjson(db, users_page_query, user_row_response),
+            media_type=NDJSON_MEDIA_TYPE,
         )
-        for u in users
-    ]
+
+    rows = db.execute(users_page_query(after, limit + 1)).all()
+
+    return [user_row_response(row) for row in paginate(rows, limit, response)]
 
 
 @users_router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -96,12 +139,13 @@ def delete_user(
             detail="Access denied: administrators only.",
         )
 
-    user_to_delete = db.query(User).filter(User.id == user_id).first()
+    user_to_delete = get_user_by_id(user_id, db)
     if not user_to_delete:
         raise HTTPException(status_code=404, detail="User not found.")
 
     db.delete(user_to_delete)
     db.commit()
+    token_cache.invalidate_subject(user_to_delete.email)
 
     return JSONResponse({"message": "User deleted"})
 
@@ -117,23 +161,24 @@ def create_user(user_data: UserCreate, db: Session = Depends(get_users_db)):
             status_code=400, detail="A user with this email already exists."
         )
 
-    role_obj = db.query(Role).filter_by(role="reader").first()
-    if not role_obj:
+    role_id = role_registry.get_id(db, DEFAULT_ROLE)
+    if not role_id:
         raise HTTPException(
-            status_code=500, detail="The role 'reader' could not be found."
+            status_code=500, detail=f"The role '{DEFAULT_ROLE}' could not be found."
         )
 
     new_user = User(
         email=anonymized_email,
         name=user_data.name,
         hashed_password =hash_password(user_data.password),
-        role_id=role_obj.id,
+        role_id=role_id,
         is_active=True,
     )
 
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
+    known_emails.update(db, [new_user.email])
 
     return UserResponse(
         id=new_user.id,
@@ -144,6 +189,23 @@ def create_user(user_data: UserCreate, db: Session = Depends(get_users_db)):
     )
 
 
+@users_router.post("/users/import", response_model=UserImportReport)
+def import_users_file(
+    file: UploadFile,
+    format: Literal["csv", "ndjson"] = "csv",
+    batch_size: int = Query(USER_IMPORT_BATCH_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_users_db),
+):
+    if "admin" not in current_user.scopes:
+        raise HTTPException(
+            status_code=403, detail="Access denied: administrators only."
+        )
+
+    lines = open_records(file.file)
+    return import_users(db, read_records(lines, format), batch_size)
+
+
 @users_router.patch("/users/{user_id}/role")
 def update_user_role(
     user_id: int,
@@ -156,19 +218,20 @@ def update_user_role(
             status_code=403, detail="Access denied: administrators only."
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = get_user_by_id(user_id, db)
     if not user:
         raise HTTPException(status_code=404, detail="User not found.")
 
-    new_role = db.query(Role).filter(Role.role == role_update.role).first()
-    if not new_role:
+    role_id = role_registry.get_id(db, role_update.role)
+    if not role_id:
         raise HTTPException(status_code=404, detail="The role could not be found.")
 
-    user.role_id = new_role.id
+    user.role_id = role_id
     db.commit()
     db.refresh(user)
+    token_cache.invalidate_subject(user.email)
 
-    return JSONResponse({"message": f"User role updated to '{new_role.role}'."})
+    return JSONResponse({"message": f"User role updated to '{role_update.role}'."})
 
 
 @users_router.patch("/users/me", response_model=UserResponse)
@@ -181,6 +244,8 @@ def update_current_user(
     if not user:
         raise HTTPException(status_code=404, detail="User not found.")
 
+    previous_email = user.email
+
     if update_data.name:
         user.name = update_data.name
 
@@ -192,6 +257,8 @@ def update_current_user(
 
     db.commit()
     db.refresh(user)
+    token_cache.invalidate_subject(previous_email)
+    known_emails.update(db, [user.email])
 
     return UserResponse(
         id=user.id,
@@ -214,10 +281,12 @@ def admin_update_user(
             status_code=403, detail="Access denied: administrators only."
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = get_user_by_id(user_id, db)
     if not user:
         raise HTTPException(status_code=404, detail="User not found.")
 
+    previous_email = user.email
+
     if update_data.name:
         user.name = update_data.name
 
@@ -229,6 +298,8 @@ def admin_update_user(
 
     db.commit()
     db.refresh(user)
+    token_cache.invalidate_subject(previous_email)
+    known_emails.update(db, [user.email])
 
     return UserResponse(
         id=user.id,
@@ -34,3 +34,13 @@ class TokenData(BaseModel):
     role: str
     scopes: List[str]
     id: Optional[int] = None
+
+
+class UserImportError(BaseModel):
+    line: int
+    error: str
+
+
+class UserImportReport(BaseModel):
+    created: int = 0
+    errors: List[UserImportError] = []
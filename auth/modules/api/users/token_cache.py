@@ -0,0 +1,82 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+from modules.api.auth.security import hash_token
+from modules.api.users.schemas import TokenData
+
+load_dotenv()
+
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE") or 10000)
+
+
+class TokenCache:
+    """
+    In-process LRU cache of validated access tokens.
+
+    Entries are keyed by the SHA-256 of the token and live until the token's
+    ``exp``. They are also indexed by subject so that every token of a user
+    can be dropped when that user is modified or deleted.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, TokenData] = OrderedDict()
+        self._by_subject: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> TokenData | None:
+        """Return the cached token data, or None if absent or expired."""
+        if self.max_size <= 0:
+            return None
+        key = hash_token(token)
+        with self._lock:
+            token_data = self._entries.get(key)
+            if token_data is None:
+                return None
+            if token_data.exp <= time.time():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return token_data
+
+    def set(self, token: str, token_data: TokenData):
+        """Cache validated token data until the token expires."""
+        if self.max_size <= 0 or token_data.exp <= time.time():
+            return
+        key = hash_token(token)
+        with self._lock:
+            self._entries[key] = token_data
+            self._entries.move_to_end(key)
+            self._by_subject.setdefault(token_data.sub, set()).add(key)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+
+    def invalidate_subject(self, sub: str):
+        """Drop every cached token issued to the given (anonymized) email."""
+        with self._lock:
+            for key in self._by_subject.pop(sub, set()):
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_subject.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _discard(self, key: str):
+        token_data = self._entries.pop(key, None)
+        if token_data is None:
+            return
+        keys = self._by_subject.get(token_data.sub)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_subject[token_data.sub]
+
+
+token_cache = TokenCache()
@@ -1,4 +1,8 @@
+import os
 from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
@@ -7,8 +11,34 @@ DATABASE_DIR.mkdir(parents=True, exist_ok=True)
 
 USERS_DATABASE_PATH = DATABASE_DIR / "users.db"
 
-USERS_DATABASE_URL = f"sqlite:///{USERS_DATABASE_PATH}"
+USERS_DATABASE_URL = os.getenv("USERS_DATABASE_URL") or f"sqlite:///{USERS_DATABASE_PATH}"
+
+# Serve the API with async routes backed by an AsyncEngine
+# (aiosqlite for SQLite URLs, asyncpg for PostgreSQL URLs).
+USERS_DATABASE_ASYNC = os.getenv("USERS_DATABASE_ASYNC", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
 
 INITIAL_USERS_CONFIG_PATH = (
     BASE_DIR / "modules" / "api" / "users" / "initial_users.yaml"
 )
+
+# SQLite connection pragmas, applied to every new connection.
+SQLITE_PRAGMAS = {
+    # Only takes effect on a new database, hence first (see compaction.py).
+    "auto_vacuum": os.getenv("SQLITE_AUTO_VACUUM") or "INCREMENTAL",
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE") or "WAL",
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS") or "NORMAL",
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS") or 5000),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE") or 256 * 1024 * 1024),
+    # Negative values are expressed in KiB.
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE") or -64 * 1024),
+}
+
+# Connection pool settings, used for non-SQLite database URLs.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE") or 10)
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW") or 20)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE") or 1800)
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
@@ -1,4 +1,4 @@
-from .session import UsersSessionLocal
+from .session import UsersSessionLocal, get_users_async_session
 
 
 def get_users_db():
@@ -7,3 +7,9 @@ def get_users_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_users_db():
+    _, UsersAsyncSessionLocal = get_users_async_session()
+    async with UsersAsyncSessionLocal() as db:
+        yield db
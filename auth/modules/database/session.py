@@ -1,14 +1,88 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
-from .config import USERS_DATABASE_URL
+from .config import (
+    USERS_DATABASE_URL,
+    SQLITE_PRAGMAS,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+)
 
 UsersBase = declarative_base()
 
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
 
-def create_session(database_url: str):
-    engine = create_engine(database_url, connect_args={"check_same_thread": False})
+
+def to_async_url(database_url: str) -> str:
+    """Return the async driver equivalent of a synchronous database URL."""
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None or url.drivername in ASYNC_DRIVERS.values():
+        return database_url
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def engine_options(database_url: str) -> dict:
+    """Return the create_engine keyword arguments suited to the database URL."""
+    if make_url(database_url).get_backend_name() == "sqlite":
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def apply_sqlite_pragmas(engine, pragmas: dict = SQLITE_PRAGMAS):
+    """Run the given PRAGMA statements on every new SQLite connection."""
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def create_session(database_url: str, tune_sqlite: bool = True):
+    engine = create_engine(database_url, **engine_options(database_url))
+    if tune_sqlite and engine.dialect.name == "sqlite":
+        apply_sqlite_pragmas(engine)
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     return engine, SessionLocal
 
 
+def create_async_session(database_url: str, tune_sqlite: bool = True):
+    async_url = to_async_url(database_url)
+    options = engine_options(async_url)
+    options.pop("connect_args", None)
+    engine = create_async_engine(async_url, **options)
+    if tune_sqlite and engine.dialect.name == "sqlite":
+        apply_sqlite_pragmas(engine.sync_engine)
+    SessionLocal = async_sessionmaker(
+        bind=engine, autoflush=False, expire_on_commit=False
+    )
+    return engine, SessionLocal
+
+
 users_engine, UsersSessionLocal = create_session(USERS_DATABASE_URL)
+
+_users_async_session = None
+
+
+def get_users_async_session():
+    """
+    Return the async engine and session factory of the users database, built
+    on first use so that the async driver is only needed in async mode.
+    """
+    global _users_async_session
+    if _users_async_session is None:
+        _users_async_session = create_async_session(USERS_DATABASE_URL)
+    return _users_async_session
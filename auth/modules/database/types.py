@@ -0,0 +1,19 @@
+from datetime import timezone
+from sqlalchemy import DateTime
+from sqlalchemy.types import TypeDecorator
+
+
+class UTCDateTime(TypeDecorator):
+    """
+    Naive ``DateTime`` column holding UTC times. Aware values are converted
+    to naive UTC when bound: asyncpg rejects them for ``timestamp without
+    time zone``, where psycopg2 and sqlite silently accept them.
+    """
+
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
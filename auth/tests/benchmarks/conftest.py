@@ -0,0 +1,170 @@
+"""
+Benchmarks of the auth service, skipped unless pytest runs with ``--bench``:
+
+    python -m pytest tests/benchmarks --bench --bench-json results.json
+    python -m pytest tests/benchmarks --bench --bench-compare results.json
+
+Every benchmark records its p50/p95/p99 latencies and its throughput. With
+``--bench-compare``, the session fails when a median latency grew, or a
+throughput dropped, by more than ``--bench-max-regression``.
+"""
+import asyncio
+import json
+import platform
+import statistics
+import time
+from datetime import datetime, timezone
+import httpx
+import pytest
+
+RESULTS = {}
+REGRESSIONS = []
+
+
+def summarize(latencies: list[float], elapsed: float, **extra) -> dict:
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        **extra,
+        "count": len(latencies),
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": percentiles[49] * 1000,
+        "p95_ms": percentiles[94] * 1000,
+        "p99_ms": percentiles[98] * 1000,
+        "rps": len(latencies) / elapsed,
+    }
+
+
+@pytest.fixture(autouse=True)
+def _only_with_bench_option(request):
+    if not request.config.getoption("--bench"):
+        pytest.skip("benchmarks run with --bench")
+
+
+@pytest.fixture
+def benchmark(request):
+    """
+    Call ``fn(*args)`` ``rounds`` times, after ``warmup`` untimed calls, and
+    record its latencies. ``setup`` runs untimed before every call.
+    """
+
+    def run(fn, *args, rounds: int = 100, warmup: int = 1, setup=None):
+        for _ in range(warmup):
+            if setup:
+                setup()
+            fn(*args)
+        latencies = []
+        for _ in range(rounds):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            fn(*args)
+            latencies.append(time.perf_counter() - start)
+        RESULTS[request.node.name] = summarize(
+            latencies, sum(latencies), kind="micro", concurrency=1
+        )
+        return RESULTS[request.node.name]
+
+    return run
+
+
+@pytest.fixture
+def load_test(request):
+    """
+    Send ``requests`` requests to an ASGI ``app`` through httpx, from
+    ``concurrency`` concurrent clients, and record their latencies. The
+    requests are built by ``make_request(client, i)`` and must succeed.
+    """
+
+    def run(app, make_request, requests: int = 200, concurrency: int = 16):
+        latencies = []
+
+        async def worker(client, queue):
+            while not queue.empty():
+                i = queue.get_nowait()
+                start = time.perf_counter()
+                response = await make_request(client, i)
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.text
+
+        async def main():
+            queue = asyncio.Queue()
+            for i in range(requests):
+                queue.put_nowait(i)
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench"
+            ) as client:
+                start = time.perf_counter()
+                await asyncio.gather(*(worker(client, queue) for _ in range(concurrency)))
+                return time.perf_counter() - start
+
+        elapsed = asyncio.run(main())
+        RESULTS[request.node.name] = summarize(
+            latencies, elapsed, kind="load", concurrency=concurrency
+        )
+        return RESULTS[request.node.name]
+
+    return run
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result["p50_ms"] > before["p50_ms"] * (1 + max_regression):
+            regressions.append(
+                f"{name}: p50 {before['p50_ms']:.3f} ms -> {result['p50_ms']:.3f} ms"
+            )
+        if result["rps"] < before["rps"] * (1 - max_regression):
+            regressions.append(
+                f"{name}: {before['rps']:.1f} -> {result['rps']:.1f} requests/s"
+            )
+    return regressions
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not RESULTS:
+        return
+    config = session.config
+    path = config.getoption("--bench-json")
+    if path:
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "created": datetime.now(timezone.utc).isoformat(),
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "results": RESULTS,
+                },
+                f,
+                indent=2,
+            )
+    baseline = config.getoption("--bench-compare")
+    if baseline:
+        with open(baseline) as f:
+            REGRESSIONS.extend(
+                compare(
+                    RESULTS,
+                    json.load(f)["results"],
+                    config.getoption("--bench-max-regression"),
+                )
+            )
+        if REGRESSIONS:
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not RESULTS:
+        return
+    write = terminalreporter.write_line
+    terminalreporter.section("benchmarks")
+    write(f"{'name':<40} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>10}")
+    for name, result in RESULTS.items():
+        write(
+            f"{name:<40} {result['p50_ms']:9.3f} {result['p95_ms']:9.3f} "
+            f"{result['p99_ms']:9.3f} {result['rps']:10.1f}"
+        )
+    for regression in REGRESSIONS:
+        write(f"REGRESSION {regression}", red=True)
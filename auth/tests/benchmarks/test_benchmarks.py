@@ -0,0 +1,202 @@
+import itertools
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi.security import SecurityScopes
+
+from modules.api.main import create_app
+from modules.api.auth import hashers
+from modules.api.auth.codecs import CODECS
+from modules.api.auth.functions import create_token, store_refresh_token
+from modules.api.auth.keys import KeyRing, generate_private_key
+from modules.api.auth.rate_limit import LoginRateLimiter, MemoryStorage, get_login_rate_limiter
+from modules.api.auth.security import anonymize, hash_password, hash_token
+from modules.api.auth.tokens import get_token_factory
+from modules.api.users.functions import get_current_user
+from modules.api.users.models import Role, User
+from modules.api.users.role_registry import role_registry
+from modules.api.users.token_cache import token_cache
+from modules.database.dependencies import get_users_db
+from modules.database.session import UsersBase, create_session
+
+USERS = 50
+PASSWORD = "benchmark-password"
+REQUESTS = 200
+CONCURRENCY = 16
+# Logins of the load tests hash at the lowest cost, and so do not rehash the
+# seeded passwords, to measure the service's own overhead rather than bcrypt.
+# test_hash_password times the configured cost.
+LOW_COST_HASHER = hashers.BcryptHasher(rounds=4)
+
+
+@pytest.fixture(scope="module")
+def session_factory(tmp_path_factory):
+    engine, SessionLocal = create_session(
+        f"sqlite:///{tmp_path_factory.mktemp('bench') / 'users.db'}"
+    )
+    UsersBase.metadata.create_all(bind=engine)
+    role_registry.clear()
+    hashed = LOW_COST_HASHER.hash(PASSWORD)
+    with SessionLocal() as db:
+        role = Role(role="reader")
+        db.add(role)
+        db.flush()
+        db.add_all(
+            User(
+                email=anonymize(f"user{i}@example.com"),
+                name=f"User {i}",
+                hashed_password=hashed,
+                role_id=role.id,
+            )
+            for i in range(USERS)
+        )
+        db.commit()
+    yield SessionLocal
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    with session_factory() as session:
+        yield session
+
+
+@pytest.fixture
+def low_cost_hasher(monkeypatch):
+    monkeypatch.setitem(hashers._hashers, "bcrypt", LOW_COST_HASHER)
+
+
+@pytest.fixture(scope="module")
+def app(session_factory):
+    def override_get_users_db():
+        with session_factory() as db:
+            yield db
+
+    # Every login comes from one client, the limits would reject most of them.
+    rate_limiter = LoginRateLimiter(MemoryStorage(), ip_limit=0, email_limit=0)
+    app = create_app(use_async_db=False)
+    app.dependency_overrides[get_users_db] = override_get_users_db
+    app.dependency_overrides[get_login_rate_limiter] = lambda: rate_limiter
+    return app
+
+
+def access_token(i: int = 0) -> str:
+    return get_token_factory().access_token(
+        anonymize(f"user{i % USERS}@example.com"), "reader", "default"
+    )
+
+
+def test_hash_password(benchmark):
+    benchmark(hash_password, PASSWORD, rounds=10)
+
+
+def test_create_token(benchmark):
+    claims = {"sub": anonymize("user0@example.com"), "role": "reader", "type": "access"}
+    benchmark(create_token, claims, rounds=2000)
+
+
+CODEC_CASES = [
+    (algorithm, name)
+    for algorithm in ("HS256", "RS256", "ES256")
+    for name, codec in CODECS.items()
+    if algorithm in codec.algorithms
+]
+
+
+@pytest.fixture(scope="module")
+def codec_rings():
+    keys = {
+        "HS256": "codec-benchmark-secret-of-32-bytes",
+        "RS256": generate_private_key("RS256"),
+        "ES256": generate_private_key("ES256"),
+    }
+    return lambda algorithm, name: KeyRing(algorithm, {"k1": keys[algorithm]}, codec=name)
+
+
+@pytest.mark.parametrize("algorithm,codec", CODEC_CASES)
+def test_codec_encode(benchmark, codec_rings, algorithm, codec):
+    key_ring = codec_rings(algorithm, codec)
+    claims = {"sub": anonymize("user0@example.com"), "role": "reader", "type": "access"}
+    benchmark(key_ring.encode, claims, rounds=2000)
+
+
+@pytest.mark.parametrize("algorithm,codec", CODEC_CASES)
+def test_codec_decode(benchmark, codec_rings, algorithm, codec):
+    key_ring = codec_rings(algorithm, codec)
+    claims = {
+        "sub": anonymize("user0@example.com"),
+        "role": "reader",
+        "type": "access",
+        "exp": datetime.now(timezone.utc) + timedelta(hours=1),
+    }
+    benchmark(key_ring.decode, key_ring.encode(claims), rounds=2000)
+
+
+def test_issue_token_pair(benchmark):
+    factory = get_token_factory()
+    benchmark(factory.issue_pair, anonymize("user0@example.com"), "reader", "default", rounds=2000)
+
+
+def test_get_current_user_cached(benchmark, db):
+    benchmark(get_current_user, SecurityScopes(["reader"]), access_token(), db, rounds=2000)
+
+
+def test_get_current_user_uncached(benchmark, db):
+    benchmark(
+        get_current_user, SecurityScopes(["reader"]), access_token(), db,
+        rounds=500, setup=token_cache.clear,
+    )
+
+
+def test_store_refresh_token(benchmark, db):
+    user_id = db.query(User.id).first()[0]
+    expires_at = datetime.now(timezone.utc) + timedelta(days=7)
+    tokens = (hash_token(f"bench-{i}") for i in itertools.count())
+
+    benchmark(lambda: store_refresh_token(db, user_id, next(tokens), expires_at), rounds=300)
+
+
+def test_login_load(load_test, app, db, low_cost_hasher):
+    async def login(client, i):
+        return await client.post(
+            "/auth/login",
+            data={"username": f"user{i % USERS}@example.com", "password": PASSWORD},
+        )
+
+    load_test(app, login, REQUESTS, CONCURRENCY)
+
+    # A rehash to a higher cost would have timed bcrypt instead.
+    hashes = {hashed for (hashed,) in db.query(User.hashed_password)}
+    assert all(hashed.startswith("$2b$04$") for hashed in hashes), hashes
+
+
+def test_refresh_load(load_test, app, db):
+    user_ids = [user_id for (user_id,) in db.query(User.id).order_by(User.id)]
+    refresh_tokens = []
+    # Storing a refresh token revokes the previous one of the same user and
+    # app, so every request uses its own app.
+    for i in range(REQUESTS):
+        _, refresh_token, expires_at = get_token_factory().issue_pair(
+            anonymize(f"user{i % USERS}@example.com"), "reader", f"bench-{i}"
+        )
+        store_refresh_token(
+            db, user_ids[i % USERS], hash_token(refresh_token), expires_at, f"bench-{i}"
+        )
+        refresh_tokens.append(refresh_token)
+
+    async def refresh(client, i):
+        return await client.post(
+            "/auth/refresh", headers={"Authorization": f"Bearer {refresh_tokens[i]}"}
+        )
+
+    load_test(app, refresh, REQUESTS, CONCURRENCY)
+
+
+def test_users_me_load(load_test, app):
+    tokens = [access_token(i) for i in range(USERS)]
+
+    async def users_me(client, i):
+        return await client.get(
+            "/users/users/me", headers={"Authorization": f"Bearer {tokens[i % USERS]}"}
+        )
+
+    load_test(app, users_me, REQUESTS, CONCURRENCY)
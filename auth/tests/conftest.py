@@ -0,0 +1,14 @@
+import pytest
+
+import modules.api.auth.models  # noqa: F401 (registers the refresh_tokens table)
+import modules.api.users.models  # noqa: F401
+from modules.database.session import UsersBase, create_session
+
+
+@pytest.fixture
+def sqlite_session_factory(tmp_path):
+    """Session factory of a new SQLite users database, every table created."""
+    engine, SessionLocal = create_session(f"sqlite:///{tmp_path / 'users.db'}")
+    UsersBase.metadata.create_all(bind=engine)
+    yield SessionLocal
+    engine.dispose()
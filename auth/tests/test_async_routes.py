@@ -0,0 +1,197 @@
+import inspect
+import os
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from modules.api.main import create_app
+from modules.database.session import UsersBase, create_async_session, to_async_url
+from modules.database.dependencies import get_async_users_db
+from modules.api.users.models import User, Role
+from modules.api.users.token_cache import token_cache
+from modules.api.users.role_registry import role_registry
+from modules.api.auth.rate_limit import LoginRateLimiter, MemoryStorage, get_login_rate_limiter
+from modules.api.auth.security import hash_password, anonymize
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_async.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL)
+TestingSessionLocal = sessionmaker(bind=engine, autoflush=False)
+
+
+def test_to_async_url():
+    assert to_async_url("sqlite:///./users.db") == "sqlite+aiosqlite:///./users.db"
+    assert (
+        to_async_url("postgresql://user:pwd@db/users")
+        == "postgresql+asyncpg://user:pwd@db/users"
+    )
+    assert to_async_url("sqlite+aiosqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+
+
+@pytest.fixture
+def seeded_db():
+    UsersBase.metadata.drop_all(bind=engine)
+    UsersBase.metadata.create_all(bind=engine)
+    token_cache.clear()
+    role_registry.clear()
+
+    with TestingSessionLocal() as db:
+        reader, admin = Role(role="reader"), Role(role="admin")
+        db.add_all([reader, admin])
+        db.flush()
+        db.add_all(
+            [
+                User(
+                    email=anonymize("test@example.com"),
+                    name="Test User",
+                    hashed_password=hash_password("password123"),
+                    role_id=reader.id,
+                ),
+                User(
+                    email=anonymize("admin@example.com"),
+                    name="Admin User",
+                    hashed_password=hash_password("adminpass"),
+                    role_id=admin.id,
+                ),
+            ]
+        )
+        db.commit()
+
+    yield
+
+    engine.dispose()
+    if os.path.exists("test_async.db"):
+        os.remove("test_async.db")
+
+
+@pytest.fixture
+def client(seeded_db):
+    async_engine, AsyncSessionLocal = create_async_session(SQLALCHEMY_DATABASE_URL)
+
+    async def override_get_async_users_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app = create_app(use_async_db=True)
+    app.dependency_overrides[get_async_users_db] = override_get_async_users_db
+    rate_limiter = LoginRateLimiter(MemoryStorage())
+    app.dependency_overrides[get_login_rate_limiter] = lambda: rate_limiter
+
+    with TestClient(app) as c:
+        yield c
+        c.portal.call(async_engine.dispose)
+
+
+def login(client, email, password):
+    response = client.post(
+        "/auth/login", data={"username": email, "password": password}
+    )
+    assert response.status_code == 200
+    return response.json()["access_token"], response.json()["refresh_token"]
+
+
+def auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_async_routes_are_coroutines():
+    app = create_app(use_async_db=True)
+    login_route = next(r for r in app.routes if r.path == "/auth/login")
+    assert inspect.iscoroutinefunction(login_route.endpoint)
+
+
+def test_login_and_read_me(client):
+    access_token, _ = login(client, "test@example.com", "password123")
+    response = client.get("/users/users/me", headers=auth(access_token))
+    assert response.status_code == 200
+    assert response.json()["role"] == "reader"
+
+
+def test_login_invalid_password(client):
+    response = client.post(
+        "/auth/login",
+        data={"username": "test@example.com", "password": "wrong"},
+    )
+    assert response.status_code == 401
+
+
+def test_refresh(client):
+    _, refresh_token = login(client, "test@example.com", "password123")
+    response = client.post("/auth/refresh", headers=auth(refresh_token))
+    assert response.status_code == 200
+    access_token = response.json()["access_token"]
+    assert client.get("/users/users/me", headers=auth(access_token)).status_code == 200
+
+    response = client.post("/auth/refresh", headers=auth(refresh_token))
+    assert response.status_code == 401
+
+
+def test_admin_listings(client):
+    access_token, _ = login(client, "admin@example.com", "adminpass")
+    users = client.get("/users/users", headers=auth(access_token))
+    tokens = client.get("/auth/refresh-tokens", headers=auth(access_token))
+    assert users.status_code == 200
+    assert len(users.json()) == 2
+    assert tokens.status_code == 200
+    assert len(tokens.json()) == 1
+
+    page = client.get("/users/users?limit=1", headers=auth(access_token))
+    assert len(page.json()) == 1
+    assert page.headers["X-Next-Cursor"] == str(page.json()[0]["id"])
+
+    export = client.get("/users/users?format=ndjson", headers=auth(access_token))
+    assert len(export.text.splitlines()) == 2
+
+
+def test_create_update_and_delete_user(client):
+    with TestingSessionLocal() as db:
+        db.add(Role(role="editor"))
+        db.commit()
+
+    response = client.post(
+        "/users/users/",
+        json={"email": "new@example.com", "name": "New", "password": "newpass"},
+    )
+    assert response.status_code == 201
+    user_id = response.json()["id"]
+
+    admin_token, _ = login(client, "admin@example.com", "adminpass")
+    response = client.patch(
+        f"/users/users/{user_id}",
+        json={"name": "Renamed"},
+        headers=auth(admin_token),
+    )
+    assert response.json()["name"] == "Renamed"
+
+    response = client.patch(
+        f"/users/users/{user_id}/role",
+        json={"role": "editor"},
+        headers=auth(admin_token),
+    )
+    assert response.status_code == 200
+
+    response = client.delete(f"/users/users/{user_id}", headers=auth(admin_token))
+    assert response.status_code == 200
+    response = client.get(f"/users/users/{user_id}", headers=auth(admin_token))
+    assert response.status_code == 404
+
+
+def test_import_users(client):
+    admin_token, _ = login(client, "admin@example.com", "adminpass")
+    content = "\n".join(
+        [
+            '{"email": "new@example.com", "name": "New", "password": "newpass"}',
+            '{"email": "test@example.com", "name": "Test", "password": "x"}',
+        ]
+    )
+
+    response = client.post(
+        "/users/users/import?format=ndjson",
+        files={"file": ("users.ndjson", content, "application/x-ndjson")},
+        headers=auth(admin_token),
+    )
+
+    assert response.status_code == 200
+    assert response.json()["created"] == 1
+    assert [e["line"] for e in response.json()["errors"]] == [2]
+    assert login(client, "new@example.com", "newpass")[0]
@@ -1,5 +1,7 @@
 from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock, patch
+import bcrypt
+import pytest
 
 from modules.api.auth.functions import (
     create_token,
@@ -7,8 +9,12 @@ from modules.api.auth.functions import (
     store_refresh_token,
     find_refresh_token,
     verify_token,
+    rotate_refresh_token,
 )
 from modules.api.auth.models import RefreshToken
+from modules.api.auth import hashers
+from modules.api.auth.security import anonymize, dummy_hash
+from modules.api.users.models import User, Role
 
 # -------------------------------
 # Setup global fake DB
@@ -19,7 +25,7 @@ fake_db = MagicMock()
 # -------------------------------
 # create_token
 # -------------------------------
-@patch("modules.api.auth.functions.jwt.encode")
+@patch("modules.api.auth.functions.encode_token")
 def test_create_token_with_access_type(mock_encode):
     mock_encode.return_value = "mocked.jwt.token"
     data = {"sub": "123", "role": "admin", "type": "access"}
@@ -61,8 +67,11 @@ def test_authenticate_user_not_found(mock_anonymize, mock_get_user):
     mock_anonymize.return_value = email
     mock_get_user.return_value = None
 
-    result = authenticate_user(fake_db, email, password)
+    with patch("modules.api.auth.functions.verify_password") as mock_verify_password:
+        result = authenticate_user(fake_db, email, password)
     assert result is False
+    # A dummy hash is checked, unknown emails take as long as wrong passwords.
+    mock_verify_password.assert_called_once_with(password, dummy_hash())
 
 
 @patch("modules.api.auth.functions.get_user_by_email")
@@ -146,3 +155,79 @@ def test_verify_token_match(mock_hash_token):
 def test_verify_token_mismatch(mock_hash_token):
     mock_hash_token.return_value = "not_matching_hash"
     assert verify_token("token123", "hashed456") is False
+
+
+# -------------------------------
+# rotate_refresh_token
+# -------------------------------
+@pytest.fixture
+def sqlite_db(sqlite_session_factory):
+    db = sqlite_session_factory()
+    db.add(Role(id=1, role="reader"))
+    db.add(User(id=1, email="anon", name="Test", hashed_password="x", role_id=1))
+    db.add(
+        RefreshToken(
+            token="old-hash",
+            user_id=1,
+            app_name="default",
+            expires_at=datetime.now(timezone.utc) + timedelta(days=1),
+        )
+    )
+    db.commit()
+    yield db
+    db.close()
+
+
+def test_authenticate_user_rehashes_outdated_hashes(sqlite_db, monkeypatch):
+    monkeypatch.setitem(hashers._hashers, "bcrypt", hashers.BcryptHasher(rounds=5))
+    user = sqlite_db.get(User, 1)
+    user.email = anonymize("test@example.com")
+    user.hashed_password = bcrypt.hashpw(b"password", bcrypt.gensalt(4)).decode()
+    sqlite_db.commit()
+
+    assert authenticate_user(sqlite_db, "test@example.com", "password")
+
+    sqlite_db.expire_all()
+    rehashed = sqlite_db.get(User, 1).hashed_password
+    assert rehashed.startswith("$2b$05$")
+    assert bcrypt.checkpw(b"password", rehashed.encode())
+
+
+def test_rotate_refresh_token_revokes_and_inserts(sqlite_db):
+    expires_at = datetime.now(timezone.utc) + timedelta(days=7)
+
+    rotated = rotate_refresh_token(sqlite_db, "old-hash", "new-hash", expires_at)
+
+    assert rotated == (1, "default")
+    tokens = {t.token: t for t in sqlite_db.query(RefreshToken).all()}
+    assert tokens["old-hash"].revoked is True
+    assert tokens["new-hash"].revoked is False
+    assert tokens["new-hash"].app_name == "default"
+
+
+def test_rotate_refresh_token_rejects_reuse(sqlite_db):
+    expires_at = datetime.now(timezone.utc) + timedelta(days=7)
+    assert rotate_refresh_token(sqlite_db, "old-hash", "new-hash", expires_at)
+
+    assert rotate_refresh_token(sqlite_db, "old-hash", "other", expires_at) is None
+    assert sqlite_db.query(RefreshToken).count() == 2
+
+
+def test_rotate_refresh_token_rejects_expired(sqlite_db):
+    token = sqlite_db.query(RefreshToken).first()
+    token.expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    sqlite_db.commit()
+
+    expires_at = datetime.now(timezone.utc) + timedelta(days=7)
+    assert rotate_refresh_token(sqlite_db, "old-hash", "new-hash", expires_at) is None
+
+
+def test_rotate_refresh_token_without_returning(sqlite_db, monkeypatch):
+    monkeypatch.setattr(sqlite_db.get_bind().dialect, "update_returning", False)
+    expires_at = datetime.now(timezone.utc) + timedelta(days=7)
+
+    assert rotate_refresh_token(sqlite_db, "old-hash", "new-hash", expires_at) == (
+        1,
+        "default",
+    )
+    assert sqlite_db.query(RefreshToken).filter_by(token="old-hash").one().revoked
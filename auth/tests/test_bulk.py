@@ -0,0 +1,133 @@
+import asyncio
+import io
+import json
+import threading
+import pytest
+
+from modules.api.auth.security import anonymize, verify_password
+from modules.api.users.bulk import (
+    export_users,
+    import_users,
+    import_users_async,
+    open_records,
+    read_records,
+)
+from modules.api.users.models import User, Role
+from modules.api.users.role_registry import role_registry
+from modules.database.session import create_async_session
+
+
+@pytest.fixture
+def db(sqlite_session_factory):
+    role_registry.clear()
+    with sqlite_session_factory() as session:
+        session.add_all([Role(id=1, role="admin"), Role(id=2, role="reader")])
+        session.add(
+            User(email=anonymize("taken@example.com"), name="Taken", role_id=2)
+        )
+        session.commit()
+        yield session
+
+
+def test_import_csv_reports_row_errors_without_aborting(db):
+    lines = io.StringIO(
+        "email,name,password,role\n"
+        "ann@example.com,Ann,pw-ann,\n"
+        "not-an-email,Bad,pw,\n"
+        "taken@example.com,Taken,pw,\n"
+        "bob@example.com,Bob,pw-bob,admin\n"
+        "ann@example.com,Ann again,pw,\n"
+        "eve@example.com,Eve,pw-eve,ghost\n"
+    )
+
+    report = import_users(db, read_records(lines, "csv"), batch_size=2)
+
+    assert report.created == 2
+    assert [(e.line, e.error.split(":")[0]) for e in report.errors] == [
+        (3, "email"),
+        (4, "A user with this email already exists."),
+        (6, "A user with this email already exists."),
+        (7, "The role 'ghost' does not exist."),
+    ]
+    bob = db.query(User).filter_by(email=anonymize("bob@example.com")).one()
+    assert bob.role.role == "admin"
+    assert verify_password("pw-bob", bob.hashed_password)
+
+
+def test_import_ndjson_reports_malformed_lines(db):
+    lines = [
+        json.dumps({"email": "ann@example.com", "name": "Ann", "password": "pw"}),
+        "",
+        "{not json",
+        json.dumps(["a", "list"]),
+        json.dumps({"email": "ann@example.com", "name": "Ann", "password": "pw"}),
+    ]
+
+    report = import_users(db, read_records(lines, "ndjson"))
+
+    assert report.created == 1
+    assert [e.line for e in report.errors] == [3, 4, 5]
+    assert db.query(User).count() == 2
+
+
+def test_import_rejects_extra_fields_bad_roles_and_invalid_utf8(db):
+    csv_file = open_records(
+        io.BytesIO(
+            b"email,name,password\n"
+            b"ann@example.com,Ann,pw,extra\n"
+            b"bob@example.com,B\xe9b,pw\n"
+            b"eve@example.com,Eve,pw\n"
+        )
+    )
+    report = import_users(db, read_records(csv_file, "csv"), batch_size=1)
+
+    assert report.created == 1
+    assert [(e.line, e.error) for e in report.errors] == [
+        (2, "More fields than in the header row"),
+        (3, "The line is not valid UTF-8"),
+    ]
+
+    ndjson = [
+        json.dumps({"email": "joe@example.com", "name": "Joe", "password": "pw", "role": ["x"]}),
+        json.dumps({"email": "kim@example.com", "name": "Kim", "password": "pw"}),
+    ]
+    report = import_users(db, read_records(ndjson, "ndjson"))
+
+    assert report.created == 1
+    assert [(e.line, e.error.split(":")[0]) for e in report.errors] == [(1, "role")]
+
+
+def test_async_import_reads_records_off_the_event_loop(db):
+    engine, AsyncSessionLocal = create_async_session(str(db.get_bind().url))
+    readers = set()
+
+    def records():
+        for i in range(5):
+            readers.add(threading.current_thread())
+            yield i + 1, {"email": f"user{i}@example.com", "name": "User", "password": "pw"}
+
+    async def run():
+        async with AsyncSessionLocal() as async_db:
+            try:
+                return await import_users_async(async_db, records(), batch_size=2)
+            finally:
+                await engine.dispose()
+
+    report = asyncio.run(run())
+
+    assert report.created == 5
+    assert threading.main_thread() not in readers
+
+
+@pytest.mark.parametrize("format", ["csv", "ndjson"])
+def test_export_writes_every_user(db, format):
+    out = io.StringIO()
+
+    assert export_users(db, out, format, chunk_size=1) == 1
+
+    content = out.getvalue().splitlines()
+    if format == "csv":
+        assert content[0] == "id,email,name,is_active,role"
+        assert content[1].endswith(",Taken,True,reader")
+    else:
+        assert json.loads(content[0])["email"] == anonymize("taken@example.com")
@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta, timezone
+import os
+import pytest
+from sqlalchemy import text
+
+from modules.api.auth.compaction import (
+    compact_refresh_tokens,
+    compaction_stats,
+    purge_refresh_tokens,
+    vacuum_database,
+)
+from modules.api.auth.models import RefreshToken
+from modules.api.users.models import User, Role
+from modules.database.session import create_session, UsersBase
+
+
+@pytest.fixture
+def session_factory(sqlite_session_factory):
+    SessionLocal = sqlite_session_factory
+    now = datetime.now(timezone.utc)
+    with SessionLocal() as db:
+        db.add(Role(id=1, role="reader"))
+        db.add(User(id=1, email="anon", name="Test", hashed_password="x", role_id=1))
+        # Expired a long time ago: purged.
+        rows = [("expired", now - timedelta(days=30), now - timedelta(days=37), False)] * 5
+        rows += [
+            # Revoked a long time ago: purged.
+            ("revoked-old", now + timedelta(days=1), now - timedelta(days=10), True),
+            # Revoked recently: kept for the retention window.
+            ("revoked-new", now + timedelta(days=6), now - timedelta(hours=1), True),
+            # Expired recently: kept for the retention window.
+            ("expired-new", now - timedelta(hours=1), now - timedelta(days=7), False),
+            # Live token: kept.
+            ("live", now + timedelta(days=7), now, False),
+        ]
+        for i, (name, expires_at, created_at, revoked) in enumerate(rows):
+            db.add(
+                RefreshToken(
+                    token=f"{name}-{i}",
+                    user_id=1,
+                    expires_at=expires_at,
+                    created_at=created_at,
+                    revoked=revoked,
+                )
+            )
+        db.commit()
+
+    return SessionLocal
+
+
+def remaining_tokens(SessionLocal):
+    with SessionLocal() as db:
+        return sorted(t.token.rsplit("-", 1)[0] for t in db.query(RefreshToken))
+
+
+def test_purge_deletes_stale_tokens_in_batches(session_factory):
+    batches_before = compaction_stats.snapshot()["batches"]
+
+    with session_factory() as db:
+        deleted = purge_refresh_tokens(db, timedelta(days=7), batch_size=2)
+
+    assert deleted == 6
+    assert remaining_tokens(session_factory) == ["expired-new", "live", "revoked-new"]
+    # 6 rows in batches of 2, plus the final empty batch.
+    assert compaction_stats.snapshot()["batches"] - batches_before == 4
+
+
+def test_compaction_records_stats_and_vacuums(session_factory):
+    runs_before = compaction_stats.snapshot()["runs"]
+
+    deleted = compact_refresh_tokens(
+        session_factory, timedelta(days=7), batch_size=100, vacuum="full"
+    )
+
+    stats = compaction_stats.snapshot()
+    assert deleted == 6
+    assert stats["runs"] == runs_before + 1
+    assert stats["last_run_rows"] == 6
+
+
+def test_compaction_is_idempotent(session_factory):
+    compact_refresh_tokens(session_factory, timedelta(days=7), batch_size=100)
+    assert compact_refresh_tokens(session_factory, timedelta(days=7)) == 0
+
+
+def test_vacuum_rejects_unknown_mode(session_factory):
+    with session_factory() as db:
+        with pytest.raises(ValueError):
+            vacuum_database(db, "aggressive")
+
+
+def fill_and_purge(SessionLocal):
+    expired = datetime.now(timezone.utc) - timedelta(days=30)
+    with SessionLocal() as db:
+        db.add_all(
+            RefreshToken(token="x" * 500 + str(i), user_id=1, expires_at=expired)
+            for i in range(2000)
+        )
+        db.commit()
+        purge_refresh_tokens(db, timedelta(days=7))
+        db.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+    return os.path.getsize(SessionLocal.kw["bind"].url.database)
+
+
+def test_incremental_vacuum_shrinks_the_file(tmp_path):
+    path = tmp_path / "tokens.db"
+    # Created before auto_vacuum was enabled.
+    engine, SessionLocal = create_session(f"sqlite:///{path}", tune_sqlite=False)
+    UsersBase.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.add(Role(id=1, role="reader"))
+        db.add(User(id=1, email="anon", name="Test", hashed_password="x", role_id=1))
+        db.commit()
+
+    for _ in range(2):
+        size = fill_and_purge(SessionLocal)
+        with SessionLocal() as db:
+            vacuum_database(db, "incremental")
+            assert db.execute(text("PRAGMA auto_vacuum")).scalar() == 2
+            assert db.execute(text("PRAGMA freelist_count")).scalar() == 0
+        assert os.path.getsize(path) < size / 10
+    engine.dispose()
+
+
+def test_new_databases_use_incremental_auto_vacuum(session_factory):
+    with session_factory() as db:
+        assert db.execute(text("PRAGMA auto_vacuum")).scalar() == 2
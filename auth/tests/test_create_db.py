@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import patch, MagicMock, mock_open
 import yaml
+from sqlalchemy import create_engine, inspect, select, update
 
 import modules.api.users.models as users_models
 import modules.api.users.create_db as create_db
@@ -58,7 +59,8 @@ def test_init_users_db_creates_db_when_not_exists(mock_create_all, patch_logger)
             patch_logger.info.assert_any_call("The 'users' database was successfully created.")
 
 
-def test_init_users_db_does_nothing_if_db_exists(patch_logger):
+@patch('modules.api.users.create_db.create_missing_indexes')
+def test_init_users_db_does_nothing_if_db_exists(mock_create_indexes, patch_logger):
     mock_db_path = MagicMock()
     mock_db_path.exists.return_value = True
 
@@ -66,44 +68,55 @@ def test_init_users_db_does_nothing_if_db_exists(patch_logger):
         with patch('modules.api.users.create_db.create_roles_and_first_users') as mock_create_users:
             create_db.init_users_db()
             mock_create_users.assert_not_called()
+            mock_create_indexes.assert_called_once()
             patch_logger.info.assert_called_with("The 'users' database already exists. No changes needed.")
 
 
+@pytest.fixture
+def seed_session(sqlite_session_factory):
+    SessionLocal = sqlite_session_factory
+    with patch('modules.api.users.create_db.UsersSessionLocal', SessionLocal), \
+            patch('modules.api.users.create_db.hash_passwords',
+                  side_effect=lambda passwords: [f"hashed-{p}" for p in passwords]):
+        yield SessionLocal
+
+
 @patch('modules.api.users.create_db.load_initial_users_config')
-@patch('modules.api.users.create_db.UsersSessionLocal')
-@patch('modules.api.users.create_db.anonymize', side_effect=lambda x: f"anon-{x}")
-@patch('modules.api.users.create_db.hash_password', side_effect=lambda x: f"hashed-{x}")
-def test_create_roles_and_first_users_success(mock_hash_password, mock_anonymize, mock_users_session_local, mock_load_config):
-    fake_config = {
-        "roles": ["admin", "user"],
-        "users": [
-            {"email": "admin@example.com", "name": "Admin", "password": "adminpass", "role": "admin"},
-            {"email": "user@example.com", "name": "User", "password": "userpass", "role": "user"},
-        ]
-    }
+def test_create_roles_and_first_users_success(mock_load_config, seed_session, fake_config, patch_logger):
     mock_load_config.return_value = fake_config
 
-    mock_db = MagicMock()
-    mock_users_session_local.return_value = mock_db
+    with patch('modules.api.users.create_db.SEED_CHUNK_SIZE', 1):
+        create_db.create_roles_and_first_users()
 
-    mock_db.query.return_value.filter_by.return_value.first.return_value = None
-    mock_db.query.return_value.all.return_value = [
-        users_models.Role(role="admin", id=1),
-        users_models.Role(role="user", id=2),
-    ]
+    with seed_session() as db:
+        roles = {role.role for role in db.query(users_models.Role)}
+        users = {user.name: user for user in db.query(users_models.User)}
+        assert roles == set(fake_config["roles"])
+        assert set(users) == {"Admin User", "Normal User"}
+        assert users["Admin User"].role.role == "admin"
+        assert users["Admin User"].hashed_password == "hashed-adminpass"
+        assert users["Normal User"].email == create_db.anonymize("user@example.com")
+    assert "2 roles and 2 users created (0 already present)" in patch_logger.info.call_args.args[0]
 
+
+@patch('modules.api.users.create_db.load_initial_users_config')
+def test_create_roles_and_first_users_skips_existing_users(mock_load_config, seed_session, fake_config, patch_logger):
+    mock_load_config.return_value = fake_config
     create_db.create_roles_and_first_users()
 
-    added_roles = [call.args[0] for call in mock_db.add.call_args_list if isinstance(call.args[0], users_models.Role)]
-    added_users = [call.args[0] for call in mock_db.add.call_args_list if isinstance(call.args[0], users_models.User)]
+    fake_config["users"].append(
+        {"email": "new@example.com", "name": "New User", "password": "newpass", "role": "user"}
+    )
+    create_db.create_roles_and_first_users()
 
-    assert set(r.role for r in added_roles) == set(fake_config["roles"])
-    assert len(added_users) == len(fake_config["users"])
+    with seed_session() as db:
+        assert db.query(users_models.Role).count() == 2
+        assert db.query(users_models.User).count() == 3
+    assert "0 roles and 1 users created (2 already present)" in patch_logger.info.call_args.args[0]
 
 
 @patch('modules.api.users.create_db.load_initial_users_config')
-@patch('modules.api.users.create_db.UsersSessionLocal')
-def test_create_roles_and_first_users_role_missing_raises(mock_users_session_local, mock_load_config):
+def test_create_roles_and_first_users_role_missing_raises(mock_load_config, seed_session):
     bad_config = {
         "roles": ["admin"],
         "users": [
@@ -111,20 +124,14 @@ def test_create_roles_and_first_users_role_missing_raises(mock_users_session_loc
         ]
     }
     mock_load_config.return_value = bad_config
-    mock_db = MagicMock()
-    mock_users_session_local.return_value = mock_db
-
-    def filter_by_side_effect(role=None, **kwargs):
-        if role == "admin":
-            return MagicMock(first=lambda: users_models.Role(role="admin", id=1))
-        return MagicMock(first=lambda: None)
-
-    mock_db.query.return_value.filter_by.side_effect = filter_by_side_effect
-    mock_db.query.return_value.all.return_value = [users_models.Role(role="admin", id=1)]
 
     with pytest.raises(ValueError, match="The role 'user' does not exist"):
         create_db.create_roles_and_first_users()
 
+    with seed_session() as db:
+        # Nothing is committed when seeding fails.
+        assert db.query(users_models.Role).count() == 0
+
 
 @patch('modules.api.users.create_db.load_initial_users_config')
 @patch('modules.api.users.create_db.UsersSessionLocal')
@@ -141,7 +148,7 @@ def test_create_roles_and_first_users_raises_exception_when_query_fails(
     mock_db = MagicMock()
     mock_users_session_local.return_value = mock_db
 
-    mock_db.query.return_value.filter_by.side_effect = Exception("DB error")
+    mock_db.execute.side_effect = Exception("DB error")
 
     with pytest.raises(Exception, match="DB error"):
         create_db.create_roles_and_first_users()
@@ -149,3 +156,40 @@ def test_create_roles_and_first_users_raises_exception_when_query_fails(
     mock_db.rollback.assert_called_once()
     mock_logger.error.assert_called_once()
 
+
+def test_create_missing_indexes_upgrades_existing_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    users_models.UsersBase.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_refresh_tokens_user_app_live")
+
+    create_db.create_missing_indexes(engine)
+    create_db.create_missing_indexes(engine)  # idempotent
+
+    indexes = {ix["name"] for ix in inspect(engine).get_indexes("refresh_tokens")}
+    assert "ix_refresh_tokens_user_app_live" in indexes
+    engine.dispose()
+
+
+def test_refresh_token_queries_use_indexes():
+    engine = create_engine("sqlite:///:memory:")
+    users_models.UsersBase.metadata.create_all(bind=engine)
+    RefreshToken = users_models.RefreshToken
+
+    revoke_live = update(RefreshToken).where(
+        RefreshToken.user_id == 1,
+        RefreshToken.app_name == "default",
+        RefreshToken.revoked.is_(False),
+    ).values(revoked=True)
+    lookup = select(RefreshToken).where(RefreshToken.token == "hash")
+
+    def query_plan(statement):
+        compiled = statement.compile(dialect=engine.dialect)
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+        with engine.connect() as conn:
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params)
+            return " ".join(row[-1] for row in rows)
+
+    assert "USING INDEX ix_refresh_tokens_user_app_live" in query_plan(revoke_live)
+    assert "USING INDEX sqlite_autoindex_refresh_tokens" in query_plan(lookup)
+    engine.dispose()
@@ -1,5 +1,12 @@
-from sqlalchemy import inspect, Column, Integer
-from modules.database.session import create_session, UsersBase
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import delete, inspect, Column, Integer
+from sqlalchemy.dialects.postgresql import asyncpg
+from modules.database import session
+from modules.database.session import create_session, engine_options, to_async_url, UsersBase
+from modules.api.auth.functions import _revoke_statement, _successor_statement
+from modules.api.auth.models import RefreshToken
 
 TEST_DB_URL = "sqlite:///:memory:"
 
@@ -30,3 +37,58 @@ def test_can_create_tables():
     inspector = inspect(engine)
     tables = inspector.get_table_names()
     assert "temp_table" in tables
+
+def test_sqlite_pragmas_applied(tmp_path):
+    engine, _ = create_session(f"sqlite:///{tmp_path / 'pragmas.db'}")
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+    engine.dispose()
+
+def test_sqlite_pragmas_can_be_disabled(tmp_path):
+    engine, _ = create_session(f"sqlite:///{tmp_path / 'plain.db'}", tune_sqlite=False)
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "delete"
+    engine.dispose()
+
+def test_engine_options_for_server_databases():
+    options = engine_options("postgresql://user:pwd@db/users")
+    assert options["pool_pre_ping"] is True
+    assert "pool_size" in options and "max_overflow" in options
+    assert "connect_args" not in options
+    assert engine_options(TEST_DB_URL) == {"connect_args": {"check_same_thread": False}}
+
+def test_async_engine_is_only_built_in_async_mode(monkeypatch):
+    from modules.api.main import create_app
+
+    monkeypatch.setattr(session, "_users_async_session", None)
+    create_app(use_async_db=False)
+    assert session._users_async_session is None
+    create_app(use_async_db=True)
+    assert session.get_users_async_session()[0].dialect.is_async
+
+AWARE = datetime.now(timezone(timedelta(hours=2)))
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        _revoke_statement("token"),
+        _successor_statement(SimpleNamespace(user_id=1, app_name=None), "token", AWARE),
+        delete(RefreshToken).where(RefreshToken.expires_at < AWARE),
+    ],
+    ids=["revoke", "successor", "compaction"],
+)
+def test_refresh_token_times_are_bound_naive_for_asyncpg(statement):
+    # asyncpg rejects aware values for "timestamp without time zone".
+    assert to_async_url("postgresql://user:pwd@db/users").startswith("postgresql+asyncpg")
+    dialect = asyncpg.dialect()
+    compiled = statement.compile(dialect=dialect)
+    times = [bind for bind in compiled.binds.values() if isinstance(bind.value, datetime)]
+
+    assert times
+    for bind in times:
+        value = bind.type.bind_processor(dialect)(bind.value)
+        assert value.tzinfo is None
+        assert value == bind.value.astimezone(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,55 @@
+import pickle
+import pytest
+
+from modules.api.auth.hashers import (
+    Argon2Hasher,
+    BcryptHasher,
+    ScryptHasher,
+    calibrate_bcrypt_rounds,
+    get_hasher,
+    identify_hasher,
+)
+
+# Cheap parameters, the hashers behave the same at any cost.
+FAST_HASHERS = [
+    BcryptHasher(rounds=4),
+    Argon2Hasher(time_cost=1, memory_cost=1024, parallelism=1),
+    ScryptHasher(log_n=4, r=8, p=1),
+]
+
+
+@pytest.mark.parametrize("hasher", FAST_HASHERS, ids=lambda hasher: hasher.name)
+def test_hash_and_verify(hasher):
+    hashed = hasher.hash("password")
+
+    assert hashed.startswith(hasher.prefixes)
+    assert hashed != hasher.hash("password")
+    assert hasher.verify("password", hashed)
+    assert not hasher.verify("wrong", hashed)
+    assert not hasher.needs_rehash(hashed)
+    assert identify_hasher(hashed).name == hasher.name
+    # Process pools pickle the bound methods they run.
+    assert pickle.loads(pickle.dumps(hasher.verify))("password", hashed)
+
+
+def test_weaker_parameters_need_a_rehash():
+    assert BcryptHasher(rounds=5).needs_rehash(BcryptHasher(rounds=4).hash("pw"))
+    assert not BcryptHasher(rounds=4).needs_rehash(BcryptHasher(rounds=5).hash("pw"))
+    argon2 = Argon2Hasher(time_cost=1, memory_cost=1024, parallelism=1)
+    assert argon2.needs_rehash(Argon2Hasher(1, 2048, 1).hash("pw"))
+    assert ScryptHasher(log_n=5).needs_rehash(ScryptHasher(log_n=4).hash("pw"))
+
+
+def test_unknown_formats_are_rejected():
+    with pytest.raises(ValueError):
+        identify_hasher("not_a_valid_hash")
+    with pytest.raises(ValueError):
+        get_hasher("md5")
+    with pytest.raises(ValueError):
+        ScryptHasher().verify("pw", "$scrypt$garbage")
+
+
+def test_calibrated_rounds_stay_within_bounds():
+    assert calibrate_bcrypt_rounds(target_ms=0.001, min_rounds=4) == 4
+    assert calibrate_bcrypt_rounds(target_ms=1e12, min_rounds=4) == 31
+    assert 4 <= calibrate_bcrypt_rounds(target_ms=50, min_rounds=4) < 31
@@ -0,0 +1,60 @@
+import pytest
+from fastapi.testclient import TestClient
+from jose import JWTError
+
+import modules.api.auth.keys as keys
+from modules.api.auth.keys import KeyRing, load_key_ring
+from modules.api.main import create_app
+
+
+@pytest.mark.parametrize("algorithm", ["RS256", "ES256"])
+def test_asymmetric_tokens_round_trip(tmp_path, algorithm):
+    ring = load_key_ring(algorithm, tmp_path)
+    token = ring.encode({"sub": "anon"})
+
+    assert ring.decode(token) == {"sub": "anon"}
+    # The generated key is persisted and reused by the next load.
+    assert load_key_ring(algorithm, tmp_path).decode(token) == {"sub": "anon"}
+
+    [public_key] = ring.jwks()["keys"]
+    assert public_key["kid"] == ring.active_kid
+    assert public_key["alg"] == algorithm
+    assert "d" not in public_key
+
+
+def test_rotation_keeps_verifying_old_tokens(tmp_path):
+    (tmp_path / "2025.pem").write_text(keys.generate_private_key("ES256"))
+    old_ring = load_key_ring("ES256", tmp_path)
+    old_token = old_ring.encode({"sub": "anon"})
+
+    (tmp_path / "2026.pem").write_text(keys.generate_private_key("ES256"))
+    ring = load_key_ring("ES256", tmp_path)
+
+    assert ring.active_kid == "2026"
+    assert ring.decode(old_token) == {"sub": "anon"}
+    assert [k["kid"] for k in ring.jwks()["keys"]] == ["2025", "2026"]
+    with pytest.raises(JWTError):
+        old_ring.decode(ring.encode({"sub": "anon"}))
+
+
+def test_symmetric_ring_publishes_no_keys():
+    ring = KeyRing("HS256", {"default": "secret"})
+    assert ring.decode(ring.encode({"sub": "anon"})) == {"sub": "anon"}
+    assert ring.jwks() == {"keys": []}
+
+
+def test_unsupported_algorithm():
+    with pytest.raises(ValueError):
+        KeyRing("none", {"default": "secret"})
+
+
+def test_jwks_endpoint(tmp_path, monkeypatch):
+    ring = load_key_ring("RS256", tmp_path)
+    monkeypatch.setattr(keys, "_key_ring", ring)
+
+    with TestClient(create_app()) as client:
+        response = client.get("/.well-known/jwks.json")
+
+    assert response.status_code == 200
+    assert response.json() == ring.jwks()
+    assert "max-age" in response.headers["Cache-Control"]
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event
+
+from modules.api.auth.functions import authenticate_user
+from modules.api.auth.security import anonymize, hash_password
+from modules.api.users.known_emails import BloomFilter, KnownEmails, known_emails
+from modules.api.users.models import Role, User
+from modules.database.session import create_async_session
+
+
+@pytest.fixture
+def session_factory(sqlite_session_factory):
+    with sqlite_session_factory() as db:
+        db.add(Role(id=1, role="reader"))
+        db.add(
+            User(
+                email=anonymize("known@example.com"),
+                name="Known",
+                hashed_password=hash_password("password"),
+                role_id=1,
+            )
+        )
+        db.commit()
+    return sqlite_session_factory
+
+
+@pytest.fixture
+def statements(session_factory):
+    executed = []
+    engine = session_factory.kw["bind"]
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def test_filter_is_off_by_default(session_factory):
+    cache = KnownEmails()
+    with session_factory() as db:
+        cache.load(db)
+        assert cache.might_exist(db, anonymize("unknown@example.com"))
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, error_rate=0.01)
+    emails = [anonymize(f"user{i}@example.com") for i in range(1000)]
+    for email in emails:
+        bloom.add(email)
+
+    assert all(email in bloom for email in emails)
+    false_positives = sum(anonymize(f"other{i}@example.com") in bloom for i in range(10000))
+    assert false_positives < 300
+    assert not bloom.full
+
+
+def test_unknown_emails_are_rejected_without_a_query(session_factory, statements):
+    cache = KnownEmails(enabled=True, refresh_interval=60)
+    with session_factory() as db:
+        assert cache.might_exist(db, anonymize("unknown@example.com"))  # Not loaded.
+        cache.load(db)
+        statements.clear()
+
+        assert cache.might_exist(db, anonymize("known@example.com"))
+        assert not cache.might_exist(db, anonymize("unknown@example.com"))
+        cache.update(db, [anonymize("created@example.com")])
+        assert cache.might_exist(db, anonymize("created@example.com"))
+    assert statements == []
+
+
+def test_async_sessions_share_the_filter_loaded_at_startup(session_factory):
+    cache = KnownEmails(enabled=True, refresh_interval=60)
+    with session_factory() as db:
+        cache.load(db)
+    engine, AsyncSessionLocal = create_async_session(str(session_factory.kw["bind"].url))
+
+    async def lookup():
+        async with AsyncSessionLocal() as db:
+            try:
+                return await cache.might_exist_async(db, anonymize("unknown@example.com"))
+            finally:
+                await engine.dispose()
+
+    assert not asyncio.run(lookup())
+
+
+def test_stale_filter_is_reloaded_on_a_miss(session_factory):
+    cache = KnownEmails(enabled=True, refresh_interval=0)
+    with session_factory() as db:
+        cache.load(db)
+        # Created by another worker, the filter has not seen it.
+        db.add(User(email=anonymize("new@example.com"), name="New", hashed_password="x", role_id=1))
+        db.commit()
+
+        assert cache.might_exist(db, anonymize("new@example.com"))
+
+
+def test_authenticate_user_skips_the_lookup_of_unknown_emails(
+    session_factory, statements, monkeypatch
+):
+    with session_factory() as db:
+        monkeypatch.setattr(known_emails, "enabled", True)
+        monkeypatch.setattr(known_emails, "refresh_interval", 60)
+        known_emails.load(db)
+        statements.clear()
+        try:
+            assert not authenticate_user(db, "unknown@example.com", "password")
+            assert statements == []
+            assert authenticate_user(db, "known@example.com", "password")
+        finally:
+            known_emails.clear()
@@ -0,0 +1,133 @@
+import json
+import threading
+import time
+import pytest
+from loguru import logger
+
+import utils.logger_config as logger_config
+from utils.logger_config import (
+    WRITER_KEY,
+    BackgroundSink,
+    LogSampler,
+    configure_logger,
+    json_format,
+    log_event,
+    parse_sample_rates,
+)
+
+
+def test_configure_logger_is_idempotent():
+    configure_logger()
+    handlers = dict(logger._core.handlers)
+    assert configure_logger() is logger
+    assert logger._core.handlers == handlers
+
+
+@pytest.fixture
+def stalled_writer():
+    gate, written = threading.Event(), []
+
+    def file_sink(message):
+        gate.wait(5)
+        written.append(str(message))
+
+    handler_id = logger.add(
+        file_sink, level=0, format="{message}",
+        filter=lambda record: record["extra"].get(WRITER_KEY) == "test",
+    )
+    yield gate, written
+    gate.set()
+    logger.remove(handler_id)
+
+
+def wait_until_taken(sink):
+    while not sink.queue.empty():
+        time.sleep(0.001)
+
+
+def test_full_queue_drops_messages(stalled_writer):
+    gate, written = stalled_writer
+    sink = BackgroundSink("test", maxsize=1, policy="drop")
+
+    sink("first\n")
+    wait_until_taken(sink)
+    sink("second\n")
+    sink("third\n")
+    gate.set()
+    sink.flush()
+    sink.stop()
+
+    assert written == ["first\n", "1 log messages dropped, queue full.\n", "second\n"]
+
+
+def test_full_queue_blocks_the_caller(stalled_writer):
+    gate, written = stalled_writer
+    sink = BackgroundSink("test", maxsize=1, policy="block")
+    sink("first\n")
+    wait_until_taken(sink)
+    sink("second\n")
+
+    caller = threading.Thread(target=sink, args=("third\n",))
+    caller.start()
+    caller.join(0.05)
+    assert caller.is_alive()
+
+    gate.set()
+    caller.join()
+    sink.flush()
+    sink.stop()
+    assert written == ["first\n", "second\n", "third\n"]
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        BackgroundSink("test", policy="ignore")
+
+
+def test_sampler_keeps_one_event_out_of_n():
+    sampler = LogSampler(parse_sample_rates("tokens.issued=0.25, auth.succeeded=0"))
+
+    kept = [sampler.sample("tokens.issued") for _ in range(8)]
+    assert kept == [True, False, False, False] * 2
+    assert not any(sampler.sample("auth.succeeded") for _ in range(8))
+    assert all(sampler.sample("auth.invalid_password") for _ in range(8))
+
+
+@pytest.mark.parametrize("rate", [0.1, 0.6, 0.9, 1 / 3])
+def test_sampler_honors_fractional_rates(rate):
+    sampler = LogSampler({"tokens.issued": rate})
+
+    kept = sum(sampler.sample("tokens.issued") for _ in range(1000))
+    assert abs(kept - rate * 1000) <= 1
+
+
+@pytest.mark.parametrize("value", ["auth.succeeded=2", "auth.succeeded=-0.5", "a=0.5,b=1.5"])
+def test_sample_rates_outside_zero_one_are_rejected(value):
+    with pytest.raises(ValueError, match="between 0 and 1"):
+        parse_sample_rates(value)
+
+
+def test_log_event_writes_sampled_json(monkeypatch):
+    monkeypatch.setattr(
+        logger_config, "log_sampler", LogSampler({"tokens.issued": 0.5})
+    )
+    lines = []
+    handler_id = logger.add(lines.append, format=json_format, level="INFO")
+    try:
+        for app in ("a", "b", "c"):
+            log_event("tokens.issued", "Tokens issued for {app}", app=app)
+        log_event("auth.user_not_found", "User not found.", "WARNING")
+    finally:
+        logger.remove(handler_id)
+
+    entries = [json.loads(line) for line in lines]
+    assert [entry["message"] for entry in entries] == [
+        "Tokens issued for a",
+        "Tokens issued for c",
+        "User not found.",
+    ]
+    assert entries[0]["event"] == "tokens.issued"
+    assert entries[0]["sample_rate"] == 0.5
+    assert entries[0]["logger"] == __name__
+    assert entries[2]["level"] == "WARNING"
+    assert "sample_rate" not in entries[2]
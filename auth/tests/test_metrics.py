@@ -0,0 +1,98 @@
+import threading
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from modules.api.auth.compaction import CompactionStats
+from modules.api.auth.password_pool import (
+    PasswordHashingBusy,
+    PasswordHashingPool,
+    password_pool,
+)
+from modules.api.main import create_app
+from utils.metrics import (
+    instrument_engine,
+    instrument_password_pool,
+    metrics_response,
+    registry,
+)
+
+
+def sample(name, **labels):
+    return registry.get_sample_value(name, labels) or 0
+
+
+def test_requests_are_counted_by_route_template():
+    client = TestClient(create_app())
+    before = sample(
+        "http_requests_total", method="GET", route="/.well-known/jwks.json", status="200"
+    )
+
+    client.get("/.well-known/jwks.json")
+    client.get("/no/such/path")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "http_request_duration_seconds_bucket" in response.text
+    assert sample(
+        "http_requests_total", method="GET", route="/.well-known/jwks.json", status="200"
+    ) == before + 1
+    assert sample("http_requests_total", method="GET", route="unmatched", status="404") >= 1
+    # The /metrics request itself.
+    assert "http_requests_in_progress 1.0" in response.text
+
+
+def test_database_statements_are_timed(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'metrics.db'}")
+    instrument_engine(engine, "metrics-test")
+    instrument_engine(engine, "metrics-test")
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        connection.execute(text("select 2"))
+
+    labels = {"database": "metrics-test", "operation": "SELECT"}
+    assert sample("db_query_duration_seconds_count", **labels) == 2
+    assert b'db_pool_checked_out_connections{database="metrics-test"} 0.0' in metrics_response()[0]
+
+
+def test_password_pool_load_is_exported():
+    pool = PasswordHashingPool(workers=1, max_queue=1)
+    instrument_password_pool(pool)
+    rejected_before = sample("password_hash_rejected_total")
+    release = threading.Event()
+    try:
+        jobs = [pool.submit(release.wait), pool.submit(release.wait)]
+        with pytest.raises(PasswordHashingBusy):
+            pool.submit(release.wait)
+
+        assert sample("password_hash_jobs_in_flight") == 1
+        assert sample("password_hash_queue_depth") == 1
+        assert sample("password_hash_rejected_total") == rejected_before + 1
+        release.set()
+        for job in jobs:
+            job.result()
+    finally:
+        release.set()
+        pool.shutdown()
+        instrument_password_pool(password_pool)
+
+
+def test_compactions_are_exported():
+    rows_before = sample("refresh_token_compaction_rows_total")
+    batches_before = sample("refresh_token_compaction_duration_seconds_count", scope="batch")
+    runs_before = sample("refresh_token_compaction_duration_seconds_count", scope="run")
+
+    stats = CompactionStats()
+    stats.record_batch(100, 0.01)
+    stats.record_batch(20, 0.002)
+    stats.record_run(120, 0.015)
+
+    assert sample("refresh_token_compaction_rows_total") == rows_before + 120
+    assert sample(
+        "refresh_token_compaction_duration_seconds_count", scope="batch"
+    ) == batches_before + 2
+    assert sample(
+        "refresh_token_compaction_duration_seconds_count", scope="run"
+    ) == runs_before + 1
@@ -0,0 +1,69 @@
+import threading
+import pytest
+from fastapi.testclient import TestClient
+
+from modules.api.auth.password_pool import PasswordHashingPool, PasswordHashingBusy
+from modules.api.main import create_app
+
+
+def test_run_returns_result_and_updates_stats():
+    pool = PasswordHashingPool(workers=2, max_queue=0)
+    assert pool.run(pow, 2, 10) == 1024
+
+    stats = pool.stats.snapshot()
+    assert stats["completed"] == 1
+    assert stats["queue_depth"] == 0
+    pool.shutdown()
+
+
+def test_submit_rejects_when_saturated():
+    pool = PasswordHashingPool(workers=1, max_queue=1)
+    release = threading.Event()
+
+    first = pool.submit(release.wait)
+    second = pool.submit(release.wait)
+    assert pool.stats.queue_depth == 1
+
+    with pytest.raises(PasswordHashingBusy):
+        pool.submit(release.wait)
+    assert pool.stats.snapshot()["rejected"] == 1
+
+    release.set()
+    first.result()
+    second.result()
+    pool.shutdown()
+
+
+def test_run_propagates_exceptions():
+    pool = PasswordHashingPool(workers=1, max_queue=0)
+    with pytest.raises(ValueError):
+        pool.run(int, "not-a-number")
+    # The slot is released even when the job fails.
+    assert pool.run(int, "3") == 3
+    pool.shutdown()
+
+
+def test_unknown_executor_kind():
+    with pytest.raises(ValueError):
+        PasswordHashingPool(kind="fiber")
+
+
+def test_busy_pool_returns_429():
+    app = create_app()
+
+    @app.get("/busy")
+    def busy():
+        raise PasswordHashingBusy()
+
+    with TestClient(app) as client:
+        response = client.get("/busy")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_map_keeps_order_and_waits_for_slots():
+    pool = PasswordHashingPool(workers=2, max_queue=0)
+    # More items than slots: map waits instead of raising PasswordHashingBusy.
+    assert pool.map(abs, range(-10, 0)) == list(range(10, 0, -1))
+    assert pool.stats.snapshot()["completed"] == 10
+    pool.shutdown()
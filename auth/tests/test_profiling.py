@@ -0,0 +1,58 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from utils.profiling import ProfilingMiddleware, capture_statements, profile_sync_endpoint
+
+
+def slow_function():
+    return sum(range(10000))
+
+
+def make_client(tmp_path, sample_rate=0.0):
+    engine = create_engine(f"sqlite:///{tmp_path / 'profiling.db'}")
+    capture_statements(engine)
+
+    def sync_endpoint():
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 42"))
+        return {"total": slow_function()}
+
+    app = FastAPI()
+    app.add_api_route("/sync", profile_sync_endpoint(sync_endpoint))
+    app.add_middleware(
+        ProfilingMiddleware,
+        is_admin=lambda token: token == "admin-token",
+        sample_rate=sample_rate,
+        reports_dir=tmp_path / "profiles",
+        max_reports=2,
+    )
+    return TestClient(app)
+
+
+def test_profiles_only_admin_requests(tmp_path):
+    client = make_client(tmp_path)
+    reader = {"X-Profile": "1", "Authorization": "Bearer reader-token"}
+
+    assert "x-profile-report" not in client.get("/sync").headers
+    assert "x-profile-report" not in client.get("/sync", headers=reader).headers
+    assert not (tmp_path / "profiles").exists()
+
+    response = client.get(
+        "/sync", headers={"X-Profile": "1", "Authorization": "Bearer admin-token"}
+    )
+    assert response.json() == {"total": slow_function()}
+    report = (tmp_path / "profiles" / response.headers["x-profile-report"]).read_text()
+    assert report.startswith("GET /sync -> 200 in")
+    assert "SQL statements: 1," in report and "SELECT 42" in report
+    # Sync endpoints run in the threadpool, profiled by their own profiler.
+    assert "slow_function" in report
+
+
+def test_sampled_requests_are_saved_and_rotated(tmp_path):
+    client = make_client(tmp_path, sample_rate=1.0)
+
+    for _ in range(3):
+        assert "x-profile-report" not in client.get("/sync").headers
+
+    assert len(list((tmp_path / "profiles").glob("*.txt"))) == 2
@@ -0,0 +1,88 @@
+import pytest
+
+from modules.api.auth.rate_limit import (
+    LoginRateLimited,
+    LoginRateLimiter,
+    MemoryStorage,
+    SlidingWindow,
+    SQLiteStorage,
+    create_storage,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def storage(request, tmp_path):
+    if request.param == "memory":
+        return MemoryStorage()
+    return SQLiteStorage(str(tmp_path / "rate_limits.db"))
+
+
+def test_sliding_window_weights_the_previous_window(storage):
+    limit = SlidingWindow(storage, limit=4, window=64)
+    for _ in range(6):
+        limit.hit("key", now=96)
+
+    assert limit.retry_after("key", now=96) == 54
+    # Next window, the 6 hits weigh 4.5 after 16 s, 3.75 after 24 s.
+    assert limit.retry_after("key", now=128) == 22
+    assert limit.retry_after("key", now=144) == 6
+    assert limit.retry_after("key", now=152) == 0
+    limit.hit("key", now=152)
+    assert limit.retry_after("key", now=152) == 8
+    assert limit.retry_after("key", now=192) == 0
+
+    limit.reset("key", now=152)
+    assert limit.retry_after("key", now=152) == 0
+
+
+def test_disabled_limit_never_counts(storage):
+    limit = SlidingWindow(storage, limit=0, window=60)
+    for _ in range(100):
+        limit.hit("key", now=0)
+
+    assert limit.retry_after("key", now=0) == 0
+    assert storage.counts("key", 0) == (0, 0)
+
+
+def test_memory_storage_stays_bounded():
+    storage = MemoryStorage(max_keys=3)
+    storage.increment("old", 0, 120)
+    for key in ("a", "b", "c", "d"):
+        storage.increment(key, 10, 120)
+
+    assert storage.counts("old", 10) == (0, 0)
+    assert storage.counts("a", 10) == (0, 0)
+    assert storage.counts("d", 10) == (0, 1)
+
+
+def test_login_limiter_throttles_failures_per_email():
+    limiter = LoginRateLimiter(MemoryStorage(), ip_limit=0, email_limit=2)
+    for _ in range(2):
+        limiter.check("email", "10.0.0.1")
+        limiter.failed("email")
+
+    with pytest.raises(LoginRateLimited) as exc_info:
+        limiter.check("email", "10.0.0.2")
+    assert exc_info.value.retry_after > 0
+    limiter.check("other-email", "10.0.0.1")
+
+    limiter.succeeded("email")
+    limiter.check("email", "10.0.0.1")
+
+
+def test_login_limiter_throttles_attempts_per_ip():
+    limiter = LoginRateLimiter(MemoryStorage(), ip_limit=2, email_limit=0)
+    limiter.check("a", "10.0.0.1")
+    limiter.check("b", "10.0.0.1")
+
+    with pytest.raises(LoginRateLimited):
+        limiter.check("c", "10.0.0.1")
+    limiter.check("c", "10.0.0.2")
+    limiter.check("c", None)
+
+
+def test_create_storage():
+    assert isinstance(create_storage(""), MemoryStorage)
+    assert isinstance(create_storage("sqlite:///:memory:"), SQLiteStorage)
+    with pytest.raises(ValueError):
+        create_storage("memcached://localhost")
@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy import event
+
+from modules.api.users.models import Role
+from modules.api.users.role_registry import RoleRegistry, load_roles_at_startup
+from modules.database.session import create_session, UsersBase
+
+
+@pytest.fixture
+def session_factory(sqlite_session_factory):
+    SessionLocal = sqlite_session_factory
+    with SessionLocal() as db:
+        db.add_all([Role(id=1, role="admin"), Role(id=2, role="reader")])
+        db.commit()
+
+    statements = []
+    event.listen(
+        SessionLocal.kw["bind"],
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    SessionLocal.statements = statements
+    return SessionLocal
+
+
+def test_roles_are_read_once(session_factory):
+    registry = RoleRegistry()
+    with session_factory() as db:
+        assert registry.get_id(db, "reader") == 2
+        assert registry.get_id(db, "admin") == 1
+        assert registry.get_id(db, "reader") == 2
+    assert len(session_factory.statements) == 1
+
+
+def test_unknown_role_reloads_the_registry(session_factory):
+    registry = RoleRegistry()
+    with session_factory() as db:
+        assert registry.get_id(db, "editor") is None
+        db.add(Role(id=3, role="editor"))
+        db.commit()
+        assert registry.get_id(db, "editor") == 3
+
+
+def test_registry_is_kept_per_database(session_factory, tmp_path):
+    registry = RoleRegistry()
+    other_engine, OtherSession = create_session(f"sqlite:///{tmp_path / 'other.db'}")
+    UsersBase.metadata.create_all(bind=other_engine)
+    with OtherSession() as db:
+        db.add(Role(id=7, role="reader"))
+        db.commit()
+
+    with session_factory() as db, OtherSession() as other_db:
+        assert registry.get_id(db, "reader") == 2
+        assert registry.get_id(other_db, "reader") == 7
+    other_engine.dispose()
+
+
+def test_startup_skips_missing_sqlite_database(tmp_path):
+    path = tmp_path / "missing.db"
+    engine, SessionLocal = create_session(f"sqlite:///{path}")
+
+    load_roles_at_startup(SessionLocal)
+
+    assert not path.exists()
+    engine.dispose()
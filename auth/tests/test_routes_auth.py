@@ -1,16 +1,21 @@
+import json
 import os
 import sys
 import pytest
+from contextlib import contextmanager
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from modules.api.main import app
+from modules.api.main import FRONTEND_URL, app
+from modules.api.pagination import DEFAULT_PAGE_SIZE
 from modules.database.session import UsersBase
 from modules.database.dependencies import get_users_db
 from modules.api.users.models import User, Role
+from modules.api.users.role_registry import role_registry
+from modules.api.auth.rate_limit import LoginRateLimiter, MemoryStorage, get_login_rate_limiter
 from modules.api.auth.security import hash_password, anonymize
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -31,6 +36,7 @@ def test_routes_presence(client):
 def db():
     UsersBase.metadata.drop_all(bind=engine)
     UsersBase.metadata.create_all(bind=engine)
+    role_registry.clear()
     session = TestingSessionLocal()
     try:
         yield session
@@ -43,7 +49,9 @@ def client(db):
     def override_get_users_db():
         yield db
 
+    rate_limiter = LoginRateLimiter(MemoryStorage())
     app.dependency_overrides[get_users_db] = override_get_users_db
+    app.dependency_overrides[get_login_rate_limiter] = lambda: rate_limiter
 
     with TestClient(app) as c:
         yield c
@@ -120,6 +128,26 @@ def test_login_invalid_password(client, create_test_user):
     assert "detail" in response.json()
 
 
+def test_login_throttled_after_repeated_failures(client, create_test_user, monkeypatch):
+    for _ in range(5):
+        response = client.post(
+            "/auth/login",
+            data={"username": "test@example.com", "password": "wrongpassword"},
+        )
+        assert response.status_code == 401
+
+    def fail_if_called(*args):
+        raise AssertionError("password checked despite the rate limit")
+
+    monkeypatch.setattr("modules.api.auth.functions.verify_password", fail_if_called)
+    response = client.post(
+        "/auth/login",
+        data={"username": "test@example.com", "password": "password123"},
+    )
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) > 0
+
+
 def test_refresh_token_success(client, create_test_user):
     _, refresh_token = login(client, "test@example.com", "password123")
     response = client.post(
@@ -130,6 +158,27 @@ def test_refresh_token_success(client, create_test_user):
     assert "access_token" in response.json()
 
 
+def test_refreshed_access_token_is_usable(client, create_test_user):
+    _, refresh_token = login(client, "test@example.com", "password123")
+    response = client.post(
+        "/auth/refresh",
+        headers={"Authorization": f"Bearer {refresh_token}"},
+    )
+    access_token = response.json()["access_token"]
+    response = client.get(
+        "/users/users/me",
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+    assert response.status_code == 200
+
+
+def test_refresh_token_cannot_be_reused(client, create_test_user):
+    _, refresh_token = login(client, "test@example.com", "password123")
+    headers = {"Authorization": f"Bearer {refresh_token}"}
+    assert client.post("/auth/refresh", headers=headers).status_code == 200
+    assert client.post("/auth/refresh", headers=headers).status_code == 401
+
+
 def test_refresh_tokens_requires_admin(client, create_admin_user):
     access_token, _ = login(client, "admin@example.com", "adminpass")
     response = client.get(
@@ -163,6 +212,40 @@ def test_get_current_user(client, create_test_user):
     assert data["name"] == "Test User"
 
 
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_single_user_endpoints_issue_one_statement(
+    client, db, create_admin_user, create_test_user
+):
+    access_token, _ = login(client, "admin@example.com", "adminpass")
+    headers = {"Authorization": f"Bearer {access_token}"}
+    urls = ["/users/users/me", f"/users/users/{create_test_user.id}"]
+
+    for url in urls:
+        # Warm the token cache, then measure with an empty identity map.
+        client.get(url, headers=headers)
+        db.expunge_all()
+
+        with count_queries() as statements:
+            response = client.get(url, headers=headers)
+
+        assert response.status_code == 200
+        assert response.json()["role"] in ("admin", "user")
+        assert len(statements) == 1, statements
+
+
 def test_user_cannot_list_all_users(client, create_test_user):
     access_token, _ = login(client, "test@example.com", "password123")
     response = client.get(
@@ -184,6 +267,102 @@ def test_admin_can_list_all_users(client, create_admin_user, create_test_user):
     assert any(u["email"] == anonymize("admin@example.com") for u in users)
 
 
+def test_admin_can_paginate_users(client, create_admin_user, create_test_user):
+    access_token, _ = login(client, "admin@example.com", "adminpass")
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    first = client.get("/users/users?limit=1", headers=headers)
+    assert first.status_code == 200
+    assert len(first.json()) == 1
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = client.get(f"/users/users?limit=1&after={cursor}", headers=headers)
+    assert len(second.json()) == 1
+    assert second.json()[0]["id"] > first.json()[0]["id"]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_users_are_paginated_by_default(client, db, create_admin_user, create_roles):
+    role_user, _ = create_roles
+    db.add_all(
+        User(email=anonymize(f"user{i}@example.com"), name="User", role_id=role_user.id)
+        for i in range(DEFAULT_PAGE_SIZE)
+    )
+    db.commit()
+    access_token, _ = login(client, "admin@example.com", "adminpass")
+    headers = {"Authorization": f"Bearer {access_token}", "Origin": FRONTEND_URL}
+
+    first = client.get("/users/users", headers=headers)
+    assert len(first.json()) == DEFAULT_PAGE_SIZE
+    # Readable by the frontend.
+    assert "x-next-cursor" in first.headers["Access-Control-Expose-Headers"].lower()
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get(f"/users/users?after={cursor}", headers=headers)
+    assert len(second.json()) == 1
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_admin_can_export_users_as_ndjson(client, create_admin_user, create_test_user):
+    access_token, _ = login(client, "admin@example.com", "adminpass")
+    response = client.get(
+        "/users/users?format=ndjson",
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert {u["email"] for u in lines} == {
+        anonymize("admin@example.com"),
+        anonymize("test@example.com"),
+    }
+    assert {u["role"] for u in lines} == {"admin", "user"}
+
+
+def test_admin_can_import_users(client, create_admin_user, create_test_user):
+    access_token, _ = login(client, "admin@example.com", "adminpass")
+    content = (
+        "email,name,password,role\n"
+        "new@example.com,New User,newpass,user\n"
+        "test@example.com,Test User,password123,user\n"
+    )
+
+    response = client.post(
+        "/users/users/import",
+        files={"file": ("users.csv", content, "text/csv")},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "created": 1,
+        "errors": [{"line": 3, "error": "A user with this email already exists."}],
+    }
+    assert login(client, "new@example.com", "newpass")[0]
+
+
+def test_user_cannot_import_users(client, create_test_user):
+    access_token, _ = login(client, "test@example.com", "password123")
+    response = client.post(
+        "/users/users/import",
+        files={"file": ("users.csv", "email,name,password\n", "text/csv")},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+    assert response.status_code == 403
+
+
+def test_refresh_tokens_pagination_and_export(client, create_admin_user):
+    login(client, "admin@example.com", "adminpass")
+    access_token, _ = login(client, "admin@example.com", "adminpass")
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    page = client.get("/auth/refresh-tokens?limit=1", headers=headers)
+    assert len(page.json()) == 1
+    assert "X-Next-Cursor" in page.headers
+
+    export = client.get("/auth/refresh-tokens?format=ndjson", headers=headers)
+    assert len(export.text.splitlines()) == 2
+
+
 def test_get_user_by_id_admin(client, create_admin_user, create_test_user):
     access_token, _ = login(client, "admin@example.com", "adminpass")
     user_id = create_test_user.id
@@ -254,6 +433,20 @@ def test_admin_can_delete_user(client, create_admin_user, create_test_user):
     assert response.status_code == 200
 
 
+def test_deleted_user_token_is_rejected(client, create_admin_user, create_test_user):
+    user_token, _ = login(client, "test@example.com", "password123")
+    headers = {"Authorization": f"Bearer {user_token}"}
+    assert client.get("/users/users/me", headers=headers).status_code == 200
+
+    admin_token, _ = login(client, "admin@example.com", "adminpass")
+    client.delete(
+        f"/users/users/{create_test_user.id}",
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+
+    assert client.get("/users/users/me", headers=headers).status_code == 401
+
+
 def test_user_cannot_delete_user(client, create_test_user):
     access_token, _ = login(client, "test@example.com", "password123")
     response = client.delete(
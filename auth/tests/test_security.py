@@ -1,12 +1,17 @@
 import re
 import hashlib
+import bcrypt
 import pytest
+from fastapi.testclient import TestClient
+from modules.api.auth import hashers, security
 from modules.api.auth.security import (
     anonymize,
     hash_token,
     hash_password,
+    needs_rehash,
     verify_password,
 )
+from modules.api.main import create_app
 
 
 def test_anonymize():
@@ -42,3 +47,28 @@ def test_hash_password_and_verify():
 def test_verify_password_with_invalid_hash():
     with pytest.raises(ValueError):
         verify_password("password", "not_a_valid_bcrypt_hash")
+
+
+def test_hashes_with_a_lower_work_factor_need_a_rehash(monkeypatch):
+    monkeypatch.setitem(hashers._hashers, "bcrypt", hashers.BcryptHasher(rounds=5))
+
+    assert needs_rehash(bcrypt.hashpw(b"pw", bcrypt.gensalt(4)).decode())
+    assert not needs_rehash(bcrypt.hashpw(b"pw", bcrypt.gensalt(5)).decode())
+    assert not needs_rehash(bcrypt.hashpw(b"pw", bcrypt.gensalt(6)).decode())
+    assert not needs_rehash("not_a_valid_bcrypt_hash")
+    assert hash_password("pw").startswith("$2b$05$")
+
+
+def test_hashes_of_another_algorithm_verify_and_need_a_rehash():
+    hashed = hashers.ScryptHasher(log_n=4).hash("pw")
+
+    assert verify_password("pw", hashed)
+    assert not verify_password("other", hashed)
+    assert needs_rehash(hashed)
+
+
+def test_dummy_hash_is_computed_at_startup(monkeypatch):
+    monkeypatch.setattr(security, "_dummy_hash", None)
+    with TestClient(create_app()):
+        assert security._dummy_hash is not None
+        assert verify_password("password", security._dummy_hash) is False
@@ -0,0 +1,82 @@
+import time
+import pytest
+from unittest.mock import patch, MagicMock
+from fastapi.security import SecurityScopes
+
+from modules.api.users.functions import get_current_user
+from modules.api.users.schemas import TokenData
+from modules.api.users.token_cache import TokenCache, token_cache
+
+
+def make_token_data(sub="anon@email.com", ttl=60):
+    return TokenData(
+        sub=sub, exp=int(time.time()) + ttl, role="reader", scopes=["reader"]
+    )
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+def test_cache_returns_stored_token_data():
+    cache = TokenCache(max_size=10)
+    data = make_token_data()
+    cache.set("token", data)
+    assert cache.get("token") == data
+    assert cache.get("other-token") is None
+
+
+def test_cache_ignores_expired_tokens():
+    cache = TokenCache(max_size=10)
+    cache.set("expired", make_token_data(ttl=-1))
+    assert cache.get("expired") is None
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TokenCache(max_size=2)
+    cache.set("a", make_token_data("a"))
+    cache.set("b", make_token_data("b"))
+    cache.get("a")
+    cache.set("c", make_token_data("c"))
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+
+def test_invalidate_subject_drops_all_tokens_of_user():
+    cache = TokenCache(max_size=10)
+    cache.set("t1", make_token_data("alice"))
+    cache.set("t2", make_token_data("alice"))
+    cache.set("t3", make_token_data("bob"))
+
+    cache.invalidate_subject("alice")
+
+    assert cache.get("t1") is None
+    assert cache.get("t2") is None
+    assert cache.get("t3") is not None
+
+
+def test_disabled_cache_stores_nothing():
+    cache = TokenCache(max_size=0)
+    cache.set("token", make_token_data())
+    assert cache.get("token") is None
+
+
+@patch("modules.api.users.functions.decode_token")
+@patch("modules.api.users.functions.get_user_by_email")
+def test_get_current_user_uses_cache_on_second_call(mock_get_user, mock_decode):
+    mock_decode.return_value = make_token_data().model_dump()
+    mock_get_user.return_value = MagicMock()
+    scopes = SecurityScopes(scopes=["reader"])
+
+    first = get_current_user(security_scopes=scopes, token="tok", db=MagicMock())
+    second = get_current_user(security_scopes=scopes, token="tok", db=MagicMock())
+
+    assert first == second
+    mock_decode.assert_called_once()
+    mock_get_user.assert_called_once()
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from jose import ExpiredSignatureError, JWTError
+from jose import jwt as jose_jwt
+
+from modules.api.auth.codecs import CODECS, get_codec
+from modules.api.auth.keys import KeyRing, generate_private_key
+
+SECRET = "codec-test-secret-key-of-32-bytes"
+CLAIMS = {
+    "sub": "anon",
+    "role": "reader",
+    "type": "access",
+    "scopes": ["reader"],
+    "app": "default",
+}
+
+
+def claims(ttl=60):
+    return {**CLAIMS, "exp": datetime.now(timezone.utc) + timedelta(seconds=ttl)}
+
+
+def ring(algorithm, codec, material):
+    keys = {"k1": material if algorithm == "HS256" else material[algorithm]}
+    return KeyRing(algorithm, keys, codec=codec)
+
+
+@pytest.fixture(scope="module")
+def private_keys():
+    return {algorithm: generate_private_key(algorithm) for algorithm in ("RS256", "ES256")}
+
+
+def codec_names(algorithm):
+    return [name for name, codec in CODECS.items() if algorithm in codec.algorithms]
+
+
+def codec_pairs(algorithm):
+    names = codec_names(algorithm)
+    return [(algorithm, a, b) for a in names for b in names]
+
+
+@pytest.mark.parametrize(
+    "algorithm,encoder,decoder",
+    codec_pairs("HS256") + codec_pairs("RS256") + codec_pairs("ES256"),
+)
+def test_codecs_are_interchangeable(algorithm, encoder, decoder, private_keys):
+    material = SECRET if algorithm == "HS256" else private_keys
+    token = ring(algorithm, encoder, material).encode(claims())
+
+    decoded = ring(algorithm, decoder, material).decode(token)
+
+    assert {k: v for k, v in decoded.items() if k != "exp"} == CLAIMS
+
+
+def test_hmac_codec_matches_jose_byte_for_byte():
+    payload = claims()
+    token = ring("HS256", "hmac", SECRET).encode(payload)
+    assert token == jose_jwt.encode(payload, SECRET, algorithm="HS256")
+
+
+@pytest.mark.parametrize("codec", ["jose", "pyjwt", "hmac"])
+def test_codecs_reject_invalid_tokens(codec):
+    key_ring = ring("HS256", codec, SECRET)
+    token = key_ring.encode(claims())
+    header, payload, signature = token.split(".")
+
+    with pytest.raises(ExpiredSignatureError):
+        key_ring.decode(key_ring.encode(claims(ttl=-10)))
+    with pytest.raises(JWTError):
+        key_ring.decode(f"{header}.{payload}.{signature[::-1]}")
+    with pytest.raises(JWTError):
+        key_ring.decode(ring("HS256", codec, "another-secret-key-of-32-bytes!!").encode(claims()))
+    with pytest.raises(JWTError):
+        key_ring.decode("not-a-token")
+    unsigned = jose_jwt.encode(claims(), "", algorithm="HS256").rsplit(".", 1)[0] + "."
+    with pytest.raises(JWTError):
+        key_ring.decode(unsigned)
+
+
+def test_unsupported_codec_algorithm():
+    with pytest.raises(ValueError):
+        get_codec("hmac", "RS256")
+    with pytest.raises(ValueError):
+        get_codec("fast", "HS256")
+
+
+@pytest.mark.parametrize(
+    "algorithm,codec",
+    [
+        (algorithm, name)
+        for algorithm in ("HS256", "RS256", "ES256")
+        for name in codec_names(algorithm)
+    ],
+)
+def test_codecs_round_trip_the_expiry(algorithm, codec, private_keys):
+    material = SECRET if algorithm == "HS256" else private_keys
+    key_ring = ring(algorithm, codec, material)
+    payload = claims(ttl=3600)
+    expires_at = int(payload["exp"].timestamp())
+
+    decoded = key_ring.decode(key_ring.encode(payload))
+
+    assert decoded["exp"] == expires_at
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from modules.api.auth.keys import KeyRing
+from modules.api.auth.tokens import TokenFactory
+
+
+def make_factory(**kwargs):
+    ring = KeyRing("HS256", {"default": "token-factory-secret-of-32-bytes"})
+    return TokenFactory(ring, **kwargs)
+
+
+def test_issue_pair_shares_one_timestamp():
+    factory = make_factory(
+        access_lifetime=timedelta(minutes=15), refresh_lifetime=timedelta(days=7)
+    )
+
+    access_token, refresh_token, refresh_expiry = factory.issue_pair(
+        "anon", "admin", "default"
+    )
+    access = factory.key_ring.decode(access_token)
+    refresh = factory.key_ring.decode(refresh_token)
+
+    assert access["type"] == access["token_type"] == "access"
+    assert access["scopes"] == ["admin"]
+    assert refresh["type"] == refresh["token_type"] == "refresh"
+    assert "scopes" not in refresh and "role" not in refresh
+    assert refresh["exp"] - access["exp"] == 7 * 86400 - 15 * 60
+    assert refresh_expiry.timestamp() == refresh["exp"]
+
+
+def test_refresh_tokens_are_unique_and_scopes_per_role():
+    factory = make_factory(role_scopes={"reader": ["reader", "export"]})
+
+    first = factory.refresh_token("anon", "default", now=1_000)[0]
+    second = factory.refresh_token("anon", "default", now=1_000)[0]
+    assert first != second
+
+    reader = factory.key_ring.decode(factory.access_token("anon", "reader", "default"))
+    unknown = factory.key_ring.decode(factory.access_token("anon", "guest", "default"))
+    assert reader["scopes"] == ["reader", "export"]
+    assert unknown["scopes"] == []
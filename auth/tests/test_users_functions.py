@@ -29,7 +29,7 @@ def test_get_user_by_email_not_found():
     assert user is None
 
 
-@patch("modules.api.users.functions.jwt.decode")
+@patch("modules.api.users.functions.decode_token")
 @patch("modules.api.users.functions.get_user_by_email")
 def test_get_current_user_success(mock_get_user, mock_decode):
     mock_decode.return_value = fake_token_data
@@ -42,7 +42,7 @@ def test_get_current_user_success(mock_get_user, mock_decode):
     assert "reader" in token_data.scopes
 
 
-@patch("modules.api.users.functions.jwt.decode", side_effect=JWTError)
+@patch("modules.api.users.functions.decode_token", side_effect=JWTError)
 def test_get_current_user_invalid_token(mock_decode):
     scopes = SecurityScopes(scopes=["reader"])
     with pytest.raises(HTTPException) as exc:
@@ -50,7 +50,7 @@ def test_get_current_user_invalid_token(mock_decode):
     assert exc.value.status_code == 401
 
 
-@patch("modules.api.users.functions.jwt.decode")
+@patch("modules.api.users.functions.decode_token")
 def test_get_current_user_invalid_payload(mock_decode):
     mock_decode.return_value = {"invalid": "payload"}
 
@@ -60,7 +60,7 @@ def test_get_current_user_invalid_payload(mock_decode):
     assert exc.value.status_code == 400
 
 
-@patch("modules.api.users.functions.jwt.decode", return_value=fake_token_data)
+@patch("modules.api.users.functions.decode_token", return_value=fake_token_data)
 @patch("modules.api.users.functions.get_user_by_email", return_value=None)
 def test_get_current_user_user_not_found(mock_get_user, mock_decode):
     scopes = SecurityScopes(scopes=["reader"])
@@ -69,7 +69,7 @@ def test_get_current_user_user_not_found(mock_get_user, mock_decode):
     assert exc.value.status_code == 401
 
 
-@patch("modules.api.users.functions.jwt.decode")
+@patch("modules.api.users.functions.decode_token")
 @patch("modules.api.users.functions.get_user_by_email", return_value=fake_user)
 def test_get_current_user_forbidden_scope(mock_get_user, mock_decode):
     mock_decode.return_value = {
@@ -1,50 +1,253 @@
 from loguru import logger
+import atexit
+import json
+import queue
 import sys
 import os
+import threading
+import traceback
 from pathlib import Path
+from dotenv import load_dotenv
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+load_dotenv()
 
-def configure_logger():
-    logger.remove()
 
-    log_dir = BASE_DIR / "logs"
-    os.makedirs(log_dir, exist_ok=True)
+def _level(name: str, default: str) -> str | None:
+    """Level of a sink read from ``name``, None when set to "OFF"."""
+    level = (os.getenv(name) or default).upper()
+    return None if level == "OFF" else level
 
-    log_format = (
-        "<cyan>{time:YYYY-MM-DD HH:mm:ss}</cyan> | "
-        "<blue>{name}</blue> | "
-        "<level>{level}</level> | "
-        "<magenta>{message}</magenta>"
-    )
 
-    logger.add(sys.stderr, level="DEBUG", format=log_format)
+# Minimum level of each sink; "OFF" removes the sink.
+LOG_STDERR_LEVEL = _level("LOG_STDERR_LEVEL", "DEBUG")
+LOG_APP_FILE_LEVEL = _level("LOG_APP_FILE_LEVEL", "INFO")
+LOG_ERROR_FILE_LEVEL = _level("LOG_ERROR_FILE_LEVEL", "ERROR")
+LOG_DEBUG_FILE_LEVEL = _level("LOG_DEBUG_FILE_LEVEL", "DEBUG")
+# Messages waiting for the file writer thread, 0 writes files synchronously.
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE") or 10000)
+# When the queue is full: "drop" the message or "block" the caller.
+LOG_QUEUE_POLICY = os.getenv("LOG_QUEUE_POLICY") or "drop"
+# One JSON object per line instead of the human readable format.
+LOG_JSON = (os.getenv("LOG_JSON") or "false").lower() == "true"
+# Share of the events logged through log_event that are kept, for instance
+# "auth.succeeded=0.01,tokens.issued=0.01". Unlisted events are all kept.
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES") or ""
 
-    logger.add(
-        f"{log_dir}/app.log",
-        rotation="1 week",
-        retention="1 month",
-        level="INFO",
-        format=log_format,
+LOG_FORMAT = (
+    "<cyan>{time:YYYY-MM-DD HH:mm:ss}</cyan> | "
+    "<blue>{name}</blue> | "
+    "<level>{level}</level> | "
+    "<magenta>{message}</magenta>"
+)
+
+# Extra key of the records the writer thread hands to the file sinks.
+WRITER_KEY = "log_writer"
+
+
+def json_format(record) -> str:
+    """Loguru format function rendering ``record`` and its extra fields as JSON."""
+    entry = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "logger": record["name"],
+        "message": record["message"],
+    }
+    entry.update(
+        (key, value) for key, value in record["extra"].items()
+        if key not in (WRITER_KEY, "json")
     )
+    if record["exception"] is not None:
+        entry["exception"] = "".join(traceback.format_exception(*record["exception"]))
+    record["extra"]["json"] = json.dumps(entry, default=str)
+    return "{extra[json]}\n"
 
-    logger.add(
-        f"{log_dir}/error.log",
-        level="ERROR",
-        filter=lambda record: record["level"].name == "ERROR",
-        rotation="500 KB",
-        retention="10 days",
-        format=log_format,
+
+def parse_sample_rates(value: str) -> dict[str, float]:
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        event, _, rate = item.partition("=")
+        event, rate = event.strip(), float(rate)
+        if not 0 <= rate <= 1:
+            raise ValueError(
+                f"LOG_SAMPLE_RATES: the rate of '{event}' must be between 0 and 1, not {rate}"
+            )
+        rates[event] = rate
+    return rates
+
+
+class LogSampler:
+    """
+    Decides which occurrences of an event are logged, a share ``rate`` of
+    them, counted per event: each occurrence adds ``rate`` to a credit and
+    is kept, using up 1, once the credit reaches 1. A rate of 0 mutes the
+    event.
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        self.rates = dict(rates)
+        # The first occurrence of every event is kept.
+        self._credits = dict.fromkeys(rates, 1.0)
+        self._lock = threading.Lock()
+
+    def sample(self, event: str) -> bool:
+        rate = self.rates.get(event, 1)
+        if rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        with self._lock:
+            credit = self._credits[event]
+            # Tolerates the rounding of repeated additions, e.g. of 0.1.
+            keep = credit >= 1 - 1e-9
+            self._credits[event] = credit - keep + rate
+        return keep
+
+
+log_sampler = LogSampler(parse_sample_rates(LOG_SAMPLE_RATES))
+
+
+def log_event(event: str, message: str, level: str = "INFO", **fields):
+    """
+    Log ``message`` as ``event`` when the sampler keeps it. The message is
+    only formatted, with ``fields``, once kept; the event name, the fields
+    and the sample rate are the extra keys of the record (JSON output).
+    """
+    if not log_sampler.sample(event):
+        return
+    rate = log_sampler.rates.get(event)
+    if rate is not None:
+        fields["sample_rate"] = rate
+    logger.opt(depth=1).log(level, message, event=event, **fields)
+
+
+class BackgroundSink:
+    """
+    Loguru sink putting formatted messages on a bounded queue. A writer thread
+    passes them on to the loguru file sink ``name``, so the logging thread
+    never waits for disk I/O (but still does when ``policy`` is "block" and
+    the queue is full).
+    """
+
+    def __init__(self, name: str, maxsize: int = LOG_QUEUE_SIZE, policy: str = LOG_QUEUE_POLICY):
+        if policy not in ("drop", "block"):
+            raise ValueError(f"Unknown log queue policy: '{policy}'")
+        self.name = name
+        self.block = policy == "block"
+        self.queue = queue.Queue(maxsize)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._writer = logger.bind(**{WRITER_KEY: name}).opt(raw=True)
+        self._thread = threading.Thread(
+            target=self._run, name=f"log-writer-{name}", daemon=True
+        )
+        self._thread.start()
+
+    def __call__(self, message):
+        try:
+            self.queue.put(str(message), block=self.block)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+    def _run(self):
+        while True:
+            message = self.queue.get()
+            try:
+                if message is None:
+                    return
+                with self._dropped_lock:
+                    dropped, self.dropped = self.dropped, 0
+                if dropped:
+                    self._writer.log(
+                        "WARNING", f"{dropped} log messages dropped, queue full.\n"
+                    )
+                self._writer.log("TRACE", message)
+            finally:
+                self.queue.task_done()
+
+    def flush(self):
+        """Wait until every queued message is written."""
+        self.queue.join()
+
+    def stop(self):
+        self.queue.put(None)
+        self._thread.join(timeout=5)
+
+
+def _format():
+    return json_format if LOG_JSON else LOG_FORMAT
+
+
+def _only_level(name: str):
+    return lambda record: (
+        WRITER_KEY not in record["extra"] and record["level"].name == name
     )
 
+
+def _not_written(record) -> bool:
+    return WRITER_KEY not in record["extra"]
+
+
+_configured = False
+_configure_lock = threading.Lock()
+background_sinks: list[BackgroundSink] = []
+
+
+def _add_file_sink(name: str, level: str | None, filter, **file_options):
+    if level is None:
+        return
+    path = BASE_DIR / "logs" / f"{name}.log"
+    if LOG_QUEUE_SIZE <= 0:
+        logger.add(path, level=level, filter=filter, format=_format(), **file_options)
+        return
+    sink = BackgroundSink(name)
+    background_sinks.append(sink)
+    logger.add(sink, level=level, filter=filter, format=_format())
+    # Only records of the writer thread reach the file, already formatted.
     logger.add(
-        f"{log_dir}/debug.log",
-        level="DEBUG",
-        filter=lambda record: record["level"].name == "DEBUG",
-        rotation="500 KB",
-        retention="10 days",
-        format=log_format,
+        path,
+        level=0,
+        filter=lambda record: record["extra"].get(WRITER_KEY) == name,
+        format="{message}",
+        **file_options,
     )
 
+
+def configure_logger():
+    """Add the log sinks on the first call; later calls return the same logger."""
+    global _configured
+    if _configured:
+        return logger
+    with _configure_lock:
+        if _configured:
+            return logger
+        logger.remove()
+        os.makedirs(BASE_DIR / "logs", exist_ok=True)
+
+        if LOG_STDERR_LEVEL is not None:
+            logger.add(
+                sys.stderr, level=LOG_STDERR_LEVEL, filter=_not_written, format=_format()
+            )
+        _add_file_sink(
+            "app", LOG_APP_FILE_LEVEL, _not_written,
+            rotation="1 week", retention="1 month",
+        )
+        _add_file_sink(
+            "error", LOG_ERROR_FILE_LEVEL, _only_level("ERROR"),
+            rotation="500 KB", retention="10 days",
+        )
+        _add_file_sink(
+            "debug", LOG_DEBUG_FILE_LEVEL, _only_level("DEBUG"),
+            rotation="500 KB", retention="10 days",
+        )
+        atexit.register(shutdown_logger)
+        _configured = True
     return logger
+
+
+def shutdown_logger():
+    """Write the queued messages and stop the writer threads."""
+    while background_sinks:
+        background_sinks.pop().stop()
@@ -0,0 +1,200 @@
+import time
+import weakref
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    ProcessCollector,
+    generate_latest,
+)
+from sqlalchemy import event
+
+# Own registry, so that several apps can be built in one process (tests).
+registry = CollectorRegistry()
+ProcessCollector(registry=registry)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency, by route template.",
+    ["method", "route"],
+    registry=registry,
+)
+REQUESTS = Counter(
+    "http_requests",
+    "HTTP requests, by route template and status code.",
+    ["method", "route", "status"],
+    registry=registry,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests being served.", registry=registry
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Database statement execution time, by statement type.",
+    ["database", "operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+    registry=registry,
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Connections currently checked out of the pool.",
+    ["database"],
+    registry=registry,
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "Password hashing and verification time, pool queueing included.",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    registry=registry,
+)
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    "password_hash_queue_depth",
+    "Password hashing jobs waiting for a free worker.",
+    registry=registry,
+)
+PASSWORD_HASH_IN_FLIGHT = Gauge(
+    "password_hash_jobs_in_flight",
+    "Password hashing jobs being run by a worker.",
+    registry=registry,
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected",
+    "Password hashing jobs rejected because the pool was saturated.",
+    registry=registry,
+)
+JWT_DURATION = Histogram(
+    "jwt_duration_seconds",
+    "JWT signing and verification time.",
+    ["operation"],
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01),
+    registry=registry,
+)
+LOGIN_RATE_LIMITED = Counter(
+    "login_rate_limited",
+    "Login attempts rejected before the password check, by exceeded limit.",
+    ["reason"],
+    registry=registry,
+)
+REFRESH_TOKEN_COMPACTION_ROWS = Counter(
+    "refresh_token_compaction_rows",
+    "Stale refresh tokens deleted by the compactions.",
+    registry=registry,
+)
+REFRESH_TOKEN_COMPACTION_DURATION = Histogram(
+    "refresh_token_compaction_duration_seconds",
+    "Refresh token compaction time, per batch or per run.",
+    ["scope"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0),
+    registry=registry,
+)
+
+# Label children bound once, the hot paths only call observe().
+PASSWORD_HASH_SECONDS = PASSWORD_HASH_DURATION.labels("hash")
+PASSWORD_VERIFY_SECONDS = PASSWORD_HASH_DURATION.labels("verify")
+JWT_ENCODE_SECONDS = JWT_DURATION.labels("encode")
+JWT_DECODE_SECONDS = JWT_DURATION.labels("decode")
+COMPACTION_BATCH_SECONDS = REFRESH_TOKEN_COMPACTION_DURATION.labels("batch")
+COMPACTION_RUN_SECONDS = REFRESH_TOKEN_COMPACTION_DURATION.labels("run")
+
+# Requests matching no route share one label, so that scans of random paths
+# cannot grow the number of time series.
+UNMATCHED_ROUTE = "unmatched"
+
+_instrumented_engines = weakref.WeakSet()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the latency, status and concurrency of the HTTP
+    requests, labelled by route template rather than by path.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._durations = {}
+        self._counters = {}
+
+    def _duration(self, method: str, route: str):
+        child = self._durations.get((method, route))
+        if child is None:
+            child = self._durations[method, route] = REQUEST_DURATION.labels(method, route)
+        return child
+
+    def _counter(self, method: str, route: str, status: int):
+        child = self._counters.get((method, route, status))
+        if child is None:
+            child = self._counters[method, route, status] = REQUESTS.labels(
+                method, route, str(status)
+            )
+        return child
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            REQUESTS_IN_PROGRESS.dec()
+            route = scope.get("route")
+            route = route.path if route is not None else UNMATCHED_ROUTE
+            self._duration(scope["method"], route).observe(elapsed)
+            self._counter(scope["method"], route, status).inc()
+
+
+def instrument_engine(engine, database: str):
+    """Time every statement run by ``engine`` and expose its pool usage."""
+    engine = getattr(engine, "sync_engine", engine)
+    if engine in _instrumented_engines:
+        return
+    _instrumented_engines.add(engine)
+    durations = {}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def observe_duration(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+        child = durations.get(operation)
+        if child is None:
+            child = durations[operation] = DB_QUERY_DURATION.labels(database, operation)
+        child.observe(elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def discard_timer(context):
+        if context.connection is not None:
+            starts = context.connection.info.get("query_start")
+            if starts:
+                starts.pop()
+
+    if hasattr(engine.pool, "checkedout"):
+        DB_POOL_CHECKED_OUT.labels(database).set_function(engine.pool.checkedout)
+
+
+def instrument_password_pool(pool):
+    """Expose the load of the password hashing ``pool``."""
+    PASSWORD_HASH_QUEUE_DEPTH.set_function(lambda: pool.stats.queue_depth)
+    PASSWORD_HASH_IN_FLIGHT.set_function(lambda: pool.stats.snapshot()["in_flight"])
+
+
+def metrics_response() -> tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, and their content type."""
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,220 @@
+import asyncio
+import contextvars
+import cProfile
+import functools
+import io
+import os
+import pstats
+import random
+import re
+import sys
+import time
+import weakref
+from pathlib import Path
+from dotenv import load_dotenv
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+load_dotenv()
+
+# Nothing is installed unless enabled: no middleware, no SQL listeners.
+PROFILING_ENABLED = (os.getenv("PROFILING_ENABLED") or "false").lower() == "true"
+# Share of the requests profiled without being asked to (0 to 1).
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE") or 0)
+PROFILES_DIR = Path(os.getenv("PROFILES_DIR") or BASE_DIR / "logs" / "profiles")
+# Oldest reports are deleted beyond this count.
+PROFILES_MAX_REPORTS = int(os.getenv("PROFILES_MAX_REPORTS") or 100)
+# Functions of the call tree listed in a report.
+PROFILE_MAX_FUNCTIONS = int(os.getenv("PROFILE_MAX_FUNCTIONS") or 40)
+
+# Request header asking for a profile, honored for admin tokens only.
+PROFILE_HEADER = b"x-profile"
+REPORT_HEADER = b"x-profile-report"
+
+_current_profile = contextvars.ContextVar("current_profile", default=None)
+_capturing_engines = weakref.WeakSet()
+
+
+class RequestProfile:
+    """Call trees and SQL statement timings gathered for one request."""
+
+    def __init__(self):
+        self.profilers = []
+        self.statements = []
+
+    def profiler(self) -> cProfile.Profile:
+        # cProfile follows a single thread, so every thread gets its own.
+        profiler = cProfile.Profile()
+        self.profilers.append(profiler)
+        return profiler
+
+    def report(self, title: str, elapsed: float) -> str:
+        out = io.StringIO()
+        sql_time = sum(duration for duration, _ in self.statements)
+        out.write(f"{title} in {elapsed * 1000:.1f} ms\n\n")
+        out.write(f"SQL statements: {len(self.statements)}, {sql_time * 1000:.1f} ms\n")
+        for duration, statement in self.statements:
+            out.write(f"{duration * 1000:8.2f} ms  {' '.join(statement.split())}\n")
+        out.write(f"\nCall tree (cumulative time, top {PROFILE_MAX_FUNCTIONS}):\n")
+        stats = pstats.Stats(*self.profilers, stream=out)
+        stats.sort_stats("cumulative").print_stats(PROFILE_MAX_FUNCTIONS)
+        return out.getvalue()
+
+
+def _profiler_active() -> bool:
+    """
+    Whether a profiler already watches every thread: from Python 3.12,
+    cProfile runs on sys.monitoring, one profiler per interpreter.
+    """
+    monitoring = getattr(sys, "monitoring", None)
+    return monitoring is not None and monitoring.get_tool(monitoring.PROFILER_ID) is not None
+
+
+def profile_sync_endpoint(endpoint):
+    """
+    Profile a sync endpoint in the threadpool worker running it, which the
+    profiler of the event loop thread does not see before Python 3.12.
+    """
+
+    if getattr(endpoint, "profiled", False):
+        return endpoint  # Already wrapped, the route was included in a router.
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        profile = _current_profile.get()
+        if profile is None or _profiler_active():
+            return endpoint(*args, **kwargs)
+        profiler = profile.profiler()
+        profiler.enable()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            profiler.disable()
+
+    wrapper.profiled = True
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """Route class of the routers, profiling sync endpoints when enabled."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if PROFILING_ENABLED and not asyncio.iscoroutinefunction(endpoint):
+            endpoint = profile_sync_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def capture_statements(engine):
+    """Record the statements ``engine`` runs for the request being profiled."""
+    engine = getattr(engine, "sync_engine", engine)
+    if engine in _capturing_engines:
+        return
+    _capturing_engines.add(engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        if _current_profile.get() is not None:
+            conn.info.setdefault("profile_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        profile = _current_profile.get()
+        starts = conn.info.get("profile_start")
+        if profile is not None and starts:
+            profile.statements.append((time.perf_counter() - starts.pop(), statement))
+
+
+def _bearer_token(headers: list) -> str | None:
+    for name, value in headers:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                return token
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling the requests carrying an ``X-Profile`` header
+    and an admin bearer token, and a random share of the others. Each report
+    is saved to ``reports_dir``; its file name is returned in the
+    ``X-Profile-Report`` header of the profiled responses. The event loop
+    thread is profiled as a whole, so concurrent requests may show up too.
+    """
+
+    def __init__(
+        self,
+        app,
+        is_admin,
+        sample_rate: float = PROFILING_SAMPLE_RATE,
+        reports_dir: Path = PROFILES_DIR,
+        max_reports: int = PROFILES_MAX_REPORTS,
+    ):
+        self.app = app
+        self.is_admin = is_admin
+        self.sample_rate = sample_rate
+        self.reports_dir = Path(reports_dir)
+        self.max_reports = max_reports
+        self._profiling = False
+
+    def _requested(self, scope) -> bool:
+        headers = scope["headers"]
+        if not any(name == PROFILE_HEADER for name, _ in headers):
+            return False
+        token = _bearer_token(headers)
+        try:
+            return token is not None and self.is_admin(token)
+        except Exception:
+            return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        requested = self._requested(scope)
+        sampled = self.sample_rate and random.random() < self.sample_rate
+        # The event loop thread runs one profiler at a time.
+        if self._profiling or not (requested or sampled):
+            await self.app(scope, receive, send)
+            return
+
+        path = re.sub(r"[^A-Za-z0-9]+", "-", scope["path"]).strip("-") or "root"
+        report_name = f"{time.time_ns()}-{scope['method']}-{path}.txt"
+        status = 500
+
+        async def send_with_report(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if requested:
+                    headers = list(message.get("headers", []))
+                    headers.append((REPORT_HEADER, report_name.encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        profile = RequestProfile()
+        reset = _current_profile.set(profile)
+        profiler = profile.profiler()
+        self._profiling = True
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_report)
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - start
+            self._profiling = False
+            _current_profile.reset(reset)
+            title = f"{scope['method']} {scope['path']} -> {status}"
+            await asyncio.to_thread(
+                self._save, report_name, profile.report(title, elapsed)
+            )
+
+    def _save(self, name: str, report: str):
+        self.reports_dir.mkdir(parents=True, exist_ok=True)
+        (self.reports_dir / name).write_text(report)
+        reports = sorted(self.reports_dir.glob("*.txt"))
+        for old in reports[: max(len(reports) - self.max_reports, 0)]:
+            old.unlink(missing_ok=True)
@@ -1,7 +1,12 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, Response
+from metrics import MetricsMiddleware, metrics_response
+from profiling import PROFILING_ENABLED, ProfilingMiddleware
 from routes import router
+from security import check_jwks, is_admin_token
 import os
 from dotenv import load_dotenv
 
@@ -14,9 +19,16 @@ FRONTEND_URL = os.getenv("FRONTEND_URL", f"http://localhost:{PORT_FRONT}")
 title = f"{APP_NAME} BACKEND API"
 
 
-def create_app() -> FastAPI:
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(check_jwks)
+    yield
+
+
+def create_app(profiling: bool = PROFILING_ENABLED) -> FastAPI:
     app = FastAPI(
         title=title,
+        lifespan=lifespan,
     )
 
     app.add_middleware(
@@ -26,6 +38,9 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    app.add_middleware(MetricsMiddleware)
+    if profiling:
+        app.add_middleware(ProfilingMiddleware, is_admin=is_admin_token)
 
     app.include_router(router)
 
@@ -33,6 +48,11 @@ def create_app() -> FastAPI:
     async def root():
         return RedirectResponse(url="/docs")
 
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        content, media_type = metrics_response()
+        return Response(content, media_type=media_type)
+
     return app
 
 
@@ -0,0 +1,104 @@
+import time
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    ProcessCollector,
+    generate_latest,
+)
+
+# Own registry, so that several apps can be built in one process (tests).
+registry = CollectorRegistry()
+ProcessCollector(registry=registry)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency, by route template.",
+    ["method", "route"],
+    registry=registry,
+)
+REQUESTS = Counter(
+    "http_requests",
+    "HTTP requests, by route template and status code.",
+    ["method", "route", "status"],
+    registry=registry,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests being served.", registry=registry
+)
+JWT_VERIFY_SECONDS = Histogram(
+    "jwt_verify_duration_seconds",
+    "Access token signature verification time (claims cache misses).",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.1),
+    registry=registry,
+)
+CLAIMS_CACHE_LOOKUPS = Counter(
+    "claims_cache_lookups",
+    "Claims cache lookups, by result.",
+    ["result"],
+    registry=registry,
+)
+CLAIMS_CACHE_HITS = CLAIMS_CACHE_LOOKUPS.labels("hit")
+CLAIMS_CACHE_MISSES = CLAIMS_CACHE_LOOKUPS.labels("miss")
+
+# Requests matching no route share one label, so that scans of random paths
+# cannot grow the number of time series.
+UNMATCHED_ROUTE = "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the latency, status and concurrency of the HTTP
+    requests, labelled by route template rather than by path.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._durations = {}
+        self._counters = {}
+
+    def _duration(self, method: str, route: str):
+        child = self._durations.get((method, route))
+        if child is None:
+            child = self._durations[method, route] = REQUEST_DURATION.labels(method, route)
+        return child
+
+    def _counter(self, method: str, route: str, status: int):
+        child = self._counters.get((method, route, status))
+        if child is None:
+            child = self._counters[method, route, status] = REQUESTS.labels(
+                method, route, str(status)
+            )
+        return child
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            REQUESTS_IN_PROGRESS.dec()
+            route = scope.get("route")
+            route = route.path if route is not None else UNMATCHED_ROUTE
+            self._duration(scope["method"], route).observe(elapsed)
+            self._counter(scope["method"], route, status).inc()
+
+
+def metrics_response() -> tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, and their content type."""
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,130 @@
+# The backend image is built from this directory alone, so the middleware
+# mirrors auth/utils/profiling.py rather than importing it; keep them in sync.
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import random
+import re
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+
+BASE_DIR = Path(__file__).resolve().parent
+
+load_dotenv()
+
+# The middleware is only installed when enabled.
+PROFILING_ENABLED = (os.getenv("PROFILING_ENABLED") or "false").lower() == "true"
+# Share of the requests profiled without being asked to (0 to 1).
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE") or 0)
+PROFILES_DIR = Path(os.getenv("PROFILES_DIR") or BASE_DIR / "logs" / "profiles")
+# Oldest reports are deleted beyond this count.
+PROFILES_MAX_REPORTS = int(os.getenv("PROFILES_MAX_REPORTS") or 100)
+# Functions of the call tree listed in a report.
+PROFILE_MAX_FUNCTIONS = int(os.getenv("PROFILE_MAX_FUNCTIONS") or 40)
+
+# Request header asking for a profile, honored for admin tokens only.
+PROFILE_HEADER = b"x-profile"
+REPORT_HEADER = b"x-profile-report"
+
+
+def profile_report(profiler: cProfile.Profile, title: str, elapsed: float) -> str:
+    out = io.StringIO()
+    out.write(f"{title} in {elapsed * 1000:.1f} ms\n\n")
+    out.write(f"Call tree (cumulative time, top {PROFILE_MAX_FUNCTIONS}):\n")
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats("cumulative").print_stats(PROFILE_MAX_FUNCTIONS)
+    return out.getvalue()
+
+
+def _bearer_token(headers: list) -> str | None:
+    for name, value in headers:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                return token
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling the requests carrying an ``X-Profile`` header
+    and an admin bearer token, and a random share of the others. Each report
+    is saved to ``reports_dir``; its file name is returned in the
+    ``X-Profile-Report`` header of the profiled responses. The event loop
+    thread is profiled as a whole, so concurrent requests may show up too.
+    """
+
+    def __init__(
+        self,
+        app,
+        is_admin,
+        sample_rate: float = PROFILING_SAMPLE_RATE,
+        reports_dir: Path = PROFILES_DIR,
+        max_reports: int = PROFILES_MAX_REPORTS,
+    ):
+        self.app = app
+        self.is_admin = is_admin
+        self.sample_rate = sample_rate
+        self.reports_dir = Path(reports_dir)
+        self.max_reports = max_reports
+        self._profiling = False
+
+    def _requested(self, scope) -> bool:
+        headers = scope["headers"]
+        if not any(name == PROFILE_HEADER for name, _ in headers):
+            return False
+        token = _bearer_token(headers)
+        try:
+            return token is not None and self.is_admin(token)
+        except Exception:
+            return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        requested = self._requested(scope)
+        sampled = self.sample_rate and random.random() < self.sample_rate
+        # The event loop thread runs one profiler at a time.
+        if self._profiling or not (requested or sampled):
+            await self.app(scope, receive, send)
+            return
+
+        path = re.sub(r"[^A-Za-z0-9]+", "-", scope["path"]).strip("-") or "root"
+        report_name = f"{time.time_ns()}-{scope['method']}-{path}.txt"
+        status = 500
+
+        async def send_with_report(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if requested:
+                    headers = list(message.get("headers", []))
+                    headers.append((REPORT_HEADER, report_name.encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        profiler = cProfile.Profile()
+        self._profiling = True
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_report)
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - start
+            self._profiling = False
+            title = f"{scope['method']} {scope['path']} -> {status}"
+            await asyncio.to_thread(
+                self._save, report_name, profile_report(profiler, title, elapsed)
+            )
+
+    def _save(self, name: str, report: str):
+        self.reports_dir.mkdir(parents=True, exist_ok=True)
+        (self.reports_dir / name).write_text(report)
+        reports = sorted(self.reports_dir.glob("*.txt"))
+        for old in reports[: max(len(reports) - self.max_reports, 0)]:
+            old.unlink(missing_ok=True)
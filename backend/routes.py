@@ -1,5 +1,6 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from fastapi.responses import JSONResponse
+from security import TokenClaims, get_token_claims
 
 router = APIRouter()
 
@@ -7,3 +8,8 @@ router = APIRouter()
 @router.get("/health")
 async def health_check():
     return JSONResponse(status_code=200, content={"status": "ok"})
+
+
+@router.get("/me", response_model=TokenClaims)
+async def read_token_claims(claims: TokenClaims = Depends(get_token_claims)):
+    return claims
@@ -0,0 +1,245 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List
+import httpx
+from dotenv import load_dotenv
+from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import OAuth2PasswordBearer, SecurityScopes
+from jose import JWTError, jwk, jwt
+from pydantic import BaseModel, ValidationError
+from metrics import CLAIMS_CACHE_HITS, CLAIMS_CACHE_MISSES, JWT_VERIFY_SECONDS
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+PORT_AUTH = os.getenv("PORT_AUTH", "8000")
+AUTH_URL = os.getenv("AUTH_URL") or f"http://localhost:{PORT_AUTH}"
+AUTH_JWKS_URL = os.getenv("AUTH_JWKS_URL") or f"{AUTH_URL}/.well-known/jwks.json"
+# Seconds the key set is trusted before being fetched again.
+JWKS_CACHE_TTL = float(os.getenv("JWKS_CACHE_TTL") or 300)
+# Minimum delay between two fetches triggered by an unknown key id.
+JWKS_MIN_REFRESH_INTERVAL = float(os.getenv("JWKS_MIN_REFRESH_INTERVAL") or 30)
+JWKS_FETCH_TIMEOUT = float(os.getenv("JWKS_FETCH_TIMEOUT") or 5)
+# Verified tokens kept in memory, 0 disables the cache.
+CLAIMS_CACHE_SIZE = int(os.getenv("CLAIMS_CACHE_SIZE") or 10000)
+
+# Only asymmetric algorithms: a token must never be verified with a public
+# key used as an HMAC secret.
+ALLOWED_ALGORITHMS = ("RS256", "ES256")
+
+
+def fetch_jwks(url: str = AUTH_JWKS_URL) -> dict:
+    response = httpx.get(url, timeout=JWKS_FETCH_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+
+class JWKSCache:
+    """
+    Public keys of the auth service, fetched from its JWKS endpoint.
+
+    Keys are kept for ``ttl`` seconds. A token signed with an unknown key id
+    triggers an early refresh, at most once every ``min_refresh_interval``
+    seconds, so that key rotations are picked up without letting forged kids
+    hammer the auth service. If the auth service cannot be reached, the keys
+    already known keep being used.
+    """
+
+    def __init__(
+        self,
+        url: str = AUTH_JWKS_URL,
+        ttl: float = JWKS_CACHE_TTL,
+        min_refresh_interval: float = JWKS_MIN_REFRESH_INTERVAL,
+        fetch=fetch_jwks,
+    ):
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self._fetch = fetch
+        self._keys: dict[str, tuple] = {}
+        self._fetched_at = None
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> bool:
+        """Fetch the keys, returning whether the auth service answered."""
+        self._fetched_at = time.monotonic()
+        try:
+            jwks = self._fetch(self.url)
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(f"Could not fetch the JWKS from {self.url}: {e}")
+            return False
+        keys = {}
+        for key in jwks.get("keys", []):
+            if key.get("alg") in ALLOWED_ALGORITHMS and key.get("kid"):
+                keys[key["kid"]] = (jwk.construct(key, key["alg"]), key["alg"])
+        self._keys = keys
+        return True
+
+    def check(self):
+        """
+        Fetch the keys at startup. An auth service publishing no key this
+        service accepts (it signs with HS256) would have every token rejected,
+        so that raises RuntimeError. An unreachable one is retried on use.
+        """
+        with self._lock:
+            if self._refresh() and not self._keys:
+                raise RuntimeError(
+                    f"The JWKS at {self.url} has no {' or '.join(ALLOWED_ALGORITHMS)} key: "
+                    "set JWT_ALGORITHM=ES256 (or RS256) for the auth service."
+                )
+
+    def get_key(self, kid: str) -> tuple:
+        """Return the ``(key, algorithm)`` pair published under ``kid``."""
+        with self._lock:
+            now = time.monotonic()
+            if self._fetched_at is None or now - self._fetched_at >= self.ttl:
+                self._refresh()
+            elif kid not in self._keys and now - self._fetched_at >= self.min_refresh_interval:
+                self._refresh()
+            key = self._keys.get(kid)
+        if key is None:
+            raise JWTError(f"Unknown key id: '{kid}'")
+        return key
+
+    def clear(self):
+        with self._lock:
+            self._keys = {}
+            self._fetched_at = None
+
+
+jwks_cache = JWKSCache()
+
+
+def check_jwks():
+    jwks_cache.check()
+
+
+def verify_token(token: str, jwks: JWKSCache | None = None) -> dict:
+    """
+    Verify a token issued by the auth service with its published public keys
+    and return the claims. Raises JWTError when the token is not valid.
+    """
+    header = jwt.get_unverified_header(token)
+    key, algorithm = (jwks or jwks_cache).get_key(header.get("kid"))
+    if header.get("alg") != algorithm:
+        raise JWTError("The token algorithm does not match its key.")
+    return jwt.decode(token, key, algorithms=[algorithm])
+
+
+class TokenClaims(BaseModel):
+    sub: str
+    exp: int
+    role: str
+    scopes: List[str]
+    app: str | None = None
+
+
+class ClaimsCache:
+    """
+    LRU cache of the claims of verified access tokens, each kept until the
+    token expires. A hit costs a dictionary lookup instead of a signature
+    verification.
+    """
+
+    def __init__(self, max_size: int = CLAIMS_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, TokenClaims] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> TokenClaims | None:
+        with self._lock:
+            claims = self._entries.get(token)
+            if claims is None:
+                return None
+            if claims.exp <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return claims
+
+    def set(self, token: str, claims: TokenClaims):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[token] = claims
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+claims_cache = ClaimsCache()
+
+oauth2_scheme = OAuth2PasswordBearer(
+    tokenUrl=f"{AUTH_URL}/auth/login",
+    scopes={
+        "admin": "Access to administrative operations",
+        "reader": "Read-only access to resources",
+    },
+)
+
+
+def credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def verify_access_token(token: str) -> TokenClaims:
+    """Verify an access token and return its claims, raising JWTError if invalid."""
+    with JWT_VERIFY_SECONDS.time():
+        payload = verify_token(token)
+    if payload.get("type") != "access":
+        raise JWTError("Not an access token.")
+    try:
+        return TokenClaims(**payload)
+    except ValidationError as e:
+        raise JWTError(f"Invalid token claims: {e.errors()}")
+
+
+def is_admin_token(token: str) -> bool:
+    return "admin" in verify_access_token(token).scopes
+
+
+async def get_token_claims(
+    security_scopes: SecurityScopes, token: str = Depends(oauth2_scheme)
+) -> TokenClaims:
+    """
+    Authenticate a backend request without calling the auth service.
+
+    Cached tokens are served inline; others are verified against the JWKS in
+    the threadpool, since that can mean fetching the keys over the network.
+    Scopes are enforced like the auth service's get_current_user.
+    """
+    claims = claims_cache.get(token)
+    if claims is None:
+        CLAIMS_CACHE_MISSES.inc()
+        try:
+            claims = await run_in_threadpool(verify_access_token, token)
+        except JWTError:
+            raise credentials_exception()
+        claims_cache.set(token, claims)
+    else:
+        CLAIMS_CACHE_HITS.inc()
+
+    for scope in security_scopes.scopes:
+        if scope not in claims.scopes:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not enough permissions",
+            )
+
+    return claims
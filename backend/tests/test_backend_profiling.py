@@ -0,0 +1,33 @@
+import os
+import sys
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from profiling import ProfilingMiddleware
+
+
+async def busy_endpoint():
+    return {"total": sum(range(10000))}
+
+
+def test_profiles_admin_requests(tmp_path):
+    app = FastAPI()
+    app.add_api_route("/busy", busy_endpoint)
+    app.add_middleware(
+        ProfilingMiddleware,
+        is_admin=lambda token: token == "admin-token",
+        reports_dir=tmp_path,
+    )
+    client = TestClient(app)
+
+    assert "x-profile-report" not in client.get("/busy", headers={"X-Profile": "1"}).headers
+    response = client.get(
+        "/busy", headers={"X-Profile": "1", "Authorization": "Bearer admin-token"}
+    )
+
+    report = (tmp_path / response.headers["x-profile-report"]).read_text()
+    assert report.startswith("GET /busy -> 200 in")
+    assert "busy_endpoint" in report
+    assert len(list(tmp_path.iterdir())) == 1
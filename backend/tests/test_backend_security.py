@@ -0,0 +1,179 @@
+import asyncio
+import os
+import sys
+import time
+import pytest
+from fastapi import HTTPException
+from fastapi.security import SecurityScopes
+from fastapi.testclient import TestClient
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from jose import JWTError, jwk, jwt
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import metrics
+import security
+from security import JWKSCache, claims_cache, get_token_claims, verify_token
+from backend.main import create_app
+
+
+def make_key(kid):
+    pem = ec.generate_private_key(ec.SECP256R1()).private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    private_key = jwk.construct(pem, "ES256")
+    public_jwk = private_key.public_key().to_dict()
+    public_jwk.update({"kid": kid, "alg": "ES256", "use": "sig"})
+    return private_key, public_jwk
+
+
+def sign(private_key, kid, **claims):
+    claims.setdefault("exp", int(time.time()) + 60)
+    return jwt.encode(claims, private_key, algorithm="ES256", headers={"kid": kid})
+
+
+class FakeAuthService:
+    def __init__(self, *public_jwks):
+        self.keys = list(public_jwks)
+        self.calls = 0
+        self.down = False
+
+    def __call__(self, url):
+        self.calls += 1
+        if self.down:
+            raise ValueError("connection refused")
+        return {"keys": self.keys}
+
+
+def test_verify_token_fetches_the_key_set_once():
+    private_key, public_jwk = make_key("k1")
+    auth_service = FakeAuthService(public_jwk)
+    jwks = JWKSCache(fetch=auth_service)
+
+    for _ in range(3):
+        assert verify_token(sign(private_key, "k1", sub="anon"), jwks)["sub"] == "anon"
+    assert auth_service.calls == 1
+
+
+def test_unknown_kid_triggers_a_throttled_refresh():
+    old_key, old_jwk = make_key("k1")
+    new_key, new_jwk = make_key("k2")
+    auth_service = FakeAuthService(old_jwk)
+    jwks = JWKSCache(fetch=auth_service, min_refresh_interval=0)
+    verify_token(sign(old_key, "k1"), jwks)
+
+    # Rotation on the auth side: the new kid is fetched on first sight.
+    auth_service.keys.append(new_jwk)
+    assert verify_token(sign(new_key, "k2", sub="anon"), jwks)["sub"] == "anon"
+    assert auth_service.calls == 2
+
+    throttled = JWKSCache(fetch=auth_service, min_refresh_interval=3600)
+    verify_token(sign(old_key, "k1"), throttled)
+    for _ in range(3):
+        with pytest.raises(JWTError):
+            verify_token(sign(old_key, "forged"), throttled)
+    assert auth_service.calls == 3
+
+
+def test_keys_survive_an_unreachable_auth_service():
+    private_key, public_jwk = make_key("k1")
+    auth_service = FakeAuthService(public_jwk)
+    jwks = JWKSCache(fetch=auth_service, ttl=0)
+    verify_token(sign(private_key, "k1"), jwks)
+
+    auth_service.down = True
+    assert verify_token(sign(private_key, "k1", sub="anon"), jwks)["sub"] == "anon"
+
+
+def test_startup_check_rejects_an_empty_key_set(monkeypatch):
+    auth_service = FakeAuthService()
+    monkeypatch.setattr(security, "jwks_cache", JWKSCache(fetch=auth_service))
+    with pytest.raises(RuntimeError):
+        with TestClient(create_app()):
+            pass
+
+    # An auth service not started yet is retried on use instead.
+    auth_service.down = True
+    with TestClient(create_app()):
+        pass
+    auth_service.down = False
+    auth_service.keys.append(make_key("k1")[1])
+    JWKSCache(fetch=auth_service).check()
+
+
+def test_rejects_invalid_tokens():
+    private_key, public_jwk = make_key("k1")
+    other_key, _ = make_key("k1")
+    jwks = JWKSCache(fetch=FakeAuthService(public_jwk))
+
+    with pytest.raises(JWTError):
+        verify_token(sign(other_key, "k1"), jwks)
+    with pytest.raises(JWTError):
+        verify_token(sign(private_key, "k1", exp=int(time.time()) - 10), jwks)
+    # A public key must never be accepted as an HMAC secret.
+    hs256 = jwt.encode({"sub": "anon"}, "secret", algorithm="HS256", headers={"kid": "k1"})
+    with pytest.raises(JWTError):
+        verify_token(hs256, jwks)
+
+
+@pytest.fixture
+def signing_key(monkeypatch):
+    private_key, public_jwk = make_key("k1")
+    monkeypatch.setattr(security, "jwks_cache", JWKSCache(fetch=FakeAuthService(public_jwk)))
+    claims_cache.clear()
+    yield private_key
+    claims_cache.clear()
+
+
+def access_token(private_key, scopes=("reader",), **claims):
+    return sign(
+        private_key, "k1", sub="anon", role="reader", type="access",
+        scopes=list(scopes), **claims,
+    )
+
+
+def test_protected_route_requires_a_valid_token(signing_key):
+    client = TestClient(create_app())
+    token = access_token(signing_key)
+
+    assert client.get("/me").status_code == 401
+    assert client.get("/me", headers={"Authorization": "Bearer nope"}).status_code == 401
+    refresh = sign(signing_key, "k1", sub="anon", type="refresh")
+    assert client.get("/me", headers={"Authorization": f"Bearer {refresh}"}).status_code == 401
+
+    response = client.get("/me", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json()["sub"] == "anon"
+
+
+def test_claims_are_cached_and_scopes_enforced(signing_key):
+    token = access_token(signing_key)
+    claims = asyncio.run(get_token_claims(SecurityScopes(["reader"]), token))
+    assert claims_cache.get(token) is claims
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(get_token_claims(SecurityScopes(["admin"]), token))
+    assert error.value.status_code == 403
+
+    expired = access_token(signing_key, exp=int(time.time()) - 1)
+    claims_cache.set(expired, claims.model_copy(update={"exp": int(time.time()) - 1}))
+    assert claims_cache.get(expired) is None
+
+
+def test_metrics_count_cache_hits(signing_key):
+    client = TestClient(create_app())
+    headers = {"Authorization": f"Bearer {access_token(signing_key)}"}
+    hits = metrics.registry.get_sample_value("claims_cache_lookups_total", {"result": "hit"})
+
+    client.get("/me", headers=headers)
+    client.get("/me", headers=headers)
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert 'route="/me",status="200"' in response.text
+    assert metrics.registry.get_sample_value(
+        "claims_cache_lookups_total", {"result": "hit"}
+    ) == hits + 1
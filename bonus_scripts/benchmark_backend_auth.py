@@ -0,0 +1,91 @@
+# flake8: noqa: E402
+"""
+Measure the per-request cost of the backend token verification, with the
+claims cache (hit) and without it (full signature verification).
+
+    python bonus_scripts/benchmark_backend_auth.py --iterations 20000
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from fastapi.security import SecurityScopes
+from jose import jwk, jwt
+
+backend_path = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(backend_path))
+
+import security
+from security import JWKSCache, claims_cache, get_token_claims, verify_access_token
+
+
+def make_token(algorithm: str) -> str:
+    if algorithm == "RS256":
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    else:
+        private_key = ec.generate_private_key(ec.SECP256R1())
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    key = jwk.construct(pem, algorithm)
+    public_jwk = key.public_key().to_dict()
+    public_jwk.update({"kid": "bench", "alg": algorithm})
+    security.jwks_cache = JWKSCache(fetch=lambda url: {"keys": [public_jwk]})
+
+    claims = {
+        "sub": "anon",
+        "role": "reader",
+        "type": "access",
+        "scopes": ["reader"],
+        "exp": int(time.time()) + 3600,
+    }
+    return jwt.encode(claims, key, algorithm=algorithm, headers={"kid": "bench"})
+
+
+def per_call_us(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def run(algorithm: str, iterations: int) -> dict:
+    token = make_token(algorithm)
+    scopes = SecurityScopes(["reader"])
+    loop = asyncio.new_event_loop()
+    claims_cache.clear()
+    loop.run_until_complete(get_token_claims(scopes, token))
+
+    def cached():
+        # The cached path never awaits, so stepping the coroutine once runs it.
+        coroutine = get_token_claims(scopes, token)
+        try:
+            coroutine.send(None)
+        except StopIteration:
+            pass
+
+    result = {
+        "cached": per_call_us(cached, iterations),
+        "uncached": per_call_us(lambda: verify_access_token(token), iterations // 10),
+    }
+    loop.close()
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    for algorithm in ("ES256", "RS256"):
+        result = run(algorithm, args.iterations)
+        print(
+            f"{algorithm}  cached: {result['cached']:7.2f} us/request  "
+            f"uncached: {result['uncached']:8.2f} us/request"
+        )
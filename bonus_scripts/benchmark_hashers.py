@@ -0,0 +1,61 @@
+# flake8: noqa: E402
+"""
+Compare the password hashers at their configured parameters: latency of one
+hash, and throughput per core when every core hashes at once.
+
+    python bonus_scripts/benchmark_hashers.py --hashes 20 --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+auth_path = Path(__file__).resolve().parent.parent / "auth"
+sys.path.insert(0, str(auth_path))
+
+from modules.api.auth.hashers import HASHERS, get_hasher
+
+PASSWORD = "benchmark-password"
+
+
+def hash_many(hasher, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        hasher.hash(PASSWORD)
+    return time.perf_counter() - start
+
+
+def run(name: str, hashes: int, workers: int) -> dict:
+    hasher = get_hasher(name)
+    hasher.hash(PASSWORD)  # Warm up, and calibrate bcrypt.
+    sequential = hash_many(hasher, hashes)
+    # Processes, not threads, so the GIL cannot hide a lack of parallelism.
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(hash_many, [hasher] * workers, [1] * workers))
+        start = time.perf_counter()
+        list(executor.map(hash_many, [hasher] * workers, [hashes] * workers))
+        parallel = time.perf_counter() - start
+    return {
+        "latency_ms": sequential / hashes * 1000,
+        "sequential": hashes / sequential,
+        "per_core": hashes * workers / parallel / workers,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hashes", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--hasher", choices=list(HASHERS), action="append")
+    args = parser.parse_args()
+
+    print(f"{args.workers} workers")
+    for name in args.hasher or HASHERS:
+        result = run(name, args.hashes, args.workers)
+        print(
+            f"{name:<9} {result['latency_ms']:8.1f} ms/hash  "
+            f"{result['sequential']:7.1f} hashes/s sequential  "
+            f"{result['per_core']:7.1f} hashes/s per core"
+        )
@@ -0,0 +1,139 @@
+# flake8: noqa: E402
+"""
+Measure login throughput under a mixed read/write load, with and without the
+SQLite pragma tuning applied by create_session.
+
+    python bonus_scripts/benchmark_login.py --duration 10 --writers 4 --readers 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+auth_path = Path(__file__).resolve().parent.parent / "auth"
+sys.path.insert(0, str(auth_path))
+# The signing keys generated on import, and the default users database, go to
+# a temporary directory rather than to auth/database.
+bench_dir = tempfile.TemporaryDirectory(prefix="benchmark-login-")
+os.environ["JWT_KEYS_DIR"] = os.path.join(bench_dir.name, "keys")
+os.environ["USERS_DATABASE_URL"] = f"sqlite:///{bench_dir.name}/users.db"
+
+from fastapi.testclient import TestClient
+from modules.api.main import create_app
+from modules.api.auth import hashers
+from modules.api.auth.rate_limit import LoginRateLimiter, MemoryStorage, get_login_rate_limiter
+from modules.api.auth.security import anonymize
+from modules.api.users.models import User, Role
+from modules.database.dependencies import get_users_db
+from modules.database.session import UsersBase, create_session
+
+USERS = 50
+PASSWORD = "benchmark-password"
+
+
+def seed(SessionLocal):
+    hashed = hashers.get_hasher("bcrypt").hash(PASSWORD)
+    with SessionLocal() as db:
+        role = Role(role="reader")
+        db.add(role)
+        db.flush()
+        db.add_all(
+            User(
+                email=anonymize(f"user{i}@example.com"),
+                name=f"User {i}",
+                hashed_password=hashed,
+                role_id=role.id,
+            )
+            for i in range(USERS)
+        )
+        db.commit()
+
+
+def run(tune_sqlite: bool, duration: float, writers: int, readers: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, SessionLocal = create_session(
+            f"sqlite:///{tmp}/users.db", tune_sqlite=tune_sqlite
+        )
+        UsersBase.metadata.create_all(bind=engine)
+        seed(SessionLocal)
+
+        def override_get_users_db():
+            db = SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app = create_app()
+        app.dependency_overrides[get_users_db] = override_get_users_db
+        # Every login comes from one client, the limits would reject most of them.
+        rate_limiter = LoginRateLimiter(MemoryStorage(), ip_limit=0, email_limit=0)
+        app.dependency_overrides[get_login_rate_limiter] = lambda: rate_limiter
+        counts = {"logins": 0, "reads": 0, "errors": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+
+        with TestClient(app) as client:
+            token = client.post(
+                "/auth/login",
+                data={"username": "user0@example.com", "password": PASSWORD},
+            ).json()["access_token"]
+
+            def writer(n):
+                while time.perf_counter() < deadline:
+                    response = client.post(
+                        "/auth/login",
+                        data={
+                            "username": f"user{n % USERS}@example.com",
+                            "password": PASSWORD,
+                        },
+                    )
+                    key = "logins" if response.status_code == 200 else "errors"
+                    with lock:
+                        counts[key] += 1
+
+            def reader(_):
+                while time.perf_counter() < deadline:
+                    response = client.get(
+                        "/users/users/me",
+                        headers={"Authorization": f"Bearer {token}"},
+                    )
+                    key = "reads" if response.status_code == 200 else "errors"
+                    with lock:
+                        counts[key] += 1
+
+            threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+            threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        engine.dispose()
+
+    return {
+        "logins/s": counts["logins"] / duration,
+        "reads/s": counts["reads"] / duration,
+        "errors": counts["errors"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    args = parser.parse_args()
+
+    # The lowest cost, for seeding and for the logins, or each first login
+    # would rehash at the calibrated cost and the writers would time bcrypt.
+    hashers._hashers["bcrypt"] = hashers.BcryptHasher(rounds=4)
+    for label, tune_sqlite in (("rollback journal", False), ("WAL + pragmas", True)):
+        result = run(tune_sqlite, args.duration, args.writers, args.readers)
+        print(
+            f"{label:<18} logins/s: {result['logins/s']:8.1f}  "
+            f"reads/s: {result['reads/s']:8.1f}  errors: {result['errors']}"
+        )
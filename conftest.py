@@ -1,8 +1,30 @@
 import sys
 import os
+import tempfile
 
 root = os.path.abspath(os.path.dirname(__file__))
 for p in ["auth", "backend"]:
     path = os.path.join(root, p)
     if os.path.isdir(path) and path not in sys.path:
         sys.path.insert(0, path)
+
+# Signing keys generated by the tests stay out of the source tree.
+os.environ.setdefault("JWT_KEYS_DIR", tempfile.mkdtemp(prefix="jwt-keys-"))
+
+
+def pytest_addoption(parser):
+    # Declared here, the rootdir conftest, for the auth/tests/benchmarks suite.
+    group = parser.getgroup("bench", "benchmarks (auth/tests/benchmarks)")
+    group.addoption("--bench", action="store_true", help="run the benchmarks")
+    group.addoption("--bench-json", metavar="PATH", help="write the results to PATH")
+    group.addoption(
+        "--bench-compare",
+        metavar="PATH",
+        help="fail when a result regressed compared to the results saved in PATH",
+    )
+    group.addoption(
+        "--bench-max-regression",
+        type=float,
+        default=0.2,
+        help="tolerated slowdown for --bench-compare, as a ratio (default: 0.2)",
+    )
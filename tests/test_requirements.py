@@ -17,10 +17,13 @@ def test_requirements_completeness():
             )
 
     try:
-        detected = load_requirements(temp_file)
+        # pipreqs reports some modules by their name, not by their distribution.
+        aliases = {"argon2": "argon2-cffi"}
+        detected = {aliases.get(name, name) for name in load_requirements(temp_file)}
         declared = load_requirements("requirements.txt")
 
-        ignored = {"python_bcrypt", "setuptools"}
+        # redis: optional, only imported when LOGIN_RATE_LIMIT_STORAGE is a redis:// URL.
+        ignored = {"python_bcrypt", "setuptools", "redis"}
 
         missing = detected - declared - ignored
 